@@ -0,0 +1,53 @@
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class VersaoDesatualizada(APIException):
+    """
+    O registro foi alterado por outra requisição depois de lido (412 Precondition Failed).
+    """
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = {'error': 'O registro foi alterado por outro usuário. Recarregue os dados e tente novamente.'}
+    default_code = 'versao_desatualizada'
+
+
+def etag_versao(versao):
+    """
+    Monta o ETag (forte) correspondente à versão de um registro.
+    """
+    return f'"{versao}"'
+
+
+def get_versoes_if_match(request):
+    """
+    Retorna as versões aceitas no cabeçalho If-Match da requisição.
+
+    Sem o cabeçalho (ou com "*") retorna None, indicando que qualquer versão
+    é aceita. ETags fracos (W/"1") são aceitos e os que não correspondem a
+    uma versão são ignorados.
+    """
+    if_match = request.headers.get('If-Match')
+    if not if_match or if_match.strip() == '*':
+        return None
+
+    versoes = set()
+    for etag in if_match.split(','):
+        etag = etag.strip()
+        if etag.startswith('W/'):
+            etag = etag[2:]
+        if len(etag) > 2 and etag[0] == etag[-1] == '"' and etag[1:-1].isdigit():
+            versoes.add(int(etag[1:-1]))
+    return versoes
+
+
+def verificar_if_match(request, versao):
+    """
+    Verifica o cabeçalho If-Match da requisição contra a versão atual do registro.
+
+    Sem o cabeçalho (ou com "*") a requisição é aceita. Caso contrário algum
+    dos ETags informados deve ser o da versão atual, senão é lançada
+    VersaoDesatualizada.
+    """
+    versoes = get_versoes_if_match(request)
+    if versoes is not None and versao not in versoes:
+        raise VersaoDesatualizada()
@@ -0,0 +1,92 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+def get_campos_solicitados(request):
+    """
+    Retorna os conjuntos de campos informados em ?fields= e ?exclude= (separados por vírgula).
+
+    Só vale para requisições de leitura; nas demais retorna conjuntos vazios.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return set(), set()
+
+    def separar(valor):
+        return {campo.strip() for campo in (valor or '').split(',') if campo.strip()}
+
+    return separar(request.query_params.get('fields')), separar(request.query_params.get('exclude'))
+
+
+def campo_corresponde(chave, campo):
+    """
+    Verifica se a chave da resposta pertence ao campo do serializer.
+
+    As chaves montadas a partir de um relacionamento (empresa_id, empresa_nome)
+    pertencem ao campo do relacionamento (empresa).
+    """
+    return chave == campo or chave.startswith(f'{campo}_')
+
+
+class CamposDinamicosSerializerMixin:
+    """
+    Permite que o cliente escolha os campos da resposta com ?fields= ou ?exclude=.
+
+    Os campos são os nomes das chaves da resposta. As chaves de um mesmo
+    relacionamento (ex.: empresa_id e empresa_nome) são incluídas ou removidas
+    em conjunto. Nomes desconhecidos são ignorados.
+
+    Os serializers que montam chaves a partir de relacionamentos em
+    to_representation devem verificar se o campo continua em self.fields.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        incluir, excluir = get_campos_solicitados(self.context.get('request'))
+        if not incluir and not excluir:
+            return
+
+        for campo in list(self.fields):
+            if incluir and not any(campo_corresponde(chave, campo) for chave in incluir):
+                self.fields.pop(campo)
+            elif any(campo_corresponde(chave, campo) for chave in excluir):
+                self.fields.pop(campo)
+
+
+class CamposDinamicosViewMixin:
+    """
+    Ajusta a consulta da view aos campos escolhidos com ?fields= ou ?exclude=.
+
+    Usada junto com CamposDinamicosSerializerMixin: carrega apenas as colunas
+    dos campos mantidos no serializer (only) e remove do select_related os
+    relacionamentos que não serão exibidos. Os campos em `campos_obrigatorios`
+    são sempre carregados.
+    """
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        incluir, excluir = get_campos_solicitados(self.request)
+        if not incluir and not excluir:
+            return queryset
+
+        campos = list(self.get_serializer().fields)
+        model = queryset.model
+
+        # Remove os joins dos relacionamentos que não serão exibidos
+        relacionamentos = queryset.query.select_related
+        if isinstance(relacionamentos, dict):
+            mantidos = [nome for nome in relacionamentos if nome in campos]
+            queryset = queryset.select_related(None)
+            if mantidos:
+                queryset = queryset.select_related(*mantidos)
+
+        # Mantém a ordenação padrão carregada (usada, por exemplo, pela paginação por cursor)
+        ordenacao = [nome.lstrip('-') for nome in model._meta.ordering if isinstance(nome, str)]
+
+        obrigatorios = getattr(self, 'campos_obrigatorios', [])
+        colunas = [
+            field.name for field in model._meta.concrete_fields
+            if field.primary_key
+            or field.name in ordenacao
+            or field.name in obrigatorios
+            or any(campo_corresponde(campo, field.name) for campo in campos)
+        ]
+        return queryset.only(*colunas)
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+class TagPatrimonioCursorPagination(CursorPagination):
+    """
+    Paginação por cursor ordenada pelo índice único de tag_patrimonio.
+
+    Cada página é buscada a partir da última tag da página anterior, sem
+    OFFSET nem COUNT(*), então qualquer página custa o mesmo que a primeira.
+    Por ser ordenada por um campo único, equipamentos incluídos durante a
+    leitura não causam itens repetidos nem pulados.
+    """
+    ordering = 'tag_patrimonio'
+
+
+class HistoricoCursorPagination(CursorPagination):
+    """
+    Paginação por cursor do histórico do equipamento, do evento mais recente para o mais antigo.
+
+    Usa o índice (equipamento, data) dos eventos. A lista fica na chave
+    "historico", como na resposta sem paginação.
+    """
+    ordering = ('-data', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('historico', data),
+        ]))
+
+
+class PaginacaoCursorMixin:
+    """
+    Permite que a view use a paginação por cursor com o parâmetro ?paginacao=cursor.
+
+    Sem o parâmetro, a view continua usando a paginação padrão (por página).
+    Os links next/previous preservam o parâmetro, então basta informá-lo na
+    primeira requisição.
+    """
+    paginacao_cursor_class = TagPatrimonioCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('paginacao') == 'cursor':
+                self._paginator = self.paginacao_cursor_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
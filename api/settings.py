@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 from .config_prod import (
     conf_database,
     conf_debug,
@@ -155,8 +156,8 @@ REST_FRAMEWORK = {
     # Definindo o modelo de autenticação de usuários
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.BasicAuthenticationCache',
+        'users.authentication.JWTPermissoesAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -169,6 +170,10 @@ CORS_ALLOW_ALL_ORIGINS = False
 
 CORS_ALLOWED_ORIGINS = config_cors_allowed_origins
 
+# Controle de concorrência dos equipamentos: o ETag é lido pelo frontend e devolvido no If-Match
+CORS_ALLOW_HEADERS = (*default_headers, 'if-match')
+CORS_EXPOSE_HEADERS = ['ETag']
+
 
 LOGGING = {
     'version': 1,
@@ -185,6 +190,12 @@ LOGGING = {
 }
 
 
+# Configurando o cache das permissões de grupo
+# Em produção com mais de um processo, configure um cache compartilhado (ex.: Redis ou Memcached)
+# em CACHES para que a invalidação das permissões alcance todos os processos.
+PERMISSOES_CACHE_TIMEOUT = 300  # Tempo máximo, em segundos, que as permissões de um usuário ficam em cache
+
+
 # Configurando email
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.office365.com'
@@ -205,10 +216,27 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(minutes=15),
     "ROTATE_REFRESH_TOKENS": True,
 
-    "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenPermissoesObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenPermissoesRefreshSerializer",
     "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",
 }
+
+# Embarca as permissões de grupo no token de acesso, permitindo autorizar leituras sem consultar o banco.
+# Requer um cache compartilhado entre os processos (CACHES), pois a versão das permissões de cada usuário
+# fica no cache; o manage.py check avisa (users.W001) se o cache configurado for local ao processo.
+JWT_PERMISSOES_NO_TOKEN = False
+
+# Configurando o cache das credenciais verificadas pela autenticação Basic
+BASIC_AUTH_CACHE_TIMEOUT = 60  # Tempo, em segundos, que uma credencial verificada fica em cache
+BASIC_AUTH_CACHE_MAX_ITENS = 1024  # Quantidade máxima de credenciais em cache por processo
+
+# Quantidade de processos usados para gerar os hashes das senhas no cadastro de usuários em lote
+# (None usa a quantidade de CPUs do servidor)
+USUARIOS_LOTE_PROCESSOS = None
+
+# Quantidade máxima de usuários por requisição no cadastro em lote pela API
+# (importações maiores devem usar o comando importar_usuarios)
+USUARIOS_LOTE_MAXIMO = 100
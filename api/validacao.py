@@ -0,0 +1,27 @@
+def converter_id(valor):
+    """
+    Converte o id recebido no payload para int, ou retorna None se ele for inválido.
+
+    Aceita inteiros positivos e textos contendo apenas dígitos ("12"). Booleanos,
+    números decimais (1.9) e demais valores são recusados, em vez de convertidos
+    silenciosamente como fariam int() ou isinstance(valor, int).
+    """
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, str) and valor.isascii() and valor.isdecimal():
+        valor = int(valor)
+    if isinstance(valor, int) and valor > 0:
+        return valor
+    return None
+
+
+def converter_ids(valores):
+    """
+    Converte uma lista de ids com converter_id, ou retorna None se ela não for uma lista ou tiver algum id inválido.
+    """
+    if not isinstance(valores, list):
+        return None
+    ids = [converter_id(valor) for valor in valores]
+    if None in ids:
+        return None
+    return ids
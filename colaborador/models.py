@@ -1,8 +1,7 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
 from .validators import validar_cpf
+from users.permissions import registrar_permissoes
 
 
 class Colaborador(models.Model):
@@ -35,28 +34,9 @@ class Colaborador(models.Model):
         ordering = ['id']
 
 
-# Método para criar as permissões após as migrações
-def create_permissions(sender, **kwargs):
-    if sender.name == 'colaborador':
-        content_type = ContentType.objects.get_for_model(Colaborador)
-
-        visualizar_colaborador, created = Permission.objects.get_or_create(
-            codename = 'visualizar_colaborador',
-            name = 'Visualizar Colaboradores',
-            content_type = content_type,
-        )
-
-        visualiza_detalhe_colaborador, created = Permission.objects.get_or_create(
-            codename = 'visualiza_detalhe_colaborador',
-            name = 'Visualizar Detalhes do Colaborador',
-            content_type = content_type,
-        )
-
-        editar_colaborador, created = Permission.objects.get_or_create(
-            codename = 'editar_colaborador',
-            name = 'Editar Colaborador',
-            content_type = content_type,
-        )
-
-# Concectar o método ao sinal post_mnigrate
-post_migrate.connect(create_permissions)
\ No newline at end of file
+# Registrando as permissões criadas após as migrações
+registrar_permissoes(Colaborador, {
+    'visualizar_colaborador': 'Visualizar Colaboradores',
+    'visualiza_detalhe_colaborador': 'Visualizar Detalhes do Colaborador',
+    'editar_colaborador': 'Editar Colaborador',
+})
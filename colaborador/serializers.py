@@ -1,19 +1,20 @@
 from rest_framework import serializers
 from django.utils import timezone
 from django.contrib.auth.models import User
+from api.mixins import CamposDinamicosSerializerMixin
 from .models import Colaborador
 from equipamento.models import Equipamento
 
 
 
 # Serializador para listagem de todos os colaboradores
-class ColaboradorListSerializer(serializers.ModelSerializer):
+class ColaboradorListSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Colaborador
         fields = ['id', 'nome', 'cpf', 'status']
 
 # Serializador para detalhes do Colaborador
-class ColaboradorSerializer(serializers.ModelSerializer):
+class ColaboradorSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Colaborador
         fields = ['id', 'nome', 'cpf', 'status', 'data_cadastro', 'usuario_cadastro', 'data_ultima_alteracao', 'usuario_ultima_alteracao']
@@ -37,17 +38,19 @@ class ColaboradorSerializer(serializers.ModelSerializer):
         representation.pop('usuario_cadastro', None)
         representation.pop('usuario_ultima_alteracao', None)
 
-        # Adicionando as chaves personalizadas para usuario_cadastro
-        representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
-        representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
+        # Adicionando as chaves personalizadas para usuario_cadastro (apenas se o campo foi solicitado)
+        if 'usuario_cadastro' in self.fields:
+            representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
+            representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
 
         # Adicionando as chaves personalizadas para usuario_ultima_alteracao
-        if instance.usuario_ultima_alteracao:
-            representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
-            representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
-        else:
-            representation['usuario_ultima_alteracao_id'] = None
-            representation['usuario_ultima_alteracao_username'] = None
+        if 'usuario_ultima_alteracao' in self.fields:
+            if instance.usuario_ultima_alteracao:
+                representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
+                representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
+            else:
+                representation['usuario_ultima_alteracao_id'] = None
+                representation['usuario_ultima_alteracao_username'] = None
 
         return representation
 
@@ -1,3 +1,79 @@
+from django.contrib.auth.models import User, Group, Permission
 from django.test import TestCase
+from rest_framework.test import APIClient
+from colaborador.models import Colaborador
+from empresa.models import Empresa
+from equipamento.models import Equipamento
+from tipo_equipamento.models import TipoEquipamento
 
-# Create your tests here.
+
+class TransferenciaEquipamentosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario', 'usuario@teste.com', 'senha')
+        grupo = Group.objects.create(name='editores')
+        grupo.permissions.set(Permission.objects.filter(codename__in=['editar_equipamento', 'editar_colaborador']))
+        cls.usuario.groups.add(grupo)
+
+        empresa = Empresa.objects.create(nome='Empresa', cnpj='00000000000000', usuario_cadastro=cls.usuario)
+        tipo = TipoEquipamento.objects.create(tipo='Notebook', usuario_cadastro=cls.usuario)
+        cls.origem = Colaborador.objects.create(nome='Origem', cpf='00000000000', usuario_cadastro=cls.usuario)
+        cls.destino = Colaborador.objects.create(nome='Destino', cpf='11111111111', usuario_cadastro=cls.usuario)
+        Equipamento.objects.bulk_create([
+            Equipamento(tag_patrimonio=f'TAG{i}', tipo_equipamento=tipo, situacao='1', empresa=empresa,
+                        colaborador=cls.origem, observacao='', usuario_cadastro=cls.usuario)
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def transferir(self, **dados):
+        return self.client.post(f'/colaborador/{self.origem.pk}/transferir_equipamentos/', {
+            'colaborador_destino': self.destino.pk, **dados,
+        }, format='json')
+
+    def test_transfere_todos_os_equipamentos(self):
+        resposta = self.transferir()
+
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(len(resposta.data['equipamentos']), 3)
+        self.assertFalse(Equipamento.objects.filter(colaborador=self.origem).exists())
+        self.origem.refresh_from_db()
+        self.assertTrue(self.origem.status)
+
+    def test_inativa_o_colaborador(self):
+        for inativar in (True, 'true'):
+            Colaborador.objects.filter(pk=self.origem.pk).update(status=True)
+            Equipamento.objects.update(colaborador=self.origem)
+            with self.subTest(inativar=inativar):
+                self.assertEqual(self.transferir(inativar=inativar).status_code, 201)
+                self.origem.refresh_from_db()
+                self.assertFalse(self.origem.status)
+
+    def test_inativar_falso_em_texto(self):
+        for inativar in ('false', '0', 0):
+            Equipamento.objects.update(colaborador=self.origem)
+            with self.subTest(inativar=inativar):
+                self.assertEqual(self.transferir(inativar=inativar).status_code, 201)
+                self.origem.refresh_from_db()
+                self.assertTrue(self.origem.status)
+
+    def test_inativar_invalido(self):
+        for inativar in ('talvez', None, [True]):
+            with self.subTest(inativar=inativar):
+                self.assertEqual(self.transferir(inativar=inativar).status_code, 400)
+        self.assertEqual(Equipamento.objects.filter(colaborador=self.origem).count(), 3)
+
+    def test_ids_invalidos(self):
+        for dados in (
+            {'colaborador_destino': True},
+            {'colaborador_destino': 1.9},
+            {'colaborador_destino': self.destino.pk, 'equipamentos': ['zz']},
+            {'colaborador_destino': self.destino.pk, 'equipamentos': [False]},
+        ):
+            with self.subTest(dados=dados):
+                resposta = self.client.post(f'/colaborador/{self.origem.pk}/transferir_equipamentos/', dados, format='json')
+                self.assertEqual(resposta.status_code, 400)
+        self.assertEqual(Equipamento.objects.filter(colaborador=self.origem).count(), 3)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ColaboradorViewSet, ColaboradorStatusUpdateView, EquipamentosColaboradorView
+from .views import ColaboradorViewSet, ColaboradorStatusUpdateView, EquipamentosColaboradorView, ColaboradorTransferenciaEquipamentosView
 
 # Usando o DefaultRouter para configurar as rotas automaticamente
 router = DefaultRouter()
@@ -16,4 +16,7 @@ urlpatterns = [
 
     # Rota para listar os equipamentos de um colaborador especifico por PK
     path('<int:pk>/equipamentos/', EquipamentosColaboradorView.as_view(), name='colaborador-equipamentos'),
+
+    # Rota para transferir os equipamentos de um colaborador para outro (desligamento)
+    path('<int:pk>/transferir_equipamentos/', ColaboradorTransferenciaEquipamentosView.as_view(), name='colaborador-transferir-equipamentos'),
 ]
\ No newline at end of file
@@ -1,27 +1,48 @@
-from rest_framework import viewsets, status, generics
+from rest_framework import viewsets, status, generics, serializers
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.views import APIView
+from django.shortcuts import get_object_or_404
 from .models import Colaborador
 from .serializers import ColaboradorSerializer, ColaboradorStatusSerializer, ColaboradorListSerializer, EquipamentoColaboradorSerializer
-from users.views import has_permission_to_view_colaborador, has_permission_to_detail_colaborador, has_permission_to_edit_colaborador, has_permission_to_view_equipamento
+from users.permissions import PermissaoPorAcao, has_group_permission
+from equipamento.services import transferir_colaborador_lote
+from api.mixins import CamposDinamicosViewMixin
+from api.validacao import converter_id, converter_ids
+from api.pagination import PaginacaoCursorMixin
 
 
 
-class ColaboradorViewSet(viewsets.ModelViewSet):
+class ColaboradorViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para manipulação de Colaboradores.
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {
+        'list': 'visualizar_colaborador',
+        'retrieve': 'visualiza_detalhe_colaborador',
+        'create': 'editar_colaborador',
+        'update': 'editar_colaborador',
+        'partial_update': 'editar_colaborador',
+        'destroy': 'editar_colaborador',
+    }
+    mensagens_permissao = {
+        'list': 'Usuário sem permissão para visualizar colaboradores',
+        'retrieve': 'Usuário sem permissão visualizar detalhes do colaborador',
+        'create': 'Usuário sem permissão para criar colaborador',
+        'update': 'Usuário sem permissão para editar colaborador',
+        'partial_update': 'Usuário sem permissão para editar colaborador',
+        'destroy': 'Usuário sem permissão para editar colaborador',
+    }
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ColaboradorListSerializer
         return ColaboradorSerializer
     
     def get_queryset(self):
-        queryset = Colaborador.objects.all()
-        # Filtre o queryset de acordo com as permissões do usuario
-        if not has_permission_to_view_colaborador(self.request.user):
-            return Colaborador.objects.none()
-        return queryset
+        return Colaborador.objects.all()
 
     def list(self, request, *args, **kwargs):
         """
@@ -30,54 +51,39 @@ class ColaboradorViewSet(viewsets.ModelViewSet):
         #Acessando o valor do 'page size' na consulta
         page_size = request.query_params.get('page_size')
         
-        if has_permission_to_view_colaborador(request.user):
-            if page_size:
-                #se 'page_size' for especificado, use o valor fornecido
-                self.paginator.page_size = int(page_size)
-            
-            return super().list(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar colaboradores'}, status=status.HTTP_403_FORBIDDEN)
+        if page_size:
+            #se 'page_size' for especificado, use o valor fornecido
+            self.paginator.page_size = int(page_size)
+        
+        return super().list(request, *args, **kwargs)
     
     def create(self, request, *args, **kwargs):
-        if has_permission_to_edit_colaborador(request.user):
-            serializer = self.get_serializer(data=request.data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'error': 'Usuário sem permissão para criar colaborador'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = self.get_serializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     def update(self, request, *args, **kwargs):
-        if has_permission_to_edit_colaborador(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance, data=request.data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar colaborador'}, status=status.HTTP_403_FORBIDDEN)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
         """
         Atualiza parcialmente um colaborador.
         """
-        if has_permission_to_edit_colaborador(request.user):
-            kwargs['partial'] = True
-            return self.update(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar colaborador'}, status=status.HTTP_403_FORBIDDEN)
+        kwargs['partial'] = True
+        return self.update(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
         """
         Retorna os detalhes de um colaborador sem os equipamentos associados.
         """
-        if has_permission_to_detail_colaborador(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
-        else:
-            return Response({'error': 'Usuário sem permissão visualizar detalhes do colaborador'}, status=status.HTTP_403_FORBIDDEN)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
 
 
 
@@ -85,38 +91,90 @@ class ColaboradorStatusUpdateView(APIView):
     """
     View para atualizar o status de um colaborador.
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'patch': 'editar_colaborador'}
+    mensagens_permissao = {'patch': 'Usuário sem permissão para editar colaborador'}
+
     def patch(self, request, pk):
         """
         Atualiza parcialmente o status de um colaborador especificado por PK.
         """
         colaborador = Colaborador.objects.get(pk=pk)
 
-        if has_permission_to_edit_colaborador(request.user):
-            serializer = ColaboradorStatusSerializer(colaborador, data=request.data, partial=True, context={'request': request})
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar colaborador'}, status=status.HTTP_403_FORBIDDEN)
-        
+        serializer = ColaboradorStatusSerializer(colaborador, data=request.data, partial=True, context={'request': request})
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ColaboradorTransferenciaEquipamentosView(APIView):
+    """
+    Transfere os equipamentos de um colaborador para outro em uma única requisição (desligamento).
 
-class EquipamentosColaboradorView(generics.ListAPIView):
+    Recebe {"colaborador_destino": id, "equipamentos": [ids], "tags": [tags de patrimônio], "inativar": bool}.
+    Sem equipamentos nem tags, todos os equipamentos do colaborador são
+    transferidos. Com "inativar": true o colaborador é inativado ao final, o
+    que também exige a permissão de editar colaborador.
+    """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'post': 'editar_equipamento'}
+    mensagens_permissao = {'post': 'Usuário sem permissão para editar um equipamento'}
+
+    def post(self, request, pk):
+        colaborador_destino_id = converter_id(request.data.get('colaborador_destino'))
+        ids = converter_ids(request.data.get('equipamentos', []))
+        tags = request.data.get('tags', [])
+
+        try:
+            # Aceita true/false (e "true"/"false", 1/0), sem tratar "false" como verdadeiro
+            inativar = serializers.BooleanField().to_internal_value(request.data.get('inativar', False))
+        except ValidationError:
+            return Response({'error': 'O campo inativar deve ser true ou false'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if inativar and not has_group_permission(request.user, 'editar_colaborador'):
+            raise PermissionDenied({'error': 'Usuário sem permissão para editar colaborador'})
+
+        if colaborador_destino_id is None:
+            return Response({'error': 'O campo colaborador_destino deve ser o ID de um colaborador'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if ids is None or not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            return Response({'error': 'Os campos equipamentos e tags devem ser listas de IDs e de tags de patrimônio'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        colaborador = get_object_or_404(Colaborador, pk=pk)
+
+        erros, equipamentos = transferir_colaborador_lote(
+            request.user, colaborador, colaborador_destino_id, ids, tags, inativar_origem=inativar
+        )
+        if erros:
+            return Response({'errors': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        transferidos = [{'id': equipamento.pk, 'tag_patrimonio': equipamento.tag_patrimonio} for equipamento in equipamentos]
+        return Response({
+            'colaborador_origem_id': colaborador.pk,
+            'colaborador_destino_id': colaborador_destino_id,
+            'colaborador_origem_status': colaborador.status,
+            'equipamentos': transferidos,
+        }, status=status.HTTP_201_CREATED)
+
+
+class EquipamentosColaboradorView(PaginacaoCursorMixin, generics.ListAPIView):
     serializer_class = EquipamentoColaboradorSerializer
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'get': 'visualizar_equipamento'}
+    mensagens_permissao = {'get': 'Usuário sem permissão visualizar equipamentos'}
 
     def get_queryset(self):
         colaborador_id = self.kwargs['pk']
         colaborador = Colaborador.objects.get(pk=colaborador_id)
 
-        # Verificando se o usuario tem permissao para visualizar equipamentos
-        if has_permission_to_view_equipamento(self.request.user):
-            queryset = colaborador.equipamento_set.all()
+        queryset = colaborador.equipamento_set.select_related('tipo_equipamento', 'empresa')
 
-            # Acessando o valor do page_size na consulta
-            page_size = self.request.query_params.get('page_size')
-            if page_size:
-                self.paginator.page_size = int(page_size)
-        
-            return queryset
-        else:
-            return Response({'error': 'Usuário sem permissão visualizar equipamentos'}, status=status.HTTP_403_FORBIDDEN)
+        # Acessando o valor do page_size na consulta
+        page_size = self.request.query_params.get('page_size')
+        if page_size:
+            self.paginator.page_size = int(page_size)
+
+        return queryset
@@ -1,8 +1,7 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
 from .validators import validar_cnpj
+from users.permissions import registrar_permissoes
 
 
 class Empresa(models.Model):
@@ -38,28 +37,10 @@ class Empresa(models.Model):
     
     pass
 
-# Método para criar as permissões após as migrações
-def create_permissions(sender, **kwargs):
-    if sender.name == 'empresa':
-        content_type = ContentType.objects.get_for_model(Empresa)
 
-        visualizar_empresa, created = Permission.objects.get_or_create(
-            codename='visualizar_empresa',
-            name='Visualizar empresas',
-            content_type=content_type,
-        )
-
-        visualiza_detalhe_empresa, created = Permission.objects.get_or_create(
-            codename='visualiza_detalhe_empresa',
-            name='Visualizar Detalhes da Empresa',
-            content_type=content_type,
-        )
-
-        editar_empresa, created = Permission.objects.get_or_create(
-            codename='editar_empresa',
-            name='Editar Empresa',
-            content_type=content_type,
-        )
-
-# Conectar o método ao sinal post_migrate
-post_migrate.connect(create_permissions)
\ No newline at end of file
+# Registrando as permissões criadas após as migrações
+registrar_permissoes(Empresa, {
+    'visualizar_empresa': 'Visualizar empresas',
+    'visualiza_detalhe_empresa': 'Visualizar Detalhes da Empresa',
+    'editar_empresa': 'Editar Empresa',
+})
@@ -1,18 +1,19 @@
 from rest_framework import serializers
 from django.utils import timezone
 from django.contrib.auth.models import User
+from api.mixins import CamposDinamicosSerializerMixin
 from .models import Empresa
 from equipamento.models import Equipamento
 
 
 # Serializador para listagem de todas as empresas
-class EmpresaListSerializer(serializers.ModelSerializer):
+class EmpresaListSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Empresa
         fields = ['id', 'nome', 'cnpj', 'status']
 
 # Serializador para detalhes da Empresa
-class EmpresaSerializer(serializers.ModelSerializer):
+class EmpresaSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Empresa
         fields = ['id', 'nome', 'cnpj', 'status', 'data_cadastro', 'usuario_cadastro', 'data_ultima_alteracao', 'usuario_ultima_alteracao']
@@ -36,17 +37,19 @@ class EmpresaSerializer(serializers.ModelSerializer):
         representation.pop('usuario_cadastro', None)
         representation.pop('usuario_ultima_alteracao', None)
 
-        # Adicionando as chaves personalizadas para usuario_cadastro
-        representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
-        representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
+        # Adicionando as chaves personalizadas para usuario_cadastro (apenas se o campo foi solicitado)
+        if 'usuario_cadastro' in self.fields:
+            representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
+            representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
 
         # Adicionando as chaves personalizadas para usuario_ultima_alteracao
-        if instance.usuario_ultima_alteracao:
-            representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
-            representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
-        else:
-            representation['usuario_ultima_alteracao_id'] = None
-            representation['usuario_ultima_alteracao_username'] = None
+        if 'usuario_ultima_alteracao' in self.fields:
+            if instance.usuario_ultima_alteracao:
+                representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
+                representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
+            else:
+                representation['usuario_ultima_alteracao_id'] = None
+                representation['usuario_ultima_alteracao_username'] = None
 
         return representation
 
@@ -1,29 +1,46 @@
 from rest_framework import viewsets, status, generics
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.db.models import Count
 from .models import Empresa
 from equipamento.models import SITUACAO_EQUIPAMENTO_CHOICES
 from .serializers import EmpresaSerializer, EmpresaListSerializer, EmpresaStatusSerializer, EquipamentoEmpresaSerializer
-from users.views import has_permission_to_view_empresa, has_permission_to_detail_empresa, has_permission_to_edit_empresa, has_permission_to_view_equipamento
+from users.permissions import PermissaoPorAcao
+from api.mixins import CamposDinamicosViewMixin
+from api.pagination import PaginacaoCursorMixin
 
 
 
-class EmpresaViewSet(viewsets.ModelViewSet):
+class EmpresaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     ViewSet para manipulação de Empresas.
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {
+        'list': 'visualizar_empresa',
+        'retrieve': 'visualiza_detalhe_empresa',
+        'create': 'editar_empresa',
+        'update': 'editar_empresa',
+        'partial_update': 'editar_empresa',
+        'destroy': 'editar_empresa',
+    }
+    mensagens_permissao = {
+        'list': 'Usuário sem permissão para visualizar empresas',
+        'retrieve': 'Usuário sem permissão para visualizar os detalhes de uma empresa',
+        'create': 'Usuário sem permissão para cadastrar uma empresa',
+        'update': 'Usuário sem permissão para editar empresa',
+        'partial_update': 'Usuário sem permissão para editar empresas',
+        'destroy': 'Usuário sem permissão para editar empresa',
+    }
+
     def get_serializer_class(self):
         if self.action == 'list':
             return EmpresaListSerializer
         return EmpresaSerializer
     
     def get_queryset(self):
-        queryset = Empresa.objects.all()
-        # Filtre o queryset de acordo com as permissões do usuario
-        if not has_permission_to_view_empresa(self.request.user):
-            return Empresa.objects.none()
-        return queryset
+        return Empresa.objects.all()
 
 
     def list(self, request, *args, **kwargs):
@@ -33,93 +50,77 @@ class EmpresaViewSet(viewsets.ModelViewSet):
         # Acessando o valor do 'page size' na consulta
         page_size = request.query_params.get('page_size')
 
-        if has_permission_to_view_empresa(request.user):
-            if page_size:
-                #se 'page size' foi especificado, use o valor fornecido
-                self.paginator.page_size = int(page_size)
-            
-            return super().list(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar empresas'}, status=status.HTTP_403_FORBIDDEN)
+        if page_size:
+            #se 'page size' foi especificado, use o valor fornecido
+            self.paginator.page_size = int(page_size)
+        
+        return super().list(request, *args, **kwargs)
         
     
     def create(self, request, *args, **kwargs):
-        if has_permission_to_edit_empresa(request.user):
-            serializer = self.get_serializer(data=request.data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'error': 'Usuário sem permissão para cadastrar uma empresa'})
+        serializer = self.get_serializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if has_permission_to_edit_empresa(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance, data=request.data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar empresa'}, status=status.HTTP_403_FORBIDDEN)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance, data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
     
     def partial_update(self, request, *args, **kwargs):
         """
         Atualiza parcialmente uma empresa.
         """
-        if has_permission_to_edit_empresa(request.user):
-            kwargs['partial'] = True
-            return self.update(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar empresas'}, status=status.HTTP_403_FORBIDDEN)
+        kwargs['partial'] = True
+        return self.update(request, *args, **kwargs)
     
 
     def retrieve(self, request, *args, **kwargs):
         # Retorna os detalhes de uma empresa semos equipamentos associados.
-        if has_permission_to_detail_empresa(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar os detalhes de uma empresa'}, status=status.HTTP_403_FORBIDDEN)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
     
 class EmpresaStatusUpdateView(APIView):
     """
     View para atualizar o status de uma empresa.
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'patch': 'editar_empresa'}
+    mensagens_permissao = {'patch': 'Usuário sem permissão para alterar status de empresa'}
+
     def patch(self, request, pk):
         """
         Atualiza parcialmente o status de uma empresa especificada por PK.
         """
         empresa = Empresa.objects.get(pk=pk)
-        serializer = EmpresaStatusSerializer(empresa, data=request.data, partial=True)
-
-        if has_permission_to_edit_empresa(request.user):
-            serializer = EmpresaStatusSerializer(empresa, data=request.data, partial=True, context={'context': request})
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'error': 'Usuário sem permissão para alterar status de empresa'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = EmpresaStatusSerializer(empresa, data=request.data, partial=True, context={'context': request})
+        if serializer.is_valid():
+            serializer.save()
+            return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-class EquipamentosEmpresaView(generics.ListAPIView):
+class EquipamentosEmpresaView(PaginacaoCursorMixin, generics.ListAPIView):
     serializer_class = EquipamentoEmpresaSerializer
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'get': 'visualizar_equipamento'}
+    mensagens_permissao = {'get': 'Usuário sem permissão para visualizar equipamentos'}
 
     def get_queryset(self):
         empresa_id = self.kwargs['pk']
         empresa = Empresa.objects.get(pk=empresa_id)
 
-        # Verificando se o usuario tem permissao para visualizar equipamentos
-        if has_permission_to_view_equipamento(self.request.user):
-            queryset = empresa.equipamento_set.all()
-
-            # Acessando o valor do page_size na consulta
-            page_size = self.request.query_params.get('page_size')
-            if page_size:
-                self.paginator.page_size = int(page_size)
-            return queryset
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar equipamentos'}, status=status.HTTP_403_FORBIDDEN)
+        queryset = empresa.equipamento_set.select_related('tipo_equipamento', 'colaborador', 'setor')
+
+        # Acessando o valor do page_size na consulta
+        page_size = self.request.query_params.get('page_size')
+        if page_size:
+            self.paginator.page_size = int(page_size)
+        return queryset
         
 class EquipamentoPorTipoView(APIView):
     """
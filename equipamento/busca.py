@@ -0,0 +1,155 @@
+import heapq
+import re
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.db import connections
+from django.db.models import Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from users.busca import normalizar_termo
+
+
+# Campos de texto livre cobertos pela busca (índice FULLTEXT no MySQL)
+CAMPOS_TEXTO_BUSCA = ('marca', 'modelo', 'especificacoes', 'observacao')
+
+# Peso somado à relevância quando a busca é o início da tag de patrimônio ou do pedido
+PESO_PREFIXO = 1000
+
+# Quantidade máxima de equipamentos encontrados pelo índice em memória que entram no resultado da busca.
+# Os ids vão como parâmetros da consulta, então sem o limite a busca passaria do limite de variáveis do SQLite.
+LIMITE_CANDIDATOS_INDICE = 400
+
+
+def tokenizar(texto):
+    """
+    Separa o texto em palavras normalizadas (minúsculas e sem acentos).
+    """
+    return re.findall(r'\w+', normalizar_termo(texto))
+
+
+class IndiceInvertido:
+    """
+    Índice invertido (palavra -> ids dos equipamentos) mantido em memória.
+
+    Usado pela busca quando o banco não é MySQL (ex.: SQLite nos testes). O
+    índice é montado na primeira busca e descartado quando um equipamento é
+    salvo ou excluído. Junto com as palavras, guarda a tag de patrimônio de
+    cada equipamento, usada para desempatar a relevância.
+    """
+    def __init__(self):
+        self._indice = None
+        self._lock = threading.Lock()
+
+    def invalidar(self, **kwargs):
+        self._indice = None
+
+    def get_indice(self, using):
+        """
+        Retorna (palavras, tags), sendo palavras {palavra: ids} e tags {id: tag de patrimônio}.
+        """
+        indice = self._indice
+        if indice is None:
+            with self._lock:
+                if self._indice is None:
+                    Equipamento = apps.get_model('equipamento', 'Equipamento')
+                    palavras = defaultdict(set)
+                    tags = {}
+                    campos = ('pk', 'tag_patrimonio', *CAMPOS_TEXTO_BUSCA)
+                    for pk, tag, *textos in Equipamento.objects.using(using).values_list(*campos).iterator():
+                        tags[pk] = tag
+                        for palavra in tokenizar(' '.join(texto for texto in textos if texto)):
+                            palavras[palavra].add(pk)
+                    self._indice = (palavras, tags)
+                indice = self._indice
+        return indice
+
+    def buscar(self, busca, using, limite=None, get_ids_permitidos=None):
+        """
+        Retorna {id: relevância}, sendo a relevância a quantidade de palavras buscadas encontradas no equipamento.
+
+        Com `limite`, retorna apenas os equipamentos mais relevantes, na mesma
+        ordem da busca (relevância e tag de patrimônio). Se houver mais
+        equipamentos encontrados que o limite, antes de escolher os mais
+        relevantes eles são restringidos aos ids retornados por
+        `get_ids_permitidos()` (os equipamentos que passaram pelos filtros).
+        """
+        palavras, tags = self.get_indice(using)
+        relevancia = defaultdict(int)
+        for palavra in set(tokenizar(busca)):
+            for pk in palavras.get(palavra, ()):
+                relevancia[pk] += 1
+
+        if limite is not None and len(relevancia) > limite and get_ids_permitidos is not None:
+            ids_permitidos = get_ids_permitidos()
+            relevancia = {pk: valor for pk, valor in relevancia.items() if pk in ids_permitidos}
+
+        if limite is not None and len(relevancia) > limite:
+            mais_relevantes = heapq.nsmallest(limite, relevancia, key=lambda pk: (-relevancia[pk], tags[pk]))
+            relevancia = {pk: relevancia[pk] for pk in mais_relevantes}
+        return relevancia
+
+
+indice_equipamentos = IndiceInvertido()
+
+
+def buscar_equipamentos(queryset, busca):
+    """
+    Filtra os equipamentos pela busca e os ordena pela relevância.
+
+    Encontra os equipamentos cuja marca, modelo, especificações ou observação
+    contenham as palavras buscadas e os equipamentos cuja tag de patrimônio ou
+    pedido comecem pelo texto buscado (estes primeiro). No MySQL usa o índice
+    FULLTEXT; nos demais bancos, o índice invertido em memória, limitado aos
+    LIMITE_CANDIDATOS_INDICE equipamentos mais relevantes entre os do
+    queryset recebido (por isso a busca deve ser aplicada depois dos demais
+    filtros).
+    """
+    busca = busca.strip()
+    if not busca:
+        return queryset
+
+    prefixo = Q(tag_patrimonio__istartswith=busca) | Q(pedido__istartswith=busca)
+    peso_prefixo = Case(When(prefixo, then=Value(PESO_PREFIXO)), default=Value(0), output_field=FloatField())
+
+    if connections[queryset.db].vendor == 'mysql':
+        tabela = queryset.model._meta.db_table
+        colunas = ', '.join(CAMPOS_TEXTO_BUSCA)
+        correspondencia = f'MATCH({colunas}) AGAINST (%s IN NATURAL LANGUAGE MODE)'
+        prefixo_like = busca.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+        # Cada parte usa o seu índice (FULLTEXT, tag_patrimonio e pedido)
+        ids = RawSQL(
+            f'SELECT id FROM {tabela} WHERE {correspondencia} '
+            f'UNION SELECT id FROM {tabela} WHERE tag_patrimonio LIKE %s '
+            f'UNION SELECT id FROM {tabela} WHERE pedido LIKE %s',
+            [busca, prefixo_like, prefixo_like],
+        )
+        relevancia_texto = RawSQL(correspondencia, [busca], output_field=FloatField())
+
+        return (
+            queryset.filter(pk__in=ids)
+            .annotate(relevancia=relevancia_texto + peso_prefixo)
+            .order_by('-relevancia', 'tag_patrimonio')
+        )
+
+    relevancia = indice_equipamentos.buscar(
+        busca, queryset.db, limite=LIMITE_CANDIDATOS_INDICE,
+        get_ids_permitidos=lambda: set(queryset.order_by().values_list('pk', flat=True)),
+    )
+
+    # Um When por valor de relevância (no máximo um por palavra buscada), e não um por equipamento
+    ids_por_relevancia = defaultdict(list)
+    for pk, valor in relevancia.items():
+        ids_por_relevancia[valor].append(pk)
+    relevancia_texto = Case(
+        *[When(pk__in=ids, then=Value(valor)) for valor, ids in ids_por_relevancia.items()],
+        default=Value(0),
+        output_field=FloatField(),
+    ) if relevancia else Value(0, output_field=FloatField())
+
+    return (
+        queryset.filter(Q(pk__in=list(relevancia)) | prefixo)
+        .annotate(relevancia=relevancia_texto + peso_prefixo)
+        .order_by('-relevancia', 'tag_patrimonio')
+    )
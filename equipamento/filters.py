@@ -0,0 +1,39 @@
+import django_filters
+from .busca import buscar_equipamentos
+from .models import Equipamento, SITUACAO_EQUIPAMENTO_CHOICES
+
+
+class EquipamentoFilter(django_filters.FilterSet):
+    """
+    Filtros da listagem de equipamentos.
+
+    Os relacionamentos são filtrados pelo id (ex.: ?empresa=1&situacao=1), sem
+    consultar o registro relacionado; ids inexistentes apenas não retornam itens.
+    `situacao` aceita mais de um valor (?situacao=1&situacao=3) e as datas
+    aceitam intervalos: ?data_compra_after=2023-01-01&data_compra_before=2023-12-31
+    (o mesmo vale para data_cadastro).
+
+    ?q= busca pelas palavras na marca, modelo, especificações e observação e
+    pelo início da tag de patrimônio e do pedido, ordenando pela relevância.
+    """
+    q = django_filters.CharFilter(method='filtrar_busca')
+    situacao = django_filters.MultipleChoiceFilter(choices=SITUACAO_EQUIPAMENTO_CHOICES)
+    empresa = django_filters.NumberFilter()
+    colaborador = django_filters.NumberFilter()
+    setor = django_filters.NumberFilter()
+    tipo_equipamento = django_filters.NumberFilter()
+    data_compra = django_filters.DateFromToRangeFilter()
+    data_cadastro = django_filters.DateFromToRangeFilter()
+
+    class Meta:
+        model = Equipamento
+        fields = ['situacao', 'empresa', 'colaborador', 'setor', 'tipo_equipamento', 'status', 'data_compra', 'data_cadastro']
+
+    def filter_queryset(self, queryset):
+        # A busca (?q=) é aplicada por último, sobre os equipamentos que já passaram pelos demais filtros
+        for name, value in sorted(self.form.cleaned_data.items(), key=lambda item: item[0] == 'q'):
+            queryset = self.filters[name].filter(queryset, value)
+        return queryset
+
+    def filtrar_busca(self, queryset, name, value):
+        return buscar_equipamentos(queryset, value)
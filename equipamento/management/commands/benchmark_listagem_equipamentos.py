@@ -0,0 +1,84 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from colaborador.models import Colaborador
+from empresa.models import Empresa
+from equipamento.models import Equipamento
+from equipamento.serializers import EquipamentoListSerializer, CAMPOS_LISTAGEM_VALORES, representar_equipamento_lista
+from setor.models import Setor
+from tipo_equipamento.models import TipoEquipamento
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara o tempo da listagem de equipamentos pelo serializer e pela listagem otimizada (values). '
+        'Os dados de teste são criados dentro de uma transação desfeita ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantidade', type=int, default=10000, help='Quantidade de equipamentos listados')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Repetições de cada cenário (vale o melhor tempo)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.criar_equipamentos(options['quantidade'])
+            self.comparar(options['repeticoes'])
+
+            # Desfazendo os dados de teste
+            transaction.set_rollback(True)
+
+    def criar_equipamentos(self, quantidade):
+        usuario = User.objects.create(username='benchmark_listagem_equipamentos')
+        empresas = [Empresa.objects.create(nome=f'Empresa {i}', cnpj=f'benchmark-{i}', usuario_cadastro=usuario) for i in range(5)]
+        colaboradores = [Colaborador.objects.create(nome=f'Colaborador {i}', cpf=f'benchmark-{i}', usuario_cadastro=usuario) for i in range(20)]
+        setores = [Setor.objects.create(nome=f'Setor {i}', usuario_cadastro=usuario) for i in range(5)]
+        tipos = [TipoEquipamento.objects.create(tipo=f'Tipo {i}', usuario_cadastro=usuario) for i in range(5)]
+
+        Equipamento.objects.bulk_create([
+            Equipamento(
+                tag_patrimonio=f'BENCHMARK-{i:06d}',
+                tipo_equipamento=tipos[i % len(tipos)],
+                situacao=str(i % 5),
+                empresa=empresas[i % len(empresas)],
+                colaborador=colaboradores[i % len(colaboradores)],
+                setor=setores[i % len(setores)] if i % 3 else None,
+                marca='Marca',
+                modelo='Modelo',
+                observacao='',
+                usuario_cadastro=usuario,
+            )
+            for i in range(quantidade)
+        ], batch_size=1000)
+
+    def comparar(self, repeticoes):
+        queryset = Equipamento.objects.filter(tag_patrimonio__startswith='BENCHMARK-').select_related(
+            'tipo_equipamento', 'empresa', 'colaborador', 'setor'
+        )
+        renderer = JSONRenderer()
+
+        def serializer():
+            return renderer.render(EquipamentoListSerializer(queryset.all(), many=True).data)
+
+        def otimizada():
+            return renderer.render([representar_equipamento_lista(linha) for linha in queryset.values(*CAMPOS_LISTAGEM_VALORES)])
+
+        resultados = {}
+        for nome, funcao in (('serializer', serializer), ('otimizada', otimizada)):
+            tempos = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                resultados[nome] = funcao()
+                tempos.append(time.perf_counter() - inicio)
+            self.stdout.write(f'{nome}: {min(tempos) * 1000:.0f} ms')
+            resultados[f'{nome}_tempo'] = min(tempos)
+
+        if resultados['serializer'] != resultados['otimizada']:
+            raise CommandError('As respostas da listagem otimizada e do serializer são diferentes')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Respostas idênticas ({len(resultados['otimizada'])} bytes). "
+            f"Ganho da listagem otimizada: {resultados['serializer_tempo'] / resultados['otimizada_tempo']:.1f}x"
+        ))
@@ -0,0 +1,105 @@
+import time
+
+from django.contrib.auth.models import User, Group, Permission
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+from colaborador.models import Colaborador
+from empresa.models import Empresa
+from equipamento.models import Equipamento, TransferenciaEmpresa
+from equipamento.views import EquipamentoTransferenciaEmpresaView, EquipamentoTransferenciaEmpresaLoteView
+from tipo_equipamento.models import TipoEquipamento
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara a vazão da transferência de empresa em lote com a transferência individual. '
+        'Os dados de teste são criados dentro de uma transação desfeita ao final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--quantidade', type=int, default=10000, help='Quantidade de equipamentos transferidos em lote')
+        parser.add_argument('--amostra', type=int, default=200, help='Quantidade de equipamentos transferidos individualmente')
+
+    def handle(self, *args, **options):
+        if options['amostra'] > options['quantidade']:
+            raise CommandError('A amostra não pode ser maior que a quantidade')
+
+        with transaction.atomic():
+            self.criar_dados(options['quantidade'])
+            self.comparar(options['quantidade'], options['amostra'])
+
+            # Desfazendo os dados de teste
+            transaction.set_rollback(True)
+
+    def criar_dados(self, quantidade):
+        self.usuario = User.objects.create(username='benchmark_transferencia_empresa')
+        grupo = Group.objects.create(name='benchmark_transferencia_empresa')
+        grupo.permissions.add(Permission.objects.get(codename='editar_equipamento'))
+        self.usuario.groups.add(grupo)
+
+        self.empresas = [Empresa.objects.create(nome=f'Empresa {i}', cnpj=f'benchmark-{i}', usuario_cadastro=self.usuario) for i in range(3)]
+        colaborador = Colaborador.objects.create(nome='Colaborador', cpf='benchmark', usuario_cadastro=self.usuario)
+        tipo = TipoEquipamento.objects.create(tipo='Tipo', usuario_cadastro=self.usuario)
+
+        Equipamento.objects.bulk_create([
+            Equipamento(
+                tag_patrimonio=f'BENCHMARK-{i:06d}',
+                tipo_equipamento=tipo,
+                situacao='1',
+                empresa=self.empresas[0],
+                colaborador=colaborador,
+                marca='Marca',
+                modelo='Modelo',
+                observacao='',
+                usuario_cadastro=self.usuario,
+            )
+            for i in range(quantidade)
+        ], batch_size=1000)
+
+    def comparar(self, quantidade, amostra):
+        factory = APIRequestFactory()
+        view_individual = EquipamentoTransferenciaEmpresaView.as_view()
+        view_lote = EquipamentoTransferenciaEmpresaLoteView.as_view()
+
+        def requisicao(dados):
+            request = factory.post('/', dados, format='json')
+            force_authenticate(request, user=self.usuario)
+            return request
+
+        ids = list(Equipamento.objects.filter(tag_patrimonio__startswith='BENCHMARK-').values_list('pk', flat=True))
+
+        # Transferência individual (um equipamento por requisição) de uma amostra
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as consultas_individual:
+            for pk in ids[:amostra]:
+                resposta = view_individual(requisicao({'empresa_destino': self.empresas[1].pk}), pk=pk)
+                if resposta.status_code != 201:
+                    raise CommandError(f'Falha na transferência individual: {resposta.status_code} {resposta.data}')
+        tempo_individual = time.perf_counter() - inicio
+
+        # Transferência em lote de todos os equipamentos para a terceira empresa
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as consultas_lote:
+            resposta = view_lote(requisicao({'empresa_destino': self.empresas[2].pk, 'equipamentos': ids}))
+        tempo_lote = time.perf_counter() - inicio
+        if resposta.status_code != 201:
+            raise CommandError(f'Falha na transferência em lote: {resposta.status_code} {resposta.data}')
+
+        if Equipamento.objects.filter(pk__in=ids).exclude(empresa=self.empresas[2]).exists():
+            raise CommandError('Nem todos os equipamentos foram transferidos')
+        if TransferenciaEmpresa.objects.filter(equipamento_id__in=ids, empresa_destino=self.empresas[2]).count() != quantidade:
+            raise CommandError('A quantidade de transferências registradas é diferente da quantidade de equipamentos')
+
+        vazao_individual = amostra / tempo_individual
+        vazao_lote = quantidade / tempo_lote
+        self.stdout.write(
+            f'individual: {amostra} equipamentos em {tempo_individual:.2f} s '
+            f'({vazao_individual:.0f} equipamentos/s, {len(consultas_individual) / amostra:.1f} consultas por equipamento)'
+        )
+        self.stdout.write(
+            f'lote: {quantidade} equipamentos em {tempo_lote:.2f} s '
+            f'({vazao_lote:.0f} equipamentos/s, {len(consultas_lote)} consultas no total)'
+        )
+        self.stdout.write(self.style.SUCCESS(f'Ganho da transferência em lote: {vazao_lote / vazao_individual:.1f}x'))
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamento', '0004_alter_equipamento_colaborador'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['empresa', 'situacao'], name='equip_empresa_situacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['colaborador', 'situacao'], name='equip_colab_situacao_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['situacao', 'tag_patrimonio'], name='equip_situacao_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['status', 'tag_patrimonio'], name='equip_status_tag_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['data_compra'], name='equip_data_compra_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['data_cadastro'], name='equip_data_cadastro_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+
+
+# Índice FULLTEXT da busca (?q=) nos campos de texto livre; só existe no MySQL
+NOME_INDICE_FULLTEXT = 'equip_busca_fulltext_idx'
+
+
+def criar_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(
+        f'CREATE FULLTEXT INDEX {NOME_INDICE_FULLTEXT} '
+        'ON equipamento_equipamento (marca, modelo, especificacoes, observacao)'
+    )
+
+
+def remover_indice_fulltext(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    schema_editor.execute(f'DROP INDEX {NOME_INDICE_FULLTEXT} ON equipamento_equipamento')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamento', '0005_indices_filtros'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='equipamento',
+            index=models.Index(fields=['pedido'], name='equip_pedido_idx'),
+        ),
+        migrations.RunPython(criar_indice_fulltext, remover_indice_fulltext),
+    ]
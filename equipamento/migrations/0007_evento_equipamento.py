@@ -0,0 +1,71 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def copiar_historico_existente(apps, schema_editor):
+    EventoEquipamento = apps.get_model('equipamento', 'EventoEquipamento')
+    TransferenciaEmpresa = apps.get_model('equipamento', 'TransferenciaEmpresa')
+    TransferenciaColaborador = apps.get_model('equipamento', 'TransferenciaColaborador')
+    AlteracaiSituacaoEquipamento = apps.get_model('equipamento', 'AlteracaiSituacaoEquipamento')
+
+    def copiar(registros, montar_evento):
+        eventos = []
+        for registro in registros.iterator(chunk_size=1000):
+            eventos.append(montar_evento(registro))
+            if len(eventos) >= 5000:
+                EventoEquipamento.objects.bulk_create(eventos)
+                eventos = []
+        EventoEquipamento.objects.bulk_create(eventos)
+
+    copiar(TransferenciaEmpresa.objects.order_by('pk'), lambda t: EventoEquipamento(
+        equipamento_id=t.equipamento_id, tipo='0', data=t.data_transferencia,
+        usuario_id=t.usuario_transferencia_empresa_id,
+        empresa_origem_id=t.empresa_origem_id, empresa_destino_id=t.empresa_destino_id,
+    ))
+    copiar(TransferenciaColaborador.objects.order_by('pk'), lambda t: EventoEquipamento(
+        equipamento_id=t.equipamento_id, tipo='1', data=t.data_transferencia,
+        usuario_id=t.usuario_transferencia_colaborador_id,
+        colaborador_origem_id=t.colaborador_origem_id, colaborador_destino_id=t.colaborador_destino_id,
+    ))
+    copiar(AlteracaiSituacaoEquipamento.objects.order_by('pk'), lambda a: EventoEquipamento(
+        equipamento_id=a.equipamento_id, tipo='2', data=a.data_alteracao,
+        usuario_id=a.usuario_situacao_equipamento_id,
+        situacao_anterior=a.situacao_anterior, situacao_nova=a.situacao_nova,
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('colaborador', '0003_alter_colaborador_options'),
+        ('empresa', '0002_alter_empresa_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('equipamento', '0006_busca_equipamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoEquipamento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('0', 'Transferência entre Empresas'), ('1', 'Transferência entre Colaboradores'), ('2', 'Alteração de Situação')], max_length=1)),
+                ('data', models.DateTimeField(default=django.utils.timezone.now)),
+                ('situacao_anterior', models.CharField(choices=[('0', 'Novo'), ('1', 'Em operação'), ('2', 'Em manutenção'), ('3', 'Disponivel'), ('4', 'Indisponível')], max_length=1, null=True)),
+                ('situacao_nova', models.CharField(choices=[('0', 'Novo'), ('1', 'Em operação'), ('2', 'Em manutenção'), ('3', 'Disponivel'), ('4', 'Indisponível')], max_length=1, null=True)),
+                ('colaborador_destino', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='eventos_destino', to='colaborador.colaborador')),
+                ('colaborador_origem', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='eventos_origem', to='colaborador.colaborador')),
+                ('empresa_destino', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='eventos_destino', to='empresa.empresa')),
+                ('empresa_origem', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='eventos_origem', to='empresa.empresa')),
+                ('equipamento', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='equipamento.equipamento')),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='eventos_equipamento', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['equipamento', 'data'], name='evento_equip_data_idx')],
+            },
+        ),
+        migrations.RunPython(copiar_historico_existente, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('equipamento', '0007_evento_equipamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='equipamento',
+            name='versao',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
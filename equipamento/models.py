@@ -1,11 +1,14 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from django.contrib.auth.models import User
 from empresa.models import Empresa
 from colaborador.models import Colaborador
 from tipo_equipamento.models import TipoEquipamento
 from setor.models import Setor
+from users.permissions import registrar_permissoes
+from .busca import indice_equipamentos
 
 # Choices para situação de equipamento
 SITUACAO_EQUIPAMENTO_CHOICES = (
@@ -53,14 +56,46 @@ class Equipamento(models.Model):
     data_ultima_alteracao = models.DateTimeField(null=True, default=None)
     usuario_ultima_alteracao = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='equipamento_alterados', null=True)
     status = models.BooleanField(default=True)
+    # Incrementada a cada alteração; exposta como ETag para o controle de concorrência (If-Match)
+    versao = models.PositiveIntegerField(default=1)
 
     def __str__(self):
         return self.tag_patrimonio
+
+    def salvar_com_versao(self, update_fields):
+        """
+        Grava os campos informados somente se o equipamento não foi alterado desde que foi lido.
+
+        O UPDATE é condicionado à versão carregada neste objeto e incrementa a
+        versão no banco, então, entre dois usuários que leram a mesma versão,
+        apenas o primeiro grava. Retorna False se a versão no banco já era outra.
+        """
+        valores = {campo: getattr(self, campo) for campo in update_fields}
+        atualizados = Equipamento.objects.filter(pk=self.pk, versao=self.versao).update(versao=F('versao') + 1, **valores)
+        if not atualizados:
+            return False
+
+        self.versao += 1
+        # O update() não dispara o post_save, que é enviado aqui como faria o save()
+        post_save.send(sender=Equipamento, instance=self, created=False, update_fields=frozenset(update_fields), raw=False, using=self._state.db)
+        return True
     
     class Meta:
         # Ordenando os colaboradores pelo tag_patrimonio por padrão
         ordering = ['tag_patrimonio']
 
+        # Índices para os filtros da listagem (ver EquipamentoFilter), já na ordem padrão por tag_patrimonio
+        indexes = [
+            models.Index(fields=['empresa', 'situacao'], name='equip_empresa_situacao_idx'),
+            models.Index(fields=['colaborador', 'situacao'], name='equip_colab_situacao_idx'),
+            models.Index(fields=['situacao', 'tag_patrimonio'], name='equip_situacao_tag_idx'),
+            models.Index(fields=['status', 'tag_patrimonio'], name='equip_status_tag_idx'),
+            models.Index(fields=['data_compra'], name='equip_data_compra_idx'),
+            models.Index(fields=['data_cadastro'], name='equip_data_cadastro_idx'),
+            # Busca pelo início do pedido (?q=); no MySQL a busca textual usa o índice FULLTEXT da migração 0006
+            models.Index(fields=['pedido'], name='equip_pedido_idx'),
+        ]
+
 
 class TransferenciaEmpresa(models.Model):
     equipamento = models.ForeignKey(Equipamento, on_delete=models.CASCADE)
@@ -86,28 +121,94 @@ class AlteracaiSituacaoEquipamento(models.Model):
     data_alteracao = models.DateTimeField(auto_now_add=True)
 
 
-# Método para criar as permissões após as migrações
-def create_permissions(sender, **kwargs):
-    if sender.name == 'equipamento':
-        content_type = ContentType.objects.get_for_model(Equipamento)
+# Choices para o tipo de evento do histórico do equipamento
+TIPO_EVENTO_EQUIPAMENTO_CHOICES = (
+    ('0', 'Transferência entre Empresas'),
+    ('1', 'Transferência entre Colaboradores'),
+    ('2', 'Alteração de Situação'),
+)
+
+class EventoEquipamento(models.Model):
+    """
+    Histórico do equipamento: um registro por transferência ou alteração de situação.
 
-        visualizar_equipamento, created = Permission.objects.get_or_create(
-            codename = 'visualizar_equipamento',
-            name = 'Visualizar Equipamentos',
-            content_type = content_type,
+    Os registros são apenas incluídos (nunca alterados) e ficam indexados por
+    equipamento e data, então o histórico é lido já ordenado pelo banco.
+    """
+    equipamento = models.ForeignKey(Equipamento, on_delete=models.CASCADE, related_name='eventos')
+    tipo = models.CharField(max_length=1, choices=TIPO_EVENTO_EQUIPAMENTO_CHOICES)
+    data = models.DateTimeField(default=timezone.now)
+    usuario = models.ForeignKey(User, related_name='eventos_equipamento', on_delete=models.SET_NULL, null=True)
+    empresa_origem = models.ForeignKey(Empresa, related_name='eventos_origem', on_delete=models.CASCADE, null=True)
+    empresa_destino = models.ForeignKey(Empresa, related_name='eventos_destino', on_delete=models.CASCADE, null=True)
+    colaborador_origem = models.ForeignKey(Colaborador, related_name='eventos_origem', on_delete=models.CASCADE, null=True)
+    colaborador_destino = models.ForeignKey(Colaborador, related_name='eventos_destino', on_delete=models.CASCADE, null=True)
+    situacao_anterior = models.CharField(max_length=1, choices=SITUACAO_EQUIPAMENTO_CHOICES, null=True)
+    situacao_nova = models.CharField(max_length=1, choices=SITUACAO_EQUIPAMENTO_CHOICES, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['equipamento', 'data'], name='evento_equip_data_idx'),
+        ]
+
+    @classmethod
+    def de_transferencia_empresa(cls, transferencia):
+        return cls(
+            equipamento_id=transferencia.equipamento_id,
+            tipo='0',
+            data=transferencia.data_transferencia,
+            usuario_id=transferencia.usuario_transferencia_empresa_id,
+            empresa_origem_id=transferencia.empresa_origem_id,
+            empresa_destino_id=transferencia.empresa_destino_id,
         )
 
-        visualiza_detalhe_equipamento, created = Permission.objects.get_or_create(
-            codename = 'visualiza_detalhe_equipamento',
-            name = 'Visualiar Detalhes do Equipamento',
-            content_type = content_type,
+    @classmethod
+    def de_transferencia_colaborador(cls, transferencia):
+        return cls(
+            equipamento_id=transferencia.equipamento_id,
+            tipo='1',
+            data=transferencia.data_transferencia,
+            usuario_id=transferencia.usuario_transferencia_colaborador_id,
+            colaborador_origem_id=transferencia.colaborador_origem_id,
+            colaborador_destino_id=transferencia.colaborador_destino_id,
         )
 
-        editar_equipamento, created = Permission.objects.get_or_create(
-            codename = 'editar_equipamento',
-            name = 'Editar Equipamento',
-            content_type = content_type,
+    @classmethod
+    def de_alteracao_situacao(cls, alteracao):
+        return cls(
+            equipamento_id=alteracao.equipamento_id,
+            tipo='2',
+            data=alteracao.data_alteracao,
+            usuario_id=alteracao.usuario_situacao_equipamento_id,
+            situacao_anterior=alteracao.situacao_anterior,
+            situacao_nova=alteracao.situacao_nova,
         )
 
-# Concectar o método ao sinal post_mnigrate
-post_migrate.connect(create_permissions)
\ No newline at end of file
+
+# Registrando no histórico as transferências e alterações de situação
+def registrar_evento_equipamento(sender, instance, created, **kwargs):
+    if not created:
+        return
+    construtores = {
+        TransferenciaEmpresa: EventoEquipamento.de_transferencia_empresa,
+        TransferenciaColaborador: EventoEquipamento.de_transferencia_colaborador,
+        AlteracaiSituacaoEquipamento: EventoEquipamento.de_alteracao_situacao,
+    }
+    construtores[sender](instance).save()
+
+post_save.connect(registrar_evento_equipamento, sender=TransferenciaEmpresa)
+post_save.connect(registrar_evento_equipamento, sender=TransferenciaColaborador)
+post_save.connect(registrar_evento_equipamento, sender=AlteracaiSituacaoEquipamento)
+
+
+# Descartando o índice invertido da busca (usado fora do MySQL) quando os equipamentos mudam
+post_save.connect(indice_equipamentos.invalidar, sender=Equipamento)
+post_delete.connect(indice_equipamentos.invalidar, sender=Equipamento)
+
+
+# Registrando as permissões criadas após as migrações
+registrar_permissoes(Equipamento, {
+    'visualizar_equipamento': 'Visualizar Equipamentos',
+    'visualiza_detalhe_equipamento': 'Visualiar Detalhes do Equipamento',
+    'editar_equipamento': 'Editar Equipamento',
+})
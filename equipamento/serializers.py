@@ -1,14 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.utils import timezone
-from .models import Equipamento, TransferenciaEmpresa, TransferenciaColaborador, AlteracaiSituacaoEquipamento
+from .models import Equipamento, TransferenciaEmpresa, TransferenciaColaborador, AlteracaiSituacaoEquipamento, EventoEquipamento
 from empresa.models import Empresa
 from colaborador.models import Colaborador
 from setor.models import Setor
+from api.concorrencia import VersaoDesatualizada
+from api.mixins import CamposDinamicosSerializerMixin
 from .models import Equipamento
 
 
-# Serializador para Transferência de Colaborador
+# Serializador para Transferência de Colaborador (a transferência é feita por equipamento.services.transferir_colaborador)
 class TransferenciaColaboradorSerializer(serializers.ModelSerializer):
     colaborador_origem = serializers.PrimaryKeyRelatedField(queryset=Colaborador.objects.all())
     usuario_transferencia_colaborador = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
@@ -49,25 +51,8 @@ class TransferenciaColaboradorSerializer(serializers.ModelSerializer):
         representation['usuario_transferencia_colaborador_username'] = instance.usuario_transferencia_colaborador.username
 
         return representation
-    
-    def create(self, validated_data):
-        # Obtendo o colaborador atual do equipamento
-        equipamento = Equipamento.objects.get(pk=validated_data['equipamento'].id)
-        colaborador_origem = equipamento.colaborador
-
-        # Obtendo o usuário logado a partir do contexto da solicitação
-        usuario_transferencia_colaborador = self.context['request'].user
-
-        # Atribuindo o colaborador de origem e o usuário logado aos campos
-        validated_data['colaborador_origem'] = colaborador_origem
-        validated_data['usuario_transferencia_colaborador'] = usuario_transferencia_colaborador
 
-        # Criando a nova transferência da empresa
-        transferencia = TransferenciaColaborador.objects.create(**validated_data)
-
-        return transferencia
-
-# Serializador para Transferência de Empresa
+# Serializador para Transferência de Empresa (a transferência é feita por equipamento.services.transferir_empresa)
 class TransferenciaEmpresaSerializer(serializers.ModelSerializer):
     empresa_origem = serializers.PrimaryKeyRelatedField(queryset=Empresa.objects.all())
     usuario_transferencia_empresa = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
@@ -110,24 +95,7 @@ class TransferenciaEmpresaSerializer(serializers.ModelSerializer):
 
         return representation
 
-    def create(self, validated_data):
-        # Obtendo a empresa atual do equipamento
-        equipamento = Equipamento.objects.get(pk=validated_data['equipamento'].id)
-        empresa_origem = equipamento.empresa
-
-        # Obtendo o usuario logado
-        usuario_transferencia_empresa = self.context['request'].user
-
-        # Atribuindo a empresa atual e o usuario logado aos campos
-        validated_data['empresa_origem'] = empresa_origem
-        validated_data['usuario_transferencia_empresa'] = usuario_transferencia_empresa
-
-        # Criando a nova transferencia da empresa
-        transferencia = TransferenciaEmpresa.objects.create(**validated_data)
-
-        return transferencia
-
-# Serializador para Alteracao de Situação do Equipamento
+# Serializador para Alteracao de Situação do Equipamento (a alteração é feita por equipamento.services.alterar_situacao)
 class HistoricoSituacaoEquipamentoSerializer(serializers.ModelSerializer):
     usuario_situacao_equipamento = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
 
@@ -159,26 +127,52 @@ class HistoricoSituacaoEquipamentoSerializer(serializers.ModelSerializer):
         representation['usuario_situacao_equipamento_username'] = instance.usuario_situacao_equipamento.username
 
         return representation
-    
-    def create(self, validated_data):
-        # Obtendo a situacao atual do equipamento
-        equipamento = Equipamento.objects.get(pk=validated_data['equipamento'].id)
-        situacao_anterior = equipamento.situacao
 
-        # Obtendo o usuario logado
-        usuario_situacao_equipamento = self.context['request'].user
+# Serializador para o histórico do equipamento
+class EventoEquipamentoSerializer(serializers.ModelSerializer):
+    """
+    Monta cada evento com as mesmas chaves dos serializers de transferência e
+    de alteração de situação, mais o tipo_transferencia.
 
-        # Atribuindo a situacao atual e o usuario logado aos campos
-        validated_data['situacao_anterior'] = situacao_anterior
-        validated_data['usuario_situacao_equipamento'] = usuario_situacao_equipamento
+    Os nomes vêm dos relacionamentos, que devem ser carregados com select_related.
+    """
+    class Meta:
+        model = EventoEquipamento
+        fields = ['id', 'data']
 
-        # Criando a alteração de status
-        alteracao = AlteracaiSituacaoEquipamento.objects.create(**validated_data)
+    def to_representation(self, instance):
+        representation = super().to_representation(instance)
+        data = representation.pop('data')
+        username = instance.usuario.username if instance.usuario else None
+
+        if instance.tipo == '0':
+            representation['data_transferencia'] = data
+            representation['empresa_origem_id'] = instance.empresa_origem_id
+            representation['empresa_origem_nome'] = instance.empresa_origem.nome
+            representation['empresa_destino_id'] = instance.empresa_destino_id
+            representation['empresa_destino_nome'] = instance.empresa_destino.nome
+            representation['usuario_transferencia_empresa_id'] = instance.usuario_id
+            representation['usuario_transferencia_empresa_username'] = username
+        elif instance.tipo == '1':
+            representation['data_transferencia'] = data
+            representation['colaborador_origem_id'] = instance.colaborador_origem_id
+            representation['colaborador_origem_nome'] = instance.colaborador_origem.nome
+            representation['colaborador_destino_id'] = instance.colaborador_destino_id
+            representation['colaborador_destino_nome'] = instance.colaborador_destino.nome
+            representation['usuario_transferencia_colaborador_id'] = instance.usuario_id
+            representation['usuario_transferencia_colaborador_username'] = username
+        else:
+            representation['situacao_anterior'] = instance.situacao_anterior
+            representation['situacao_nova'] = instance.situacao_nova
+            representation['data_alteracao'] = data
+            representation['usuario_situacao_equipamento_id'] = instance.usuario_id
+            representation['usuario_situacao_equipamento_username'] = username
 
-        return alteracao
+        representation['tipo_transferencia'] = instance.get_tipo_display()
+        return representation
 
 # Serializador para listagem de todos os equipamentos
-class EquipamentoListSerializer(serializers.ModelSerializer):
+class EquipamentoListSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Equipamento
         fields = ['id', 'tag_patrimonio', 'tipo_equipamento', 'situacao', 'marca', 'modelo', 'empresa', 'colaborador', 'setor', 'status']
@@ -193,33 +187,67 @@ class EquipamentoListSerializer(serializers.ModelSerializer):
         representation.pop('colaborador', None)
         representation.pop('setor', None)
 
-        # Adicionando as chaves personalizadas
-        representation['tipo_equipamento_id'] = instance.tipo_equipamento.id
-        representation['tipo_equipamento_tipo'] = instance.tipo_equipamento.tipo
-        representation['empresa_id'] = instance.empresa.id
-        representation['empresa_nome'] = instance.empresa.nome
+        # Adicionando as chaves personalizadas (apenas dos campos solicitados)
+        if 'tipo_equipamento' in self.fields:
+            representation['tipo_equipamento_id'] = instance.tipo_equipamento.id
+            representation['tipo_equipamento_tipo'] = instance.tipo_equipamento.tipo
+        if 'empresa' in self.fields:
+            representation['empresa_id'] = instance.empresa.id
+            representation['empresa_nome'] = instance.empresa.nome
 
         # Adicionando as chaves personalizadas para colaborador
-        if instance.colaborador:
-            representation['colaborador_id'] = instance.colaborador.id
-            representation['colaborador_nome'] = instance.colaborador.nome
-
-        else:
-            representation['colaborador_id'] = None
-            representation['colaborador_nome'] = None
+        if 'colaborador' in self.fields:
+            if instance.colaborador:
+                representation['colaborador_id'] = instance.colaborador.id
+                representation['colaborador_nome'] = instance.colaborador.nome
+            else:
+                representation['colaborador_id'] = None
+                representation['colaborador_nome'] = None
 
         # Adicionando as chaves personalizadas para setor
-        if instance.setor:
-            representation['setor_id'] = instance.setor.id
-            representation['setor_nome'] = instance.setor.nome
-        else:
-            representation['setor_id'] = None
-            representation['setor_nome'] = None
+        if 'setor' in self.fields:
+            if instance.setor:
+                representation['setor_id'] = instance.setor.id
+                representation['setor_nome'] = instance.setor.nome
+            else:
+                representation['setor_id'] = None
+                representation['setor_nome'] = None
 
         return representation
 
+# Campos consultados pela listagem otimizada (values), incluindo os nomes dos relacionamentos
+CAMPOS_LISTAGEM_VALORES = (
+    'id', 'tag_patrimonio', 'situacao', 'marca', 'modelo', 'status',
+    'tipo_equipamento_id', 'tipo_equipamento__tipo',
+    'empresa_id', 'empresa__nome',
+    'colaborador_id', 'colaborador__nome',
+    'setor_id', 'setor__nome',
+)
+
+def representar_equipamento_lista(linha):
+    """
+    Monta, a partir de uma linha de values(CAMPOS_LISTAGEM_VALORES), a mesma
+    representação do EquipamentoListSerializer, com as chaves na mesma ordem.
+    """
+    return {
+        'id': linha['id'],
+        'tag_patrimonio': linha['tag_patrimonio'],
+        'situacao': linha['situacao'],
+        'marca': linha['marca'],
+        'modelo': linha['modelo'],
+        'status': linha['status'],
+        'tipo_equipamento_id': linha['tipo_equipamento_id'],
+        'tipo_equipamento_tipo': linha['tipo_equipamento__tipo'],
+        'empresa_id': linha['empresa_id'],
+        'empresa_nome': linha['empresa__nome'],
+        'colaborador_id': linha['colaborador_id'],
+        'colaborador_nome': linha['colaborador__nome'],
+        'setor_id': linha['setor_id'],
+        'setor_nome': linha['setor__nome'],
+    }
+
 # Serializador principal para Equipamento
-class EquipamentoSerializer(serializers.ModelSerializer):
+class EquipamentoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Equipamento
         fields = ['id', 'tag_patrimonio', 'tipo_equipamento', 'pedido', 'data_compra', 'situacao',
@@ -250,40 +278,45 @@ class EquipamentoSerializer(serializers.ModelSerializer):
         representation.pop('colaborador', None)
         representation.pop('setor', None)
 
-        # Adicionando chaves personalizdas para tipo de equipamento, empresa e colaborador
-        representation['tipo_equipamento_id'] = instance.tipo_equipamento.id
-        representation['tipo_equipamento_tipo'] = instance.tipo_equipamento.tipo
-        representation['empresa_id'] = instance.empresa.id
-        representation['empresa_nome'] = instance.empresa.nome
+        # Adicionando chaves personalizdas para tipo de equipamento, empresa e colaborador (apenas dos campos solicitados)
+        if 'tipo_equipamento' in self.fields:
+            representation['tipo_equipamento_id'] = instance.tipo_equipamento.id
+            representation['tipo_equipamento_tipo'] = instance.tipo_equipamento.tipo
+        if 'empresa' in self.fields:
+            representation['empresa_id'] = instance.empresa.id
+            representation['empresa_nome'] = instance.empresa.nome
         
         # Adicionando as chaves personalizadas para colaborador
-        if instance.colaborador:
-            representation['colaborador_id'] = instance.colaborador.id
-            representation['colaborador_nome'] = instance.colaborador.nome
-
-        else:
-            representation['colaborador_id'] = None
-            representation['colaborador_nome'] = None
+        if 'colaborador' in self.fields:
+            if instance.colaborador:
+                representation['colaborador_id'] = instance.colaborador.id
+                representation['colaborador_nome'] = instance.colaborador.nome
+            else:
+                representation['colaborador_id'] = None
+                representation['colaborador_nome'] = None
 
         # Adicionando as chaves personalizadas para setor
-        if instance.setor:
-            representation['setor_id'] = instance.setor.id
-            representation['setor_nome'] = instance.setor.nome
-        else:
-            representation['setor_id'] = None
-            representation['setor_nome'] = None
+        if 'setor' in self.fields:
+            if instance.setor:
+                representation['setor_id'] = instance.setor.id
+                representation['setor_nome'] = instance.setor.nome
+            else:
+                representation['setor_id'] = None
+                representation['setor_nome'] = None
 
         # Adicionando as chaves personalizadas para usuario_cadastro
-        representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
-        representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
+        if 'usuario_cadastro' in self.fields:
+            representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
+            representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
 
         # Adicionando as chaves personalizadas para usuario_ultima_alteracao
-        if instance.usuario_ultima_alteracao:
-            representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
-            representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
-        else:
-            representation['usuario_ultima_alteracao_id'] = None
-            representation['usuario_ultima_alteracao_username'] = None
+        if 'usuario_ultima_alteracao' in self.fields:
+            if instance.usuario_ultima_alteracao:
+                representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
+                representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
+            else:
+                representation['usuario_ultima_alteracao_id'] = None
+                representation['usuario_ultima_alteracao_username'] = None
 
         return representation
 
@@ -310,8 +343,8 @@ class EquipamentoSerializer(serializers.ModelSerializer):
         instance.data_ultima_alteracao = timezone.now()
         instance.usuario_ultima_alteracao = user
 
-        # Salvando a instancia
-        instance.save(update_fields=[
+        # Salvando a instancia, se ela não foi alterada por outro usuário desde que foi lida
+        salvo = instance.salvar_com_versao([
             'data_ultima_alteracao', 
             'usuario_ultima_alteracao', 
             'setor', 
@@ -324,6 +357,8 @@ class EquipamentoSerializer(serializers.ModelSerializer):
             'acesso_senha',
             'observacao',
         ])
+        if not salvo:
+            raise VersaoDesatualizada()
         return instance
 
 # Serializador para listagem de id e tag de todos os equipamentos
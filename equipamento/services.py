@@ -0,0 +1,412 @@
+from django.db import transaction
+from django.db.models import F, Q
+from django.http import Http404
+from django.utils import timezone
+from colaborador.models import Colaborador
+from empresa.models import Empresa
+from api.concorrencia import VersaoDesatualizada
+from api.validacao import converter_id
+from .models import (
+    Equipamento,
+    EventoEquipamento,
+    TransferenciaEmpresa,
+    TransferenciaColaborador,
+    AlteracaiSituacaoEquipamento,
+    SITUACAO_EQUIPAMENTO_CHOICES,
+)
+
+
+# Número máximo de consultas de cada alteração individual (sem contar o controle da transação):
+# leitura do equipamento, leitura do destino, inclusão do registro, inclusão do evento do histórico e UPDATE condicional
+CONSULTAS_TRANSFERENCIA = 5
+# Leitura do equipamento, inclusão do registro, inclusão do evento do histórico e UPDATE condicional
+CONSULTAS_ALTERACAO_SITUACAO = 4
+
+
+def buscar_equipamento_para_alteracao(equipamento_id, versoes_aceitas=None, relacionamentos=()):
+    """
+    Busca o equipamento a ser alterado (uma consulta) e confere a versão informada no If-Match.
+
+    Lança Http404 se o equipamento não existir e VersaoDesatualizada se
+    versoes_aceitas for informado e não contiver a versão atual.
+    """
+    equipamento = Equipamento.objects.select_related(*relacionamentos).filter(pk=equipamento_id).first()
+    if equipamento is None:
+        raise Http404('Equipamento não encontrado')
+
+    if versoes_aceitas is not None and equipamento.versao not in versoes_aceitas:
+        raise VersaoDesatualizada()
+    return equipamento
+
+
+def gravar_equipamento(equipamento, campos):
+    """
+    Grava os campos do equipamento com o UPDATE condicional à versão lida.
+
+    Deve ser chamada dentro da transação da alteração: se outro usuário
+    alterou o equipamento, VersaoDesatualizada desfaz o registro já incluído.
+    """
+    if not equipamento.salvar_com_versao(campos):
+        raise VersaoDesatualizada()
+
+
+def transferir_empresa(usuario, equipamento_id, empresa_destino_id, versoes_aceitas=None):
+    """
+    Transfere um equipamento para outra empresa.
+
+    Tudo é feito em uma transação com no máximo CONSULTAS_TRANSFERENCIA
+    consultas. Retorna (erro, transferencia); se houver erro nada é alterado.
+    A transferência é retornada com os relacionamentos já carregados.
+    """
+    with transaction.atomic():
+        equipamento = buscar_equipamento_para_alteracao(equipamento_id, versoes_aceitas, ['empresa'])
+
+        # Verificando se a empresa de origem é diferente da empresa de destino
+        if empresa_destino_id == equipamento.empresa_id:
+            return {'error': 'A empresa de destino é a mesma que a empresa atual do equipamento'}, None
+
+        empresa_destino = Empresa.objects.filter(pk=empresa_destino_id, status=True).first()
+        if empresa_destino is None:
+            return {'error': f'A empresa com ID {empresa_destino_id} não existe ou está inativa'}, None
+
+        # O evento do histórico é incluído pelo post_save da transferência
+        transferencia = TransferenciaEmpresa.objects.create(
+            equipamento=equipamento,
+            empresa_origem=equipamento.empresa,
+            empresa_destino=empresa_destino,
+            usuario_transferencia_empresa=usuario,
+        )
+
+        equipamento.empresa = empresa_destino
+        gravar_equipamento(equipamento, ['empresa'])
+
+    return None, transferencia
+
+
+def transferir_colaborador(usuario, equipamento_id, colaborador_destino_id, versoes_aceitas=None):
+    """
+    Transfere um equipamento para outro colaborador.
+
+    Tudo é feito em uma transação com no máximo CONSULTAS_TRANSFERENCIA
+    consultas. Retorna (erro, transferencia); se houver erro nada é alterado.
+    A transferência é retornada com os relacionamentos já carregados.
+    """
+    with transaction.atomic():
+        equipamento = buscar_equipamento_para_alteracao(equipamento_id, versoes_aceitas, ['colaborador'])
+
+        # Verificando se o colaborador de origem é diferente do colaborador de destino
+        if colaborador_destino_id == equipamento.colaborador_id:
+            return {'error': 'O colaborador e destino é o mesmo que o colaborador atual do equipamento'}, None
+
+        colaborador_destino = Colaborador.objects.filter(pk=colaborador_destino_id, status=True).first()
+        if colaborador_destino is None:
+            return {'error': f'O colaborador com ID {colaborador_destino_id} não existe ou está inativo'}, None
+
+        # O evento do histórico é incluído pelo post_save da transferência
+        transferencia = TransferenciaColaborador.objects.create(
+            equipamento=equipamento,
+            colaborador_origem=equipamento.colaborador,
+            colaborador_destino=colaborador_destino,
+            usuario_transferencia_colaborador=usuario,
+        )
+
+        equipamento.colaborador = colaborador_destino
+        gravar_equipamento(equipamento, ['colaborador'])
+
+    return None, transferencia
+
+
+def alterar_situacao(usuario, equipamento_id, situacao_nova, versoes_aceitas=None):
+    """
+    Altera a situação de um equipamento.
+
+    Tudo é feito em uma transação com no máximo CONSULTAS_ALTERACAO_SITUACAO
+    consultas. Retorna (erro, alteracao); se houver erro nada é alterado.
+    """
+    # Verifica se a situação nova foi informada e se está entre as opções permitidas
+    if situacao_nova is None:
+        return {'error': 'Você deve fornecer uma nova situação para atualização.'}, None
+    if situacao_nova not in dict(SITUACAO_EQUIPAMENTO_CHOICES):
+        return {'error': 'Nova situação inválida.'}, None
+
+    with transaction.atomic():
+        equipamento = buscar_equipamento_para_alteracao(equipamento_id, versoes_aceitas)
+
+        # Verifica se a situação nova é diferente da anterior
+        if situacao_nova == equipamento.situacao:
+            return {'error': 'A nova situação é igual a situação atual'}, None
+
+        # O evento do histórico é incluído pelo post_save da alteração
+        alteracao = AlteracaiSituacaoEquipamento.objects.create(
+            equipamento=equipamento,
+            situacao_anterior=equipamento.situacao,
+            situacao_nova=situacao_nova,
+            usuario_situacao_equipamento=usuario,
+        )
+
+        equipamento.situacao = situacao_nova
+        gravar_equipamento(equipamento, ['situacao'])
+
+    return None, alteracao
+
+
+def bloquear_equipamentos(queryset, ids, tags):
+    """
+    Busca e bloqueia (select_for_update) os equipamentos informados pelo id ou pela tag de patrimônio.
+
+    Deve ser chamada dentro de uma transação. Retorna (equipamentos, erros),
+    com um erro para os ids e outro para as tags não encontrados no queryset.
+    """
+    equipamentos = list(
+        queryset.select_for_update()
+        .filter(Q(pk__in=ids) | Q(tag_patrimonio__in=tags))
+        .only('id', 'tag_patrimonio', 'situacao', 'empresa_id', 'colaborador_id')
+    )
+
+    erros = []
+    ids_inexistentes = sorted(set(ids) - {equipamento.pk for equipamento in equipamentos})
+    if ids_inexistentes:
+        erros.append({'error': 'Equipamentos não encontrados', 'equipamentos': ids_inexistentes})
+
+    tags_inexistentes = sorted(set(tags) - {equipamento.tag_patrimonio for equipamento in equipamentos})
+    if tags_inexistentes:
+        erros.append({'error': 'Tags de patrimônio não encontradas', 'tags': tags_inexistentes})
+
+    return equipamentos, erros
+
+
+def transferir_empresa_lote(usuario, empresa_destino_id, ids=(), tags=()):
+    """
+    Transfere vários equipamentos, informados pelo id ou pela tag de patrimônio, para a empresa de destino.
+
+    Tudo é validado antes de qualquer alteração: a empresa de destino deve
+    existir e estar ativa, todos os equipamentos devem existir e nenhum pode
+    já estar na empresa de destino. As transferências e os eventos do
+    histórico são incluídos com bulk_create e os equipamentos alterados com
+    um único UPDATE, tudo em uma transação.
+
+    Retorna (erros, equipamentos_transferidos). Se houver erros nada é alterado.
+    """
+    with transaction.atomic():
+        empresa_destino = Empresa.objects.filter(pk=empresa_destino_id, status=True).first()
+        if empresa_destino is None:
+            return [{'error': f'A empresa com ID {empresa_destino_id} não existe ou está inativa'}], []
+
+        equipamentos, erros = bloquear_equipamentos(Equipamento.objects.all(), ids, tags)
+
+        na_empresa_destino = [equipamento.tag_patrimonio for equipamento in equipamentos if equipamento.empresa_id == empresa_destino.pk]
+        if na_empresa_destino:
+            erros.append({'error': 'Os equipamentos já estão na empresa de destino', 'tags': sorted(na_empresa_destino)})
+
+        if erros:
+            return erros, []
+
+        transferencias = TransferenciaEmpresa.objects.bulk_create([
+            TransferenciaEmpresa(
+                equipamento_id=equipamento.pk,
+                empresa_origem_id=equipamento.empresa_id,
+                empresa_destino_id=empresa_destino.pk,
+                usuario_transferencia_empresa=usuario,
+            )
+            for equipamento in equipamentos
+        ], batch_size=1000)
+
+        # O bulk_create não dispara o post_save, então os eventos do histórico são incluídos aqui
+        EventoEquipamento.objects.bulk_create(
+            [EventoEquipamento.de_transferencia_empresa(transferencia) for transferencia in transferencias],
+            batch_size=1000,
+        )
+
+        Equipamento.objects.filter(pk__in=[equipamento.pk for equipamento in equipamentos]).update(empresa=empresa_destino, versao=F('versao') + 1)
+
+    return [], equipamentos
+
+
+def transferir_colaborador_lote(usuario, colaborador_origem, colaborador_destino_id, ids=None, tags=None, inativar_origem=False):
+    """
+    Transfere os equipamentos do colaborador de origem para o colaborador de destino (desligamento).
+
+    Sem ids nem tags, todos os equipamentos do colaborador são transferidos;
+    com eles, apenas os informados, que devem pertencer ao colaborador. As
+    transferências e os eventos do histórico são incluídos com bulk_create e
+    os equipamentos alterados com um único UPDATE, tudo em uma transação.
+
+    Com inativar_origem o colaborador de origem é inativado ao final. Quando
+    todos os equipamentos são transferidos não é preciso verificar se ele
+    ainda possui equipamentos; com apenas parte deles, a verificação é feita
+    antes de qualquer alteração.
+
+    Retorna (erros, equipamentos_transferidos). Se houver erros nada é alterado.
+    """
+    transferir_todos = not ids and not tags
+
+    with transaction.atomic():
+        colaborador_destino = Colaborador.objects.filter(pk=colaborador_destino_id, status=True).first()
+        if colaborador_destino is None:
+            return [{'error': f'O colaborador com ID {colaborador_destino_id} não existe ou está inativo'}], []
+        if colaborador_destino.pk == colaborador_origem.pk:
+            return [{'error': 'O colaborador de destino é o mesmo que o colaborador de origem'}], []
+
+        queryset = Equipamento.objects.filter(colaborador=colaborador_origem)
+        if transferir_todos:
+            equipamentos = list(queryset.select_for_update().only('id', 'tag_patrimonio', 'situacao', 'empresa_id', 'colaborador_id'))
+            erros = []
+        else:
+            # Os equipamentos informados que não são do colaborador de origem aparecem como não encontrados
+            equipamentos, erros = bloquear_equipamentos(queryset, ids or [], tags or [])
+
+        if not equipamentos and not erros and not inativar_origem:
+            erros.append({'error': 'O colaborador não possui equipamentos para transferir'})
+
+        if inativar_origem and not transferir_todos and not erros:
+            if queryset.exclude(pk__in=[equipamento.pk for equipamento in equipamentos]).exists():
+                erros.append({'error': 'Não é permitido inativar um colaborador que continuará vinculado a equipamentos'})
+
+        if erros:
+            return erros, []
+
+        transferencias = TransferenciaColaborador.objects.bulk_create([
+            TransferenciaColaborador(
+                equipamento_id=equipamento.pk,
+                colaborador_origem_id=colaborador_origem.pk,
+                colaborador_destino_id=colaborador_destino.pk,
+                usuario_transferencia_colaborador=usuario,
+            )
+            for equipamento in equipamentos
+        ], batch_size=1000)
+
+        # O bulk_create não dispara o post_save, então os eventos do histórico são incluídos aqui
+        EventoEquipamento.objects.bulk_create(
+            [EventoEquipamento.de_transferencia_colaborador(transferencia) for transferencia in transferencias],
+            batch_size=1000,
+        )
+
+        if equipamentos:
+            Equipamento.objects.filter(pk__in=[equipamento.pk for equipamento in equipamentos]).update(colaborador=colaborador_destino, versao=F('versao') + 1)
+
+        if inativar_origem and colaborador_origem.status:
+            colaborador_origem.status = False
+            colaborador_origem.usuario_ultima_alteracao = usuario
+            colaborador_origem.data_ultima_alteracao = timezone.now()
+            colaborador_origem.save(update_fields=['status', 'usuario_ultima_alteracao', 'data_ultima_alteracao'])
+
+    return [], equipamentos
+
+
+def validar_alteracoes_situacao_lote(alteracoes):
+    """
+    Valida a lista de alterações de situação.
+
+    Cada alteração é {"equipamento": id, "situacao_nova": situação} ou
+    {"tag": tag de patrimônio, "situacao_nova": situação}. Retorna (erros,
+    alteracoes_validadas), com os ids já convertidos por converter_id; se
+    houver algum erro, nenhuma alteração é retornada.
+    """
+    erros = []
+    validadas = []
+    situacoes = dict(SITUACAO_EQUIPAMENTO_CHOICES)
+    informados = set()
+
+    for indice, alteracao in enumerate(alteracoes):
+        if not isinstance(alteracao, dict):
+            erros.append({'indice': indice, 'error': 'Cada alteração deve ser um objeto'})
+            continue
+
+        tag = alteracao.get('tag')
+        if (alteracao.get('equipamento') is None) == (tag is None):
+            erros.append({'indice': indice, 'error': 'Informe o equipamento (ID) ou a tag de patrimônio'})
+            continue
+        equipamento_id = converter_id(alteracao['equipamento']) if tag is None else None
+        if tag is None and equipamento_id is None:
+            erros.append({'indice': indice, 'error': 'O campo equipamento deve ser o ID de um equipamento'})
+            continue
+        if tag is not None and not isinstance(tag, str):
+            erros.append({'indice': indice, 'error': 'O campo tag deve ser uma tag de patrimônio'})
+            continue
+
+        if alteracao.get('situacao_nova') not in situacoes:
+            erros.append({'indice': indice, 'error': 'Nova situação inválida.'})
+
+        chave = ('equipamento', equipamento_id) if equipamento_id is not None else ('tag', tag)
+        if chave in informados:
+            erros.append({'indice': indice, 'error': 'Equipamento repetido no lote'})
+        informados.add(chave)
+
+        validadas.append({'equipamento': equipamento_id, 'tag': tag, 'situacao_nova': alteracao.get('situacao_nova')})
+
+    if erros:
+        return erros, []
+    return [], validadas
+
+
+def alterar_situacao_lote(usuario, alteracoes):
+    """
+    Altera a situação de vários equipamentos de uma vez.
+
+    Recebe a lista já validada por validar_alteracoes_situacao_lote. As
+    situações atuais são lidas em uma consulta e os equipamentos que já estão
+    na situação nova são ignorados. As alterações e os eventos do histórico
+    são incluídos com bulk_create e os equipamentos alterados com um UPDATE
+    por situação nova, tudo em uma transação.
+
+    Retorna (erros, alterados, ignorados), sendo alterados uma lista de
+    (equipamento, situacao_anterior, situacao_nova). Se houver erros nada é alterado.
+    """
+    ids = [alteracao['equipamento'] for alteracao in alteracoes if alteracao.get('equipamento') is not None]
+    tags = [alteracao['tag'] for alteracao in alteracoes if alteracao.get('tag') is not None]
+
+    with transaction.atomic():
+        equipamentos, erros = bloquear_equipamentos(Equipamento.objects.all(), ids, tags)
+        if erros:
+            return erros, [], []
+
+        por_id = {equipamento.pk: equipamento for equipamento in equipamentos}
+        por_tag = {equipamento.tag_patrimonio: equipamento for equipamento in equipamentos}
+
+        # Um equipamento informado pelo id e pela tag apareceria duas vezes
+        vistos = set()
+        alterados = []
+        ignorados = []
+        por_situacao = {}
+        for alteracao in alteracoes:
+            if alteracao.get('equipamento') is not None:
+                equipamento = por_id[alteracao['equipamento']]
+            else:
+                equipamento = por_tag[alteracao['tag']]
+
+            if equipamento.pk in vistos:
+                erros.append({'error': 'Equipamento repetido no lote', 'tags': [equipamento.tag_patrimonio]})
+                continue
+            vistos.add(equipamento.pk)
+
+            situacao_nova = alteracao['situacao_nova']
+            if equipamento.situacao == situacao_nova:
+                ignorados.append(equipamento)
+                continue
+
+            alterados.append((equipamento, equipamento.situacao, situacao_nova))
+            por_situacao.setdefault(situacao_nova, []).append(equipamento.pk)
+
+        if erros:
+            return erros, [], []
+
+        registros = AlteracaiSituacaoEquipamento.objects.bulk_create([
+            AlteracaiSituacaoEquipamento(
+                equipamento_id=equipamento.pk,
+                situacao_anterior=situacao_anterior,
+                situacao_nova=situacao_nova,
+                usuario_situacao_equipamento=usuario,
+            )
+            for equipamento, situacao_anterior, situacao_nova in alterados
+        ], batch_size=1000)
+
+        # O bulk_create não dispara o post_save, então os eventos do histórico são incluídos aqui
+        EventoEquipamento.objects.bulk_create(
+            [EventoEquipamento.de_alteracao_situacao(registro) for registro in registros],
+            batch_size=1000,
+        )
+
+        for situacao_nova, pks in por_situacao.items():
+            Equipamento.objects.filter(pk__in=pks).update(situacao=situacao_nova, versao=F('versao') + 1)
+
+    return [], alterados, ignorados
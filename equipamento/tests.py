@@ -1,3 +1,260 @@
+from unittest import mock
+
+from django.contrib.auth.models import User, Group, Permission
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from api.concorrencia import VersaoDesatualizada
+from colaborador.models import Colaborador
+from empresa.models import Empresa
+from equipamento import services
+from equipamento.busca import indice_equipamentos
+from equipamento.models import Equipamento, EventoEquipamento
+from setor.models import Setor
+from tipo_equipamento.models import TipoEquipamento
+
+
+class EquipamentoTestCase(TestCase):
+    """
+    Base dos testes de equipamento: um usuário com todas as permissões de equipamento e 60 equipamentos.
+    """
+    quantidade_equipamentos = 60
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('usuario', 'usuario@teste.com', 'senha')
+        grupo = Group.objects.create(name='equipamentos')
+        grupo.permissions.set(Permission.objects.filter(codename__endswith='_equipamento'))
+        cls.usuario.groups.add(grupo)
+
+        cls.empresas = [Empresa.objects.create(nome=f'Empresa {i}', cnpj=f'{i:014d}', usuario_cadastro=cls.usuario) for i in range(2)]
+        cls.colaboradores = [Colaborador.objects.create(nome=f'Colaborador {i}', cpf=f'{i:011d}', usuario_cadastro=cls.usuario) for i in range(2)]
+        cls.setor = Setor.objects.create(nome='Setor', usuario_cadastro=cls.usuario)
+        cls.tipo = TipoEquipamento.objects.create(tipo='Notebook', usuario_cadastro=cls.usuario)
+
+        Equipamento.objects.bulk_create([
+            Equipamento(
+                tag_patrimonio=f'TAG{i:05d}',
+                tipo_equipamento=cls.tipo,
+                situacao='1',
+                empresa=cls.empresas[0],
+                colaborador=cls.colaboradores[0],
+                setor=cls.setor if i % 2 else None,
+                marca='Dell',
+                modelo='Latitude',
+                pedido=f'P{i}',
+                observacao='',
+                usuario_cadastro=cls.usuario,
+                usuario_ultima_alteracao=cls.usuario,
+            )
+            for i in range(cls.quantidade_equipamentos)
+        ])
+        cls.equipamentos = list(Equipamento.objects.order_by('pk'))
+
+    def setUp(self):
+        # As permissões de grupo ficam em cache; cada teste começa sem elas
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+
+
+class ListagemConsultasTests(EquipamentoTestCase):
+    """
+    A quantidade de consultas das listagens de equipamentos não deve depender da quantidade de itens na página.
+
+    As contagens consideram as permissões de grupo já em cache, como nas requisições seguintes à primeira.
+    """
+    def autenticar(self):
+        # Um novo objeto de usuário a cada requisição, como na autenticação real
+        self.client.force_authenticate(User.objects.get(pk=self.usuario.pk))
+
+    def assertConsultasPorTamanhoDePagina(self, url, consultas):
+        self.client.get(url)
+        for tamanho in (5, 20, 60):
+            self.autenticar()
+            with self.subTest(page_size=tamanho), self.assertNumQueries(consultas):
+                resposta = self.client.get(f'{url}?page_size={tamanho}')
+            self.assertEqual(resposta.status_code, 200)
+            self.assertTrue(resposta.data['results'])
+
+    def test_listagem(self):
+        self.assertConsultasPorTamanhoDePagina('/equipamento/', 2)
+
+    def test_detalhe(self):
+        self.client.get('/equipamento/')
+        self.autenticar()
+        with self.assertNumQueries(1):
+            resposta = self.client.get(f'/equipamento/{self.equipamentos[1].pk}/')
+        self.assertEqual(resposta.data['usuario_ultima_alteracao_username'], 'usuario')
+
+    def test_historico_nao_carrega_os_relacionamentos_do_equipamento(self):
+        self.client.get('/equipamento/')
+        self.autenticar()
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(f'/equipamento/{self.equipamentos[1].pk}/historico/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(consultas), 2)
+        self.assertNotIn('JOIN', consultas[0]['sql'])
+
+    def test_equipamentos_da_empresa(self):
+        self.assertConsultasPorTamanhoDePagina(f'/empresa/{self.empresas[0].pk}/equipamentos/', 3)
+
+    def test_equipamentos_do_colaborador(self):
+        self.assertConsultasPorTamanhoDePagina(f'/colaborador/{self.colaboradores[0].pk}/equipamentos/', 3)
+
+    def test_equipamentos_do_setor(self):
+        self.assertConsultasPorTamanhoDePagina(f'/setor/{self.setor.pk}/equipamentos/', 3)
+
+    def test_equipamentos_do_tipo(self):
+        self.assertConsultasPorTamanhoDePagina(f'/tipo_equipamento/{self.tipo.pk}/equipamentos/', 3)
+
+
+class BuscaTests(EquipamentoTestCase):
+    def setUp(self):
+        super().setUp()
+        alteracoes = {
+            'TAG00003': {'marca': 'Lenovo', 'observacao': 'Substitui um ThinkPad'},
+            'TAG00004': {'marca': 'Lenovo', 'modelo': 'ThinkPad'},
+            'TAG00005': {'modelo': 'Latitude 5420', 'especificacoes': '16GB RAM'},
+        }
+        for tag, campos in alteracoes.items():
+            Equipamento.objects.filter(tag_patrimonio=tag).update(**campos)
+        indice_equipamentos.invalidar()
+
+    def buscar(self, busca, **params):
+        resposta = self.client.get('/equipamento/', {'q': busca, 'page_size': 100, **params})
+        self.assertEqual(resposta.status_code, 200)
+        return [equipamento['tag_patrimonio'] for equipamento in resposta.data['results']]
+
+    def test_ordena_pela_relevancia(self):
+        self.assertEqual(self.buscar('5420 16gb ram lenovo'), ['TAG00005', 'TAG00003', 'TAG00004'])
+        self.assertEqual(self.buscar('lenovo thinkpad'), ['TAG00003', 'TAG00004'])
+        self.assertEqual(len(self.buscar('dell latitude')), self.quantidade_equipamentos - 1)
+
+    def test_prefixo_da_tag_e_do_pedido_primeiro(self):
+        self.assertEqual(self.buscar('tag0001'), [f'TAG{i:05d}' for i in range(10, 20)])
+        self.assertEqual(self.buscar('P5')[:2], ['TAG00005', 'TAG00050'])
+
+    def test_combina_com_os_filtros(self):
+        self.assertEqual(self.buscar('lenovo', setor=self.setor.pk), ['TAG00003'])
+
+    def test_limita_os_equipamentos_encontrados_pelo_indice(self):
+        with mock.patch('equipamento.busca.LIMITE_CANDIDATOS_INDICE', 10):
+            tags = self.buscar('dell')
+        self.assertEqual(tags, [f'TAG{i:05d}' for i in (0, 1, 2, 5, 6, 7, 8, 9, 10, 11)])
+
+    def test_limite_considera_apenas_os_equipamentos_filtrados(self):
+        # Mais equipamentos encontrados que o limite; os do setor (tags ímpares) não estão entre os primeiros do inventário
+        with mock.patch('equipamento.busca.LIMITE_CANDIDATOS_INDICE', 10):
+            tags = self.buscar('dell', setor=self.setor.pk)
+            self.assertEqual(self.buscar('dell', setor=self.setor.pk, situacao='2'), [])
+        self.assertEqual(tags, [f'TAG{i:05d}' for i in (1, 5, 7, 9, 11, 13, 15, 17, 19, 21)])
+
+
+class ValidacaoIdsTests(EquipamentoTestCase):
+    ids_invalidos = (1.9, True, '1x', '-1', None, [1])
+
+    def test_transferencia_individual(self):
+        equipamento = self.equipamentos[0]
+        for url, campo in (('transferencia_empresa', 'empresa_destino'), ('transferencia_colaborador', 'colaborador_destino')):
+            for valor in self.ids_invalidos:
+                with self.subTest(url=url, valor=valor):
+                    resposta = self.client.post(f'/equipamento/{equipamento.pk}/{url}/', {campo: valor}, format='json')
+                    self.assertEqual(resposta.status_code, 400)
+
+        resposta = self.client.post(f'/equipamento/{equipamento.pk}/transferencia_empresa/',
+                                    {'empresa_destino': str(self.empresas[1].pk)}, format='json')
+        self.assertEqual(resposta.status_code, 201)
+        equipamento.refresh_from_db()
+        self.assertEqual(equipamento.empresa, self.empresas[1])
+
+    def test_transferencia_em_lote(self):
+        for dados in (
+            *({'empresa_destino': valor, 'equipamentos': [self.equipamentos[0].pk]} for valor in self.ids_invalidos),
+            *({'empresa_destino': self.empresas[1].pk, 'equipamentos': [valor]} for valor in self.ids_invalidos),
+        ):
+            with self.subTest(dados=dados):
+                resposta = self.client.post('/equipamento/transferencia_empresa/lote/', dados, format='json')
+                self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(Equipamento.objects.filter(empresa=self.empresas[1]).exists())
+
+    def test_alteracao_de_situacao_em_lote(self):
+        for valor in self.ids_invalidos:
+            if valor is None:
+                continue
+            with self.subTest(valor=valor):
+                resposta = self.client.post('/equipamento/atualizar_situacao/lote/', {
+                    'alteracoes': [{'equipamento': valor, 'situacao_nova': '2'}],
+                }, format='json')
+                self.assertEqual(resposta.status_code, 400)
+
+        resposta = self.client.post('/equipamento/atualizar_situacao/lote/', {
+            'alteracoes': [{'equipamento': str(self.equipamentos[0].pk), 'situacao_nova': '2'}],
+        }, format='json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertEqual(Equipamento.objects.get(pk=self.equipamentos[0].pk).situacao, '2')
+
+
+class ServicosConsultasTests(EquipamentoTestCase):
+    """
+    Quantidade de consultas das alterações individuais, sem contar os savepoints da transação.
+    """
+    def assertConsultas(self, quantidade, funcao, *args):
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = funcao(*args)
+        sql = [consulta['sql'] for consulta in consultas if 'SAVEPOINT' not in consulta['sql']]
+        self.assertEqual(len(sql), quantidade, '\n'.join(sql))
+        return resultado
+
+    def test_transferir_empresa(self):
+        equipamento = self.equipamentos[0]
+        erro, transferencia = self.assertConsultas(
+            services.CONSULTAS_TRANSFERENCIA, services.transferir_empresa, self.usuario, equipamento.pk, self.empresas[1].pk,
+        )
+        self.assertIsNone(erro)
+        self.assertEqual(transferencia.empresa_origem, self.empresas[0])
+        self.assertEqual(EventoEquipamento.objects.get(equipamento=equipamento).empresa_destino, self.empresas[1])
+
+    def test_transferir_colaborador(self):
+        equipamento = self.equipamentos[0]
+        erro, transferencia = self.assertConsultas(
+            services.CONSULTAS_TRANSFERENCIA, services.transferir_colaborador, self.usuario, equipamento.pk, self.colaboradores[1].pk,
+        )
+        self.assertIsNone(erro)
+        self.assertEqual(transferencia.colaborador_origem, self.colaboradores[0])
+        self.assertEqual(EventoEquipamento.objects.get(equipamento=equipamento).colaborador_destino, self.colaboradores[1])
+
+    def test_alterar_situacao(self):
+        equipamento = self.equipamentos[0]
+        erro, alteracao = self.assertConsultas(
+            services.CONSULTAS_ALTERACAO_SITUACAO, services.alterar_situacao, self.usuario, equipamento.pk, '2',
+        )
+        self.assertIsNone(erro)
+        self.assertEqual((alteracao.situacao_anterior, alteracao.situacao_nova), ('1', '2'))
+        equipamento.refresh_from_db()
+        self.assertEqual((equipamento.situacao, equipamento.versao), ('2', 2))
+
+    def test_versao_desatualizada(self):
+        equipamento = self.equipamentos[0]
+        with self.assertRaises(VersaoDesatualizada):
+            services.transferir_empresa(self.usuario, equipamento.pk, self.empresas[1].pk, {equipamento.versao + 1})
+        self.assertFalse(EventoEquipamento.objects.filter(equipamento=equipamento).exists())
+
+
+class PermissaoPorAcaoTests(EquipamentoTestCase):
+    def test_head_segue_a_permissao_do_get(self):
+        for url in (
+            '/equipamento/',
+            f'/setor/{self.setor.pk}/equipamentos/',
+            f'/empresa/{self.empresas[0].pk}/equipamentos/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.head(url).status_code, 200)
 
-# Create your tests here.
+    def test_head_sem_permissao(self):
+        usuario = User.objects.create_user('sem_permissao', 'sem_permissao@teste.com', 'senha')
+        self.client.force_authenticate(usuario)
+        self.assertEqual(self.client.head(f'/setor/{self.setor.pk}/equipamentos/').status_code, 403)
@@ -1,8 +1,18 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from .models import Equipamento, TransferenciaEmpresa, TransferenciaColaborador, AlteracaiSituacaoEquipamento, SITUACAO_EQUIPAMENTO_CHOICES
+from .filters import EquipamentoFilter
+from .models import Equipamento, EventoEquipamento
+from .services import (
+    transferir_empresa,
+    transferir_colaborador,
+    alterar_situacao,
+    transferir_empresa_lote,
+    validar_alteracoes_situacao_lote,
+    alterar_situacao_lote,
+)
 from .serializers import (
     EquipamentoSerializer, 
     EquipamentoListSerializer, 
@@ -11,250 +21,297 @@ from .serializers import (
     HistoricoSituacaoEquipamentoSerializer,
     EquipamentoListSimplesSerializer,
     EquipamentoAcessoSerialier,
+    EventoEquipamentoSerializer,
+    CAMPOS_LISTAGEM_VALORES,
+    representar_equipamento_lista,
 )
-from empresa.models import Empresa
-from colaborador.models import Colaborador
-from users.views import (
-    has_permission_to_view_equipamento, 
-    has_permission_to_detail_equipamento, 
-    has_permission_to_edit_equipamento,
-)
+from users.permissions import PermissaoPorAcao
+from api.concorrencia import etag_versao, get_versoes_if_match, verificar_if_match
+from api.mixins import CamposDinamicosViewMixin, campo_corresponde, get_campos_solicitados
+from api.pagination import PaginacaoCursorMixin, HistoricoCursorPagination
+from api.validacao import converter_id, converter_ids
 
 
-class EquipamentoViewSet(viewsets.ModelViewSet):
+class EquipamentoViewSet(CamposDinamicosViewMixin, PaginacaoCursorMixin, viewsets.ModelViewSet):
     """
     ViewSet para manipulação de Equipamentos.
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    filterset_class = EquipamentoFilter
+    # A versão é sempre carregada, mesmo com ?fields=, para montar o ETag
+    campos_obrigatorios = ['versao']
+    permissoes_por_acao = {
+        'list': 'visualizar_equipamento',
+        'retrieve': 'visualiza_detalhe_equipamento',
+        'historico': 'visualiza_detalhe_equipamento',
+        'create': 'editar_equipamento',
+        'update': 'editar_equipamento',
+        'partial_update': 'editar_equipamento',
+        'destroy': 'editar_equipamento',
+        'atualizar_situacao': 'editar_equipamento',
+    }
+    mensagens_permissao = {
+        'list': 'Usuário sem permissão para visualizar equipamentos',
+        'retrieve': 'Usuario sem permissão para visualizar detalhes de um equipamento',
+        'historico': 'Usuario sem permissão para visualizar os detalhes de um equipamento',
+        'create': 'Usuário sem permissão para criar um equipamento',
+        'update': 'Usuário sem permissão para editar equipamentos',
+        'partial_update': 'Usuário sem permissão para editar equipamentos',
+        'destroy': 'Usuário sem permissão para editar equipamentos',
+        'atualizar_situacao': 'Usuário sem permissão para editar um equipamento',
+    }
+
     def get_serializer_class(self):
         if self.action == 'list':
             return EquipamentoListSerializer
         return EquipamentoSerializer
 
     def get_queryset(self):
-        queryset = Equipamento.objects.all()
-        # Filtre o queryset de acordo com as permissoes do usuario
-        if not has_permission_to_view_equipamento(self.request.user):
-            return Equipamento.objects.none()
+        if self.action == 'historico':
+            # O histórico só usa o equipamento para filtrar os eventos, então não precisa dos relacionamentos
+            return Equipamento.objects.all()
+
+        # Carregando os relacionamentos exibidos pelos serializers na mesma consulta
+        queryset = Equipamento.objects.select_related('tipo_equipamento', 'empresa', 'colaborador', 'setor')
+
+        if self.action != 'list':
+            # O detalhe também exibe os usuários de cadastro e da última alteração
+            queryset = queryset.select_related('usuario_cadastro', 'usuario_ultima_alteracao')
         return queryset
 
     def list(self, request, *args, **kwargs):
         """
         Lista de todos os equiopamentos com paginação opcional.
+
+        Com ?paginacao=cursor a listagem é paginada por cursor (ver TagPatrimonioCursorPagination).
         """
         #Acessando o valor do 'page size' na consulta
         page_size = request.query_params.get('page_size')
 
-        if has_permission_to_view_equipamento(request.user):
-            if page_size:
-                #se 'page_size' for especificado, use o valor fornecido
-                self.paginator.page_size = int(page_size)
-            
-            return super().list(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar equipamentos'}, status=status.HTTP_403_FORBIDDEN)
+        if page_size:
+            #se 'page_size' for especificado, use o valor fornecido
+            self.paginator.page_size = int(page_size)
+
+        # Listagem otimizada (?rapido=true): mesma resposta, montada direto das linhas do banco
+        if request.query_params.get('rapido') in ('true', '1'):
+            return self.listar_rapido()
+
+        return super().list(request, *args, **kwargs)
+
+    def listar_rapido(self):
+        """
+        Lista os equipamentos sem instanciar models nem campos do serializer.
+
+        Indicada para páginas grandes (relatórios); a resposta é idêntica à da
+        listagem padrão.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).values(*CAMPOS_LISTAGEM_VALORES)
+        representar = representar_equipamento_lista
+
+        # Com ?fields= ou ?exclude=, mantém apenas as chaves dos campos mantidos no serializer
+        incluir, excluir = get_campos_solicitados(self.request)
+        if incluir or excluir:
+            campos = list(self.get_serializer().fields)
+
+            def representar(linha):
+                return {
+                    chave: valor for chave, valor in representar_equipamento_lista(linha).items()
+                    if any(campo_corresponde(chave, campo) for campo in campos)
+                }
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response([representar(linha) for linha in page])
+
+        return Response([representar(linha) for linha in queryset])
         
     def create(self, request, *args, **kwargs):
-        if has_permission_to_edit_equipamento(request.user):
-            serializer = self.get_serializer(data=request.data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'error':'Usuário sem permissão para criar um equipamento'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = self.get_serializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        equipamento = serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers={'ETag': etag_versao(equipamento.versao)})
     
     # Edição de um equipamento
     def update(self, request, *args, **kwargs):
-        if has_permission_to_edit_equipamento(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance, data=request.data, partial=True, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar equipamentos'}, status=status.HTTP_403_FORBIDDEN)
+        """
+        Edita um equipamento.
+
+        Com o cabeçalho If-Match (ETag retornado no detalhe) a edição só é feita
+        se o equipamento não foi alterado desde então; caso contrário retorna 412.
+        """
+        instance = self.get_object()
+        verificar_if_match(request, instance.versao)
+
+        serializer = self.get_serializer(instance, data=request.data, partial=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK, headers={'ETag': etag_versao(instance.versao)})
 
 
     def atualizar_situacao(self, request, pk=None):
-        if has_permission_to_edit_equipamento(request.user):
-            equipamento = Equipamento.objects.get(pk=pk)
-            nova_situacao = request.data.get('situacao_nova')
-            
-            # Verifica se a situação nova foi informada
-            if nova_situacao is None:
-                return Response({"error":"Você deve fornecer uma nova situação para atualização."},
-                                status=status.HTTP_400_BAD_REQUEST)
-            
-            # Verifica se a nova situação está entre as opções permitidas
-            if nova_situacao not in dict(SITUACAO_EQUIPAMENTO_CHOICES).keys():
-                return Response({"error": "Nova situação inválida."},
-                                status=status.HTTP_400_BAD_REQUEST)
-            
-            # Verifica se a situação nova é diferente da anterior
-            if nova_situacao == equipamento.situacao:
-                return Response({"error": "A nova situação é igual a situação atual"}, 
-                                status=status.HTTP_400_BAD_REQUEST)
-            
-            # Obtendo a situação atual do equipamento
-            situacao_anterior = equipamento.situacao
-
-            # Obtendo o usuario logado
-            usuario_situacao_equipamento = request.user
-            
-            # Adicionando situacao_anterior e o usuario_alteracao ao payload
-            request.data['situacao_anterior'] = situacao_anterior
-            request.data['usuario_situacao_equipamento'] = usuario_situacao_equipamento.id
-
-            # Criando o serializer
-            serializer = HistoricoSituacaoEquipamentoSerializer(data=request.data, context={'request': request})
-
-            if serializer.is_valid():
-                # Salvando a alteracao
-                alteracao = serializer.save(
-                    equipamento=equipamento,
-                )
-                # Atualizando o equiamento com a nova situacao
-                situacao_nova = nova_situacao
-                equipamento.situacao = situacao_nova
-                equipamento.save()
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar um equipamento'}, status=status.HTTP_403_FORBIDDEN)
+        """
+        Altera a situação do equipamento (ver equipamento.services.alterar_situacao).
+
+        Com o cabeçalho If-Match a alteração só é feita se o equipamento não foi
+        alterado desde então; caso contrário retorna 412.
+        """
+        erro, alteracao = alterar_situacao(
+            request.user, pk, request.data.get('situacao_nova'), get_versoes_if_match(request)
+        )
+        if erro:
+            return Response(erro, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = HistoricoSituacaoEquipamentoSerializer(alteracao)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers={'ETag': etag_versao(alteracao.equipamento.versao)})
 
     def retrieve(self, request, *args, **kwargs):
         # Retorna os detalhes de um equipamento sem o historico
-        if has_permission_to_detail_equipamento(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
-        else:
-            return Response({'error': 'Usuario sem permissão para visualizar detalhes de um equipamento'}, status=status.HTTP_403_FORBIDDEN)
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={'ETag': etag_versao(instance.versao)})
 
 class EquipamentoTransferenciaEmpresaView(APIView):
-    def post(self, request, pk):
-        if has_permission_to_edit_equipamento(request.user):
-            equipamento = Equipamento.objects.get(pk=pk)
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'post': 'editar_equipamento'}
+    mensagens_permissao = {'post': 'Usuário sem permissão para editar um equipamento'}
 
-            nova_empresa_id = request.data.get('empresa_destino')
-
-            # Verificando se a empresa de origem é diferente da empresa de destino
-            if nova_empresa_id == equipamento.empresa.id:
-                return Response({'error': 'A empresa de destino é a mesma que a empresa atual do equipamento'},
-                                status=status.HTTP_400_BAD_REQUEST)
-            
-            # Obtendo a empresa de origem do equipamento
-            empresa_origem = equipamento.empresa
+    def post(self, request, pk):
+        """
+        Transfere o equipamento para outra empresa (ver equipamento.services.transferir_empresa).
 
-            # Obtendo o usuario logado
-            usuario_transferencia_empresa = request.user
+        Com o cabeçalho If-Match a transferência só é feita se o equipamento não
+        foi alterado desde então; caso contrário retorna 412.
+        """
+        empresa_destino_id = converter_id(request.data.get('empresa_destino'))
+        if empresa_destino_id is None:
+            return Response({'error': 'O campo empresa_destino deve ser o ID de uma empresa'},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-            # Adicionando empresa_origem e usuario_transferencia_empresa ao payload
-            request.data['empresa_origem'] = empresa_origem.id
-            request.data['usuario_transferencia_empresa'] = usuario_transferencia_empresa.id
+        erro, transferencia = transferir_empresa(request.user, pk, empresa_destino_id, get_versoes_if_match(request))
+        if erro:
+            return Response(erro, status=status.HTTP_400_BAD_REQUEST)
 
-            # Criando o serializer
-            serializer = TransferenciaEmpresaSerializer(data=request.data, context={'request': request})
+        serializer = TransferenciaEmpresaSerializer(transferencia)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers={'ETag': etag_versao(transferencia.equipamento.versao)})
 
-            if serializer.is_valid():
-                # Salvando a transferencia
-                transferencia = serializer.save(
-                    equipamento=equipamento,
-                )
+class EquipamentoTransferenciaEmpresaLoteView(APIView):
+    """
+    Transfere vários equipamentos para outra empresa em uma única requisição.
 
-                # Atualizando o equipamento com a nova empresa
-                nova_empresa = Empresa.objects.get(pk=nova_empresa_id)
-                equipamento.empresa = nova_empresa
-                equipamento.save()
+    Recebe {"empresa_destino": id, "equipamentos": [ids], "tags": [tags de patrimônio]}
+    (equipamentos e tags podem ser usados juntos). Se algum equipamento for
+    inválido nenhum é transferido e os erros são retornados.
+    """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'post': 'editar_equipamento'}
+    mensagens_permissao = {'post': 'Usuário sem permissão para editar um equipamento'}
+
+    def post(self, request):
+        empresa_destino_id = converter_id(request.data.get('empresa_destino'))
+        ids = converter_ids(request.data.get('equipamentos', []))
+        tags = request.data.get('tags', [])
+
+        if empresa_destino_id is None:
+            return Response({'error': 'O campo empresa_destino deve ser o ID de uma empresa'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if ids is None or not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            return Response({'error': 'Os campos equipamentos e tags devem ser listas de IDs e de tags de patrimônio'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not ids and not tags:
+            return Response({'error': 'Informe os equipamentos a transferir'}, status=status.HTTP_400_BAD_REQUEST)
+
+        erros, equipamentos = transferir_empresa_lote(request.user, empresa_destino_id, ids, tags)
+        if erros:
+            return Response({'errors': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        transferidos = [
+            {'id': equipamento.pk, 'tag_patrimonio': equipamento.tag_patrimonio, 'empresa_origem_id': equipamento.empresa_id}
+            for equipamento in equipamentos
+        ]
+        return Response({'empresa_destino_id': empresa_destino_id, 'equipamentos': transferidos},
+                        status=status.HTTP_201_CREATED)
+
+class EquipamentoAtualizarSituacaoLoteView(APIView):
+    """
+    Altera a situação de vários equipamentos em uma única requisição.
 
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar um equipamento'}, status=status.HTTP_403_FORBIDDEN)
+    Recebe {"alteracoes": [{"equipamento": id, "situacao_nova": situação}, {"tag": tag, "situacao_nova": situação}]}.
+    Equipamentos que já estão na situação nova são ignorados. Se alguma
+    alteração for inválida nenhuma é feita e os erros são retornados.
+    """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'post': 'editar_equipamento'}
+    mensagens_permissao = {'post': 'Usuário sem permissão para editar um equipamento'}
+
+    def post(self, request):
+        alteracoes = request.data.get('alteracoes') if isinstance(request.data, dict) else None
+
+        if not isinstance(alteracoes, list) or not alteracoes:
+            return Response({'error': 'O campo alteracoes deve ser uma lista de alterações de situação'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        erros, alteracoes = validar_alteracoes_situacao_lote(alteracoes)
+        if erros:
+            return Response({'errors': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        erros, alterados, ignorados = alterar_situacao_lote(request.user, alteracoes)
+        if erros:
+            return Response({'errors': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'alterados': [
+                {'id': equipamento.pk, 'tag_patrimonio': equipamento.tag_patrimonio,
+                 'situacao_anterior': situacao_anterior, 'situacao_nova': situacao_nova}
+                for equipamento, situacao_anterior, situacao_nova in alterados
+            ],
+            'ignorados': [{'id': equipamento.pk, 'tag_patrimonio': equipamento.tag_patrimonio} for equipamento in ignorados],
+        }, status=status.HTTP_201_CREATED)
 
 class EquipamentoTransferenciaColaboradorView(APIView):
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {'post': 'editar_equipamento'}
+    mensagens_permissao = {'post': 'Usuário sem permissão para editar um equipamento'}
+
     def post(self, request, pk):
-        if has_permission_to_edit_equipamento(request.user):
-            equipamento = Equipamento.objects.get(pk=pk)
-
-            novo_colaborador_id = request.data.get('colaborador_destino')
-
-            # Verificando se o colaborador de origem é diferente do colaborador de destino
-            if novo_colaborador_id == equipamento.colaborador.id:
-                return Response({"error":"O colaborador e destino é o mesmo que o colaborador atual do equipamento"},
-                                status=status.HTTP_400_BAD_REQUEST)
-            
-            # Obtendo o colaborador de origem do equipamento
-            colaborador_origem = equipamento.colaborador
-
-            # Obtendo o usuario logado
-            usuario_transferencia_colaborador = request.user
-
-            # Adicionando o colaborador_origem e o usuario_transferencia_colaborador ao payload
-            request.data['colaborador_origem'] = colaborador_origem.id
-            request.data['usuario_transferencia_colaborador'] = usuario_transferencia_colaborador.id
-            
-            # Criando o serializer            
-            serializer = TransferenciaColaboradorSerializer(data=request.data, context={'request': request})
-
-            
-            if serializer.is_valid():
-                # Salvar a transferencia
-                transferencia = serializer.save(equipamento=equipamento)
-
-                # Atualizando o equipamento com o novo colaborador
-                novo_colaborador = Colaborador.objects.get(pk=novo_colaborador_id)
-                equipamento.colaborador = novo_colaborador
-                equipamento.save()
-
-                return Response(serializer.data, status=status.HTTP_201_CREATED)
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar um equipamento'}, status=status.HTTP_403_FORBIDDEN)
+        """
+        Transfere o equipamento para outro colaborador (ver equipamento.services.transferir_colaborador).
+
+        Com o cabeçalho If-Match a transferência só é feita se o equipamento não
+        foi alterado desde então; caso contrário retorna 412.
+        """
+        colaborador_destino_id = converter_id(request.data.get('colaborador_destino'))
+        if colaborador_destino_id is None:
+            return Response({'error': 'O campo colaborador_destino deve ser o ID de um colaborador'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        erro, transferencia = transferir_colaborador(request.user, pk, colaborador_destino_id, get_versoes_if_match(request))
+        if erro:
+            return Response(erro, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = TransferenciaColaboradorSerializer(transferencia)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers={'ETag': etag_versao(transferencia.equipamento.versao)})
 
 class EquipamentoHistoricoView(EquipamentoViewSet):
     @action(detail=True, methods=['get'])
     def historico(self, request, pk=None):
-        if has_permission_to_detail_equipamento(request.user):
-            instance = self.get_object()
-
-            # Criando a lista de transferencia entre empresas
-            transferencias_empresa = TransferenciaEmpresa.objects.filter(equipamento=instance)
-            transferencias_empresa_serializer = TransferenciaEmpresaSerializer(transferencias_empresa, many=True)
-
-            # Criando a lista de transferencias entre colaboradores
-            transferencias_colaborador = TransferenciaColaborador.objects.filter(equipamento=instance)
-            transferencias_colaborador_serializer = TransferenciaColaboradorSerializer(transferencias_colaborador, many=True)
-
-            # Criando a lista de alteração de situação
-            alteracao_situacao = AlteracaiSituacaoEquipamento.objects.filter(equipamento=instance)
-            alteracao_situacao_serializer = HistoricoSituacaoEquipamentoSerializer(alteracao_situacao, many=True)
-
-            # Juntando todas as listas para montar o historico
-            historico = list(
-                transferencias_empresa_serializer.data +
-                transferencias_colaborador_serializer.data +
-                alteracao_situacao_serializer.data
-            )
-
-            # Adicionando um campo indicando o tipo de transferência
-            for item in historico:
-                if 'empresa_origem_nome' in item:
-                    item['tipo_transferencia'] = 'Transferência entre Empresas'
-                elif 'colaborador_origem_nome' in item:
-                    item['tipo_transferencia'] = 'Transferência entre Colaboradores'
-                else:
-                    item['tipo_transferencia'] = 'Alteração de Situação'
-
-            # Ordenando historico pela 'data_transferencia ou data_alteracao' mais recente primeiro
-            historico_ordenado = sorted(historico, key=lambda x: x.get('data_transferencia', x.get('data_alteracao')), reverse=True)
-
-            response_data = {
-                'historico': historico_ordenado,
-            }
-
-            return Response(response_data)
-        else:
-            return Response({'error': 'Usuario sem permissão para visualizar os detalhes de um equipamento'}, status=status.HTTP_403_FORBIDDEN)
+        """
+        Histórico do equipamento (transferências e alterações de situação), do mais recente para o mais antigo.
+
+        Os eventos vêm ordenados do banco, com os nomes carregados por joins, e
+        são paginados por cursor (ver HistoricoCursorPagination).
+        """
+        instance = self.get_object()
+
+        eventos = EventoEquipamento.objects.filter(equipamento=instance).select_related(
+            'usuario', 'empresa_origem', 'empresa_destino', 'colaborador_origem', 'colaborador_destino'
+        )
+
+        paginator = HistoricoCursorPagination()
+        page = paginator.paginate_queryset(eventos, request, view=self)
+        serializer = EventoEquipamentoSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 class EquipamentoListSimplesViewSet(APIView):
     """ViewSet para listagem simplificada de Equipamentos."""
@@ -1,7 +1,6 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
+from users.permissions import registrar_permissoes
 
 
 class Setor(models.Model):
@@ -31,28 +30,9 @@ class Setor(models.Model):
         ordering = ['id']
 
 
-# Método para criar as permissões após as migrações
-def create_permissions(sender, **kwargs):
-    if sender.name == 'setor':
-        content_type = ContentType.objects.get_for_model(Setor)
-
-        visualizar_setor, created = Permission.objects.get_or_create(
-            codename='visualizar_setor',
-            name='Visualizar setores',
-            content_type=content_type,
-        )
-
-        visualiza_detalhe_setor, created = Permission.objects.get_or_create(
-            codename='visualiza_detalhe_setor',
-            name='Visualizar Detalhes do setor',
-            content_type=content_type,
-        )
-
-        editar_setor, created = Permission.objects.get_or_create(
-            codename='editar_setor',
-            name='Editar setor',
-            content_type=content_type,
-        )
-
-# Conectar o método ao sinal post_migrate
-post_migrate.connect(create_permissions)
\ No newline at end of file
+# Registrando as permissões criadas após as migrações
+registrar_permissoes(Setor, {
+    'visualizar_setor': 'Visualizar setores',
+    'visualiza_detalhe_setor': 'Visualizar Detalhes do setor',
+    'editar_setor': 'Editar setor',
+})
@@ -1,8 +1,7 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
 from tipo_equipamento.models import TipoEquipamento
+from users.permissions import registrar_permissoes
 
 
 
@@ -28,52 +27,14 @@ class Item(models.Model):
     usuario_ultima_alteracao = models.ForeignKey(User, on_delete=models.CASCADE, related_name='item_editado', null=True)
 
 
-
-# Metodo para criar as permissões apos as migracoes
-def create_permissions_categoria(sender, **kwargs):
-    if sender.name == 'suprimentos':
-        content_type = ContentType.objects.get_for_model(Categoria)
-
-        visualizar_categoria, created = Permission.objects.get_or_create(
-            codename = 'visualizar_categoria',
-            name = 'Visualizar Categorias',
-            content_type = content_type,
-        )
-
-        visuaiza_detalhe_categoria, created = Permission.objects.get_or_create(
-            codename = 'visualiza_detalhe_categoria',
-            name = 'Visualizar Detalhes Categoria',
-            content_type = content_type,
-        )
-
-        editar_categoria, created = Permission.objects.get_or_create(
-            codename='editar_categoria',
-            name='Editar Categoria',
-            content_type=content_type,
-        )
-
-def create_permissions_item(sender, **kwargs):
-    if sender.name == 'suprimentos':
-        content_type = ContentType.objects.get_for_model(Item)
-
-        visualizar_item, created = Permission.objects.get_or_create(
-            codename = 'visualizar_item',
-            name = 'Visualizar itens',
-            content_type = content_type,
-        )
-
-        visuaiza_detalhe_item, created = Permission.objects.get_or_create(
-            codename = 'visualiza_detalhe_item',
-            name = 'Visualizar Detalhes item',
-            content_type = content_type,
-        )
-
-        editar_item, created = Permission.objects.get_or_create(
-            codename='editar_item',
-            name='Editar item',
-            content_type=content_type,
-        )
-
-# Conectar  o metodo ao sinal post_migrate
-post_migrate.connect(create_permissions_categoria)
-post_migrate.connect(create_permissions_item)
\ No newline at end of file
+# Registrando as permissões criadas após as migrações
+registrar_permissoes(Categoria, {
+    'visualizar_categoria': 'Visualizar Categorias',
+    'visualiza_detalhe_categoria': 'Visualizar Detalhes Categoria',
+    'editar_categoria': 'Editar Categoria',
+})
+registrar_permissoes(Item, {
+    'visualizar_item': 'Visualizar itens',
+    'visualiza_detalhe_item': 'Visualizar Detalhes item',
+    'editar_item': 'Editar item',
+})
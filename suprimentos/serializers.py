@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.utils import timezone
 from django.contrib.auth.models import User
+from api.mixins import CamposDinamicosSerializerMixin
 from .models import Categoria, Item
 
 # Serializador para listagem de todas as categorias
-class CategoriaListSerializer(serializers.ModelSerializer):
+class CategoriaListSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Categoria
         fields = [
@@ -15,7 +16,7 @@ class CategoriaListSerializer(serializers.ModelSerializer):
         ]
 
 # Serializador para detalhes da categoria
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Categoria
         fields = [
@@ -51,20 +52,23 @@ class CategoriaSerializer(serializers.ModelSerializer):
         representation.pop('usuario_ultima_alteracao', None)
 
         # Adicionando as chaves personalizadas para o tipo_equipamento
-        tipo_equipamentos = instance.tipo_equipamento.all()  # Acessando os objetos relacionados
-        representation['tipo_equipamento'] = [{"id": tipo.id, "tipo": tipo.tipo} for tipo in tipo_equipamentos]
+        if 'tipo_equipamento' in self.fields:
+            tipo_equipamentos = instance.tipo_equipamento.all()  # Acessando os objetos relacionados
+            representation['tipo_equipamento'] = [{"id": tipo.id, "tipo": tipo.tipo} for tipo in tipo_equipamentos]
 
-        # Adicionando as chaves personalizadas para o usuario_cadastro
-        representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
-        representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
+        # Adicionando as chaves personalizadas para o usuario_cadastro (apenas se o campo foi solicitado)
+        if 'usuario_cadastro' in self.fields:
+            representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
+            representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
 
         # Adicionando as chaves personalizadas para o usurio_ultima_alteracao
-        if instance.usuario_ultima_alteracao:
-            representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
-            representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
-        else:
-            representation['usuario_ultima_alteracao_id'] = None
-            representation['usuario_ultima_alteracao_username'] = None
+        if 'usuario_ultima_alteracao' in self.fields:
+            if instance.usuario_ultima_alteracao:
+                representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
+                representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
+            else:
+                representation['usuario_ultima_alteracao_id'] = None
+                representation['usuario_ultima_alteracao_username'] = None
 
         return representation
     
@@ -95,7 +99,7 @@ class CategoriaSerializer(serializers.ModelSerializer):
         return instance
     
 # Serializador para Lisagem de todos os Itens
-class ItemListSerializer(serializers.ModelSerializer):
+class ItemListSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     categoria_id = serializers.SerializerMethodField()
     categoria_nome = serializers.SerializerMethodField()
 
@@ -123,7 +127,7 @@ class ItemListSerializer(serializers.ModelSerializer):
 
 
 # Serializador para detalhe dos Itens
-class ItemSerializer(serializers.ModelSerializer):
+class ItemSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Item
         fields = [
@@ -159,20 +163,23 @@ class ItemSerializer(serializers.ModelSerializer):
         representation.pop('usuario_ultima_alteracao', None)
 
         # Adicionando as chaves personalizadas para a categoria
-        representation['categoria_id'] = instance.categoria.id
-        representation['categoria_nome'] = instance.categoria.nome
+        if 'categoria' in self.fields:
+            representation['categoria_id'] = instance.categoria.id
+            representation['categoria_nome'] = instance.categoria.nome
 
-        # Adicionando as chaves personalizadas para o usuario_cadastro
-        representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
-        representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
+        # Adicionando as chaves personalizadas para o usuario_cadastro (apenas se o campo foi solicitado)
+        if 'usuario_cadastro' in self.fields:
+            representation['usuario_cadastro_id'] = instance.usuario_cadastro.id
+            representation['usuario_cadastro_username'] = instance.usuario_cadastro.username
 
         # Adicionando as chaves personalizadas para o usurio_ultima_alteracao
-        if instance.usuario_ultima_alteracao:
-            representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
-            representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
-        else:
-            representation['usuario_ultima_alteracao_id'] = None
-            representation['usuario_ultima_alteracao_username'] = None
+        if 'usuario_ultima_alteracao' in self.fields:
+            if instance.usuario_ultima_alteracao:
+                representation['usuario_ultima_alteracao_id'] = instance.usuario_ultima_alteracao.id
+                representation['usuario_ultima_alteracao_username'] = instance.usuario_ultima_alteracao.username
+            else:
+                representation['usuario_ultima_alteracao_id'] = None
+                representation['usuario_ultima_alteracao_username'] = None
 
         return representation
 
@@ -1,33 +1,42 @@
 from rest_framework import viewsets, status
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .serializers import CategoriaSerializer, CategoriaListSerializer, ItemListSerializer, ItemSerializer
 from .models import Categoria, Item
-from users.views import (
-        has_permission_to_detail_categoria, 
-        has_permission_to_edit_categoria, 
-        has_permission_to_view_categoria,
-        has_permission_to_detail_item,
-        has_permission_to_edit_item,
-        has_permission_to_view_item,
-    )
+from users.permissions import PermissaoPorAcao
+from api.mixins import CamposDinamicosViewMixin
 
 
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     Viewset para manipulação de Categorias
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {
+        'list': 'visualizar_categoria',
+        'retrieve': 'visualiza_detalhe_categoria',
+        'create': 'editar_categoria',
+        'update': 'editar_categoria',
+        'partial_update': 'editar_categoria',
+        'destroy': 'editar_categoria',
+    }
+    mensagens_permissao = {
+        'list': 'Usuário sem permissão para visualizar categorias',
+        'retrieve': 'Usuário sem permissão para visualizar os detalhes da categoria',
+        'create': 'Usuário sem permissão para criar uma categoria',
+        'update': 'Usuário sem permissão para editar uma categoria',
+        'partial_update': 'Usuário sem permissão para editar uma categoria',
+        'destroy': 'Usuário sem permissão para editar uma categoria',
+    }
+
     def get_serializer_class(self):
         if self.action == 'list':
             return CategoriaListSerializer
         return CategoriaSerializer
     
     def get_queryset(self):
-        queryset = Categoria.objects.all()
-        # Filtre de acordo com as permissões do usuário
-        if not has_permission_to_view_categoria(self.request.user):
-            return Categoria.objects.none()
-        return queryset
+        return Categoria.objects.all()
     
     def list(self, request, *args, **kwargs):
         """
@@ -36,110 +45,109 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         # Acessando o valor do 'page size' na consulta
         page_size = request.query_params.get('page_size')
 
-        if has_permission_to_view_categoria(request.user):
-            if page_size:
-                # Se 'page_size' for especificado, use o valor fornecido
-                self.paginator.page_size = int(page_size)
-            return super().list(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar categorias'}, status=status.HTTP_403_FORBIDDEN)
+        if page_size:
+            # Se 'page_size' for especificado, use o valor fornecido
+            self.paginator.page_size = int(page_size)
+        return super().list(request, *args, **kwargs)
             
     def create(self, request, *args, **kwargs):
         user = request.user
-        if has_permission_to_edit_categoria(user):
-            # Certifique-se de que o campo tipo_equipamento esteja presente nos dados da solicitação
-            if 'tipo_equipamento' not in request.data:
-                return Response({'error': 'O campo tipo_equipamento é obrigatório.'}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Copie e trate os dados da solicitação
-            data = request.data.copy()
-            data['usuario_cadastro'] = user.id
-            
-            tipo_equipamento_ids = data.pop('tipo_equipamento')  # Remova e armazene os IDs do tipo de equipamento
+        # Certifique-se de que o campo tipo_equipamento esteja presente nos dados da solicitação
+        if 'tipo_equipamento' not in request.data:
+            return Response({'error': 'O campo tipo_equipamento é obrigatório.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Remova temporariamente o campo tipo_equipamento do serializer durante a criação
-            class CustomSerializer(self.get_serializer_class()):
-                def __init__(self, *args, **kwargs):
-                    super().__init__(*args, **kwargs)
-                    self.fields['tipo_equipamento'].required = False
+        # Copie e trate os dados da solicitação
+        data = request.data.copy()
+        data['usuario_cadastro'] = user.id
+        
+        tipo_equipamento_ids = data.pop('tipo_equipamento')  # Remova e armazene os IDs do tipo de equipamento
 
-            serializer = CustomSerializer(data=data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
+        # Remova temporariamente o campo tipo_equipamento do serializer durante a criação
+        class CustomSerializer(self.get_serializer_class()):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields['tipo_equipamento'].required = False
 
-            # Antes de salvar a instância, crie-a para poder adicionar os tipos de equipamento
-            instance = serializer.save()
+        serializer = CustomSerializer(data=data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
 
-            # Adicione os tipos de equipamento à instância criada
-            instance.tipo_equipamento.set(tipo_equipamento_ids)
+        # Antes de salvar a instância, crie-a para poder adicionar os tipos de equipamento
+        instance = serializer.save()
 
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'error': 'Usuário sem permissão para criar uma categoria'}, status=status.HTTP_403_FORBIDDEN)
+        # Adicione os tipos de equipamento à instância criada
+        instance.tipo_equipamento.set(tipo_equipamento_ids)
 
-    def update(self, request, *args, **kwargs):
-        if has_permission_to_edit_categoria(request.user):
-            instance = self.get_object()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-            # Extrai os IDs do tipo de equipamento, se estiverem presentes
-            tipo_equipamento_ids = request.data.pop('tipo_equipamento', [])
+    def update(self, request, *args, **kwargs):
+        instance = self.get_object()
 
-            # Adicione 'usuario_cadastro' aos dados enviados para o serializer
-            request.data['usuario_cadastro'] = request.user.id
+        # Extrai os IDs do tipo de equipamento, se estiverem presentes
+        tipo_equipamento_ids = request.data.pop('tipo_equipamento', [])
 
-            # Remova temporariamente a obrigatoriedade do campo tipo_equipamento
-            class CustomSerializer(self.get_serializer_class()):
-                def __init__(self, *args, **kwargs):
-                    super().__init__(*args, **kwargs)
-                    self.fields['tipo_equipamento'].required = False
+        # Adicione 'usuario_cadastro' aos dados enviados para o serializer
+        request.data['usuario_cadastro'] = request.user.id
 
-            serializer = CustomSerializer(instance, data=request.data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
+        # Remova temporariamente a obrigatoriedade do campo tipo_equipamento
+        class CustomSerializer(self.get_serializer_class()):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.fields['tipo_equipamento'].required = False
 
-            # Atualize os tipos de equipamento da instância apenas se houver IDs de tipo de equipamento
-            if tipo_equipamento_ids:
-                instance.tipo_equipamento.set(tipo_equipamento_ids)
-            else:
-                instance.tipo_equipamento.clear()  # Limpa os tipos de equipamento, se não houver IDs fornecidos
+        serializer = CustomSerializer(instance, data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
 
-            return Response(serializer.data)
+        # Atualize os tipos de equipamento da instância apenas se houver IDs de tipo de equipamento
+        if tipo_equipamento_ids:
+            instance.tipo_equipamento.set(tipo_equipamento_ids)
         else:
-            return Response({'error': 'Usuário sem permissão para editar uma categoria'}, status=status.HTTP_403_FORBIDDEN)
+            instance.tipo_equipamento.clear()  # Limpa os tipos de equipamento, se não houver IDs fornecidos
+
+        return Response(serializer.data)
 
     def partial_update(self, request, *args, **kwargs):
         # Atualiza parcialmente uma categoria
-        if has_permission_to_edit_categoria(request.user):
-            kwargs['partial'] = True
-            return self.update(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar uma categoria'}, status=status.HTTP_403_FORBIDDEN)
+        kwargs['partial'] = True
+        return self.update(request, *args, **kwargs)
         
     def retrieve(self, request, *args, **kwargs):
         """
         Retorna os dados de uma categoria sem os itens associados
         """
-        if has_permission_to_detail_categoria(request.user):
-            instance = self.get_object()
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data)
-        else:
-            return Response({'error': "Usuário sem permissão para visualizar os detalhes da categoria"})
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
 
-class ItemViewSet(viewsets.ModelViewSet):
+class ItemViewSet(CamposDinamicosViewMixin, viewsets.ModelViewSet):
     """
     Viewset para manipulação de Itens
     """
+    permission_classes = [IsAuthenticated, PermissaoPorAcao]
+    permissoes_por_acao = {
+        'list': 'visualizar_item',
+        'retrieve': 'visualiza_detalhe_item',
+        'create': 'editar_item',
+        'update': 'editar_item',
+        'partial_update': 'editar_item',
+        'destroy': 'editar_item',
+    }
+    mensagens_permissao = {
+        'list': 'Usuário sem permissão para visualizar os itens',
+        'retrieve': 'Usuário sem permissão para visualizar os detalhes do item',
+        'create': 'Usuário sem permissão para cadastrar um item',
+        'update': 'Usuário sem permissão para editar um item',
+        'partial_update': 'Usuário sem permissão para editar um item',
+        'destroy': 'Usuário sem permissão para editar um item',
+    }
+
     def get_serializer_class(self):
         if self.action == 'list':
             return ItemListSerializer
         return ItemSerializer
 
     def get_queryset(self):
-        queryset = Item.objects.all()
-        # Filtre de acordo com as permissões do usuário
-        if not has_permission_to_view_item(self.request.user):
-            return Item.objects.none()
-        return queryset
+        return Item.objects.all()
 
     def list(self, request, *args, **kwargs):
         """
@@ -148,43 +156,34 @@ class ItemViewSet(viewsets.ModelViewSet):
         # Acessando o valor do 'page size' na consulta
         page_size = request.query_params.get('page_size')
 
-        if has_permission_to_view_item(request.user):
-            if page_size:
-                # Se 'page_size' for especificado, use o valor fornecido
-                self.paginator.page_size = int(page_size)
-            return super().list(request, *args, **kwargs)
-        else:
-            return Response({'error': 'Usuário sem permissão para visualizar os itens'}, status=status.HTTP_403_FORBIDDEN)
+        if page_size:
+            # Se 'page_size' for especificado, use o valor fornecido
+            self.paginator.page_size = int(page_size)
+        return super().list(request, *args, **kwargs)
 
     def create(self, request, *args, **kwargs):
         user = request.user
-        if has_permission_to_edit_item(user):
 
-            # Copiando e tratando os dados da solicitação
-            data = request.data.copy()
-            data['usuario_cadastro'] = user.id
+        # Copiando e tratando os dados da solicitação
+        data = request.data.copy()
+        data['usuario_cadastro'] = user.id
 
-            serializer = self.get_serializer(data=data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-        else:
-            return Response({'error': 'Usuário sem permissão para cadastrar um item'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = self.get_serializer(data=data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
-        if has_permission_to_edit_item(request.user):
-            instance = self.get_object()
-            
-            # Copie e trate os dados da solicitação
-            data = request.data.copy()
-            data['usuario_cadastro'] = instance.usuario_cadastro_id
-            
-            serializer = self.get_serializer(instance, data=data, context={'request': request})
-            serializer.is_valid(raise_exception=True)
-            serializer.save()
-            return Response(serializer.data)
-        else:
-            return Response({'error': 'Usuário sem permissão para editar um item'}, status=status.HTTP_403_FORBIDDEN)
+        instance = self.get_object()
+        
+        # Copie e trate os dados da solicitação
+        data = request.data.copy()
+        data['usuario_cadastro'] = instance.usuario_cadastro_id
+        
+        serializer = self.get_serializer(instance, data=data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
 
 
 
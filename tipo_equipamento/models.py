@@ -1,7 +1,6 @@
 from django.db import models
-from django.db.models.signals import post_migrate
-from django.contrib.auth.models import Permission, User
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
+from users.permissions import registrar_permissoes
 
 # Criando models do Tipo de Equipamento
 
@@ -31,28 +30,9 @@ class TipoEquipamento(models.Model):
         ordering = ['id']
 
 
-# Método para criar as permissões após as migrações
-def create_permissions(sender, **kwargs):
-    if sender.name == 'tipo_equipamento':
-        content_type = ContentType.objects.get_for_model(TipoEquipamento)
-
-        visualizar_tipo_equipamento, created = Permission.objects.get_or_create(
-            codename='visualizar_tipo_equipamento',
-            name='Visualizar Tipos de Equipamentos',
-            content_type=content_type,
-        )
-
-        visualiza_detalhe_tipo_equipamento, created = Permission.objects.get_or_create(
-            codename='visualiza_detalhe_tipo_equipamento',
-            name='Visualizar Detalhes do Tipo de Equipamento',
-            content_type=content_type,
-        )
-
-        editar_tipo_equipamento, created = Permission.objects.get_or_create(
-            codename='editar_tipo_equipamento',
-            name='Editar Tipo de Equipamento',
-            content_type=content_type,
-        )
-
-# Conectar o método ao sinal post_migrate
-post_migrate.connect(create_permissions)
\ No newline at end of file
+# Registrando as permissões criadas após as migrações
+registrar_permissoes(TipoEquipamento, {
+    'visualizar_tipo_equipamento': 'Visualizar Tipos de Equipamentos',
+    'visualiza_detalhe_tipo_equipamento': 'Visualizar Detalhes do Tipo de Equipamento',
+    'editar_tipo_equipamento': 'Editar Tipo de Equipamento',
+})
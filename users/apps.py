@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from .permissions import criar_permissoes_registradas
+        from . import checks  # noqa: F401 (registra as verificações do app)
+
+        # Um único receptor cria as permissões registradas por todos os apps após as migrações
+        post_migrate.connect(criar_permissoes_registradas, sender=self)
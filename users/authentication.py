@@ -0,0 +1,161 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from users.permissions import ATRIBUTO_CACHE_PERMISSOES, get_versao_permissoes
+from users.tokens import CLAIM_PERMISSOES, CLAIM_PERMISSOES_VERSAO
+
+
+class UsuarioToken(TokenUser):
+    """
+    Usuário leve montado a partir das claims do token de acesso, sem consulta ao banco.
+    """
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    def __eq__(self, other):
+        # Permite comparar com instâncias de User, como nas verificações de "próprio usuário"
+        if isinstance(other, (TokenUser, User)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __ne__(self, other):
+        igual = self.__eq__(other)
+        if igual is NotImplemented:
+            return igual
+        return not igual
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class JWTPermissoesAuthentication(JWTAuthentication):
+    """
+    Autenticação JWT que aproveita as permissões embarcadas no token de acesso.
+
+    Tokens sem as claims de permissões são tratados como na JWTAuthentication
+    padrão. Se a versão das permissões do usuário mudou desde a emissão do
+    token (grupos ou permissões alterados, usuário desativado ou excluído), o
+    usuário e as suas permissões são carregados do banco, como num token sem
+    as claims. Caso contrário, requisições de leitura recebem um UsuarioToken
+    (sem consultar o banco) e requisições de escrita recebem o usuário do
+    banco com as permissões já preenchidas.
+    """
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if CLAIM_PERMISSOES not in validated_token:
+            return super().get_user(validated_token)
+
+        user_id = validated_token.get(jwt_settings.USER_ID_CLAIM)
+        if validated_token.get(CLAIM_PERMISSOES_VERSAO) != get_versao_permissoes(user_id):
+            return super().get_user(validated_token)
+
+        if self.request.method in SAFE_METHODS:
+            user = UsuarioToken(validated_token)
+        else:
+            user = super().get_user(validated_token)
+
+        setattr(user, ATRIBUTO_CACHE_PERMISSOES, frozenset(validated_token[CLAIM_PERMISSOES]))
+        return user
+
+
+class CacheCredenciais:
+    """
+    LRU limitado, com expiração, das credenciais Basic já verificadas neste processo.
+
+    As credenciais nunca são guardadas em texto puro: a chave é um HMAC-SHA256
+    de usuário e senha com a SECRET_KEY. Cada entrada guarda o id do usuário e o
+    hash da senha vigente no momento da verificação.
+    """
+    def __init__(self, max_itens, timeout):
+        self.max_itens = max_itens
+        self.timeout = timeout
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def chave(self, userid, password):
+        mensagem = f'{userid}\0{password}'.encode()
+        return hmac.new(settings.SECRET_KEY.encode(), mensagem, hashlib.sha256).digest()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            if item[2] < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return item
+
+    def adicionar(self, chave, user):
+        with self._lock:
+            self._itens[chave] = (user.pk, user.password, time.monotonic() + self.timeout)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._itens.pop(chave, None)
+
+    def invalidar_usuario(self, user_id):
+        with self._lock:
+            for chave in [chave for chave, item in self._itens.items() if item[0] == user_id]:
+                del self._itens[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+
+
+cache_credenciais = CacheCredenciais(
+    max_itens=settings.BASIC_AUTH_CACHE_MAX_ITENS,
+    timeout=settings.BASIC_AUTH_CACHE_TIMEOUT,
+)
+
+
+def invalidar_credenciais_usuario(user_id):
+    """
+    Remove do cache as credenciais Basic verificadas de um usuário.
+    """
+    cache_credenciais.invalidar_usuario(user_id)
+
+
+class BasicAuthenticationCache(BasicAuthentication):
+    """
+    BasicAuthentication que não recalcula o hash da senha para credenciais já verificadas.
+
+    Em um acerto do cache o usuário ainda é carregado do banco (uma consulta
+    pela chave primária), e a entrada só é aceita se o usuário continuar ativo
+    e com o mesmo username e hash de senha. Assim, uma troca de senha ou de
+    username feita em qualquer processo invalida a entrada.
+    """
+    def authenticate_credentials(self, userid, password, request=None):
+        chave = cache_credenciais.chave(userid, password)
+        item = cache_credenciais.get(chave)
+
+        if item is not None:
+            user_id, hash_senha, _ = item
+            user = User.objects.filter(pk=user_id, is_active=True).first()
+            if user is not None and user.password == hash_senha and user.get_username() == userid:
+                return (user, None)
+            cache_credenciais.remover(chave)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache_credenciais.adicionar(chave, user)
+        return (user, auth)
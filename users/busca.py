@@ -0,0 +1,38 @@
+import re
+import unicodedata
+
+
+# Tamanho máximo de um termo de busca (mesmo tamanho do campo TermoBuscaUsuario.termo)
+TAMANHO_MAXIMO_TERMO = 150
+
+
+def normalizar_termo(texto):
+    """
+    Normaliza um texto para a busca: minúsculas, sem acentos e sem espaços nas pontas.
+    """
+    texto = unicodedata.normalize('NFKD', texto or '')
+    texto = ''.join(caractere for caractere in texto if not unicodedata.combining(caractere))
+    return texto.strip().lower()
+
+
+def termos_busca_usuario(user):
+    """
+    Retorna o conjunto de termos normalizados pelos quais o usuário pode ser encontrado.
+
+    São o username, o e-mail (completo e a parte antes do @), o nome completo e
+    cada palavra do nome, para que a busca por início de termo encontre o
+    usuário por qualquer um deles.
+    """
+    email = normalizar_termo(user.email)
+    nome_completo = normalizar_termo(f'{user.first_name} {user.last_name}')
+
+    termos = {normalizar_termo(user.username), email, email.split('@')[0], nome_completo}
+    termos.update(re.split(r'\s+', nome_completo))
+    return {termo[:TAMANHO_MAXIMO_TERMO] for termo in termos if termo}
+
+
+def palavras_busca(texto):
+    """
+    Separa o texto buscado em palavras normalizadas.
+    """
+    return [palavra[:TAMANHO_MAXIMO_TERMO] for palavra in normalizar_termo(texto).split()]
@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+
+# Backends de cache que não são compartilhados entre os processos do servidor
+CACHES_POR_PROCESSO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def verificar_cache_permissoes_no_token(app_configs, **kwargs):
+    """
+    Avisa quando as permissões vão no token mas o cache não é compartilhado entre os processos.
+
+    A versão das permissões de cada usuário fica no cache; com um cache por
+    processo, cada processo tem a sua versão e a invalidação feita em um
+    processo não alcança os demais.
+    """
+    if not settings.JWT_PERMISSOES_NO_TOKEN:
+        return []
+
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend not in CACHES_POR_PROCESSO:
+        return []
+
+    return [Warning(
+        'JWT_PERMISSOES_NO_TOKEN está ativado com um cache que não é compartilhado entre os processos.',
+        hint='Configure em CACHES um cache compartilhado (ex.: Redis ou Memcached).',
+        obj=backend,
+        id='users.W001',
+    )]
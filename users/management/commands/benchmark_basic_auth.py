@@ -0,0 +1,54 @@
+import base64
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authentication import BasicAuthentication
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from users.authentication import BasicAuthenticationCache, cache_credenciais
+
+
+class Command(BaseCommand):
+    help = 'Compara as requisições por segundo da autenticação Basic com e sem o cache de credenciais'
+
+    def add_arguments(self, parser):
+        parser.add_argument('usuario', help='Username de um usuário ativo')
+        parser.add_argument('senha', help='Senha do usuário')
+        parser.add_argument('--requisicoes', type=int, default=200, help='Quantidade de requisições por cenário')
+
+    def handle(self, *args, **options):
+        credenciais = base64.b64encode(f"{options['usuario']}:{options['senha']}".encode()).decode()
+        factory = APIRequestFactory()
+        requisicoes = options['requisicoes']
+
+        resultados = {}
+        for nome, autenticacao in (('sem cache', BasicAuthentication), ('com cache', BasicAuthenticationCache)):
+            view = self.criar_view(autenticacao)
+            cache_credenciais.limpar()
+
+            inicio = time.perf_counter()
+            for _ in range(requisicoes):
+                request = factory.get('/', HTTP_AUTHORIZATION=f'Basic {credenciais}')
+                response = view(request)
+                if response.status_code != 200:
+                    raise CommandError('Credenciais inválidas')
+            duracao = time.perf_counter() - inicio
+
+            resultados[nome] = requisicoes / duracao
+            self.stdout.write(f'{nome}: {resultados[nome]:.1f} req/s ({duracao * 1000 / requisicoes:.2f} ms por requisição)')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ganho com o cache: {resultados['com cache'] / resultados['sem cache']:.1f}x"
+        ))
+
+    def criar_view(self, autenticacao):
+        class View(APIView):
+            authentication_classes = [autenticacao]
+            permission_classes = [IsAuthenticated]
+
+            def get(self, request):
+                return Response({'username': request.user.username})
+
+        return View.as_view()
@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from users.models import EmailPendente
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails da fila em lotes, reutilizando uma única conexão SMTP'
+
+    # Tempo que um lote fica reservado para este processo; se o processo parar, os e-mails voltam para a fila depois dele
+    reserva = timedelta(minutes=10)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=50, help='Quantidade de e-mails enviados por lote')
+        parser.add_argument('--max-tentativas', type=int, default=5, help='Tentativas antes de marcar o e-mail como falho')
+        parser.add_argument('--espera-base', type=int, default=60, help='Espera, em segundos, antes da primeira nova tentativa (dobra a cada falha)')
+        parser.add_argument('--espera-maxima', type=int, default=3600, help='Espera máxima, em segundos, entre tentativas')
+        parser.add_argument('--loop', action='store_true', help='Continua aguardando novos e-mails em vez de terminar quando a fila esvaziar')
+        parser.add_argument('--intervalo', type=float, default=5, help='Intervalo, em segundos, entre as verificações da fila no modo --loop')
+
+    def handle(self, *args, **options):
+        self.options = options
+        enviados = falhas = 0
+        conexao = get_connection()
+
+        try:
+            while True:
+                emails = self.reservar_lote(options['lote'])
+
+                if not emails:
+                    if not options['loop']:
+                        break
+                    conexao.close()
+                    time.sleep(options['intervalo'])
+                    continue
+
+                lote_enviados, lote_falhas = self.enviar_lote(conexao, emails)
+                enviados += lote_enviados
+                falhas += lote_falhas
+        except KeyboardInterrupt:
+            pass
+        finally:
+            conexao.close()
+
+        self.stdout.write(self.style.SUCCESS(f'{enviados} e-mails enviados, {falhas} falhas'))
+
+    def reservar_lote(self, quantidade):
+        """
+        Reserva os próximos e-mails pendentes adiando a próxima tentativa, para que outro processo não os envie também.
+        """
+        agora = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                EmailPendente.objects.select_for_update(skip_locked=True)
+                .filter(situacao='0', proxima_tentativa__lte=agora)
+                .order_by('proxima_tentativa', 'id')[:quantidade]
+            )
+            if emails:
+                EmailPendente.objects.filter(pk__in=[email.pk for email in emails]).update(proxima_tentativa=agora + self.reserva)
+        return emails
+
+    def enviar_lote(self, conexao, emails):
+        enviados = falhas = 0
+
+        for email in emails:
+            mensagem = EmailMessage(
+                email.assunto, email.mensagem, email.remetente, email.destinatarios, connection=conexao
+            )
+            try:
+                conexao.open()
+                mensagem.send()
+            except Exception as e:
+                # A conexão pode ter ficado inválida; ela é reaberta no próximo envio
+                conexao.close()
+                self.registrar_falha(email, e)
+                falhas += 1
+            else:
+                email.situacao = '1'
+                email.data_envio = timezone.now()
+                email.erro = ''
+                enviados += 1
+
+        EmailPendente.objects.bulk_update(emails, ['situacao', 'tentativas', 'proxima_tentativa', 'erro', 'data_envio'])
+        return enviados, falhas
+
+    def registrar_falha(self, email, erro):
+        email.tentativas += 1
+        email.erro = str(erro)
+
+        if email.tentativas >= self.options['max_tentativas']:
+            email.situacao = '2'
+            self.stderr.write(f'E-mail {email.pk} descartado após {email.tentativas} tentativas: {erro}')
+        else:
+            # Espera exponencial entre as tentativas
+            espera = min(self.options['espera_base'] * 2 ** (email.tentativas - 1), self.options['espera_maxima'])
+            email.proxima_tentativa = timezone.now() + timedelta(seconds=espera)
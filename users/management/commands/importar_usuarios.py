@@ -0,0 +1,60 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from users.services import criar_usuarios_lote, validar_usuarios_lote
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa usuários de um arquivo CSV com as colunas username, email, password, is_admin e groups '
+        '(IDs dos grupos separados por ";")'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Caminho do arquivo CSV')
+        parser.add_argument('--processos', type=int, default=None, help='Quantidade de processos para gerar os hashes das senhas')
+        parser.add_argument('--delimitador', default=',', help='Delimitador das colunas do CSV')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['arquivo'], newline='', encoding='utf-8-sig') as arquivo:
+                linhas = list(csv.DictReader(arquivo, delimiter=options['delimitador']))
+        except OSError as e:
+            raise CommandError(f'Não foi possível ler o arquivo: {e}')
+
+        if not linhas:
+            raise CommandError('O arquivo não possui usuários')
+
+        usuarios = [self.converter_linha(numero, linha) for numero, linha in enumerate(linhas, start=2)]
+
+        erros, usuarios = validar_usuarios_lote(usuarios)
+        if erros:
+            for erro in erros:
+                # O índice do lote é convertido para a linha do arquivo (a linha 1 é o cabeçalho)
+                self.stderr.write(f"Linha {erro['indice'] + 2}: {erro['error']}")
+            raise CommandError('Nenhum usuário foi importado')
+
+        criados, estatisticas = criar_usuarios_lote(usuarios, options['processos'])
+
+        self.stdout.write(
+            f"Hash das senhas: {estatisticas['tempo_hash']}s | "
+            f"Gravação: {estatisticas['tempo_gravacao']}s | "
+            f"Total: {estatisticas['tempo_total']}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(criados)} usuários importados ({estatisticas['usuarios_por_segundo']} usuários/s)"
+        ))
+
+    def converter_linha(self, numero, linha):
+        try:
+            grupos = [int(grupo) for grupo in (linha.get('groups') or '').split(';') if grupo.strip()]
+        except ValueError:
+            raise CommandError(f'Linha {numero}: a coluna groups deve conter IDs numéricos separados por ";"')
+
+        return {
+            'username': (linha.get('username') or '').strip(),
+            'email': (linha.get('email') or '').strip(),
+            'password': linha.get('password') or '',
+            'is_admin': (linha.get('is_admin') or '').strip().lower() in ('1', 'true', 'sim', 's'),
+            'groups': grupos,
+        }
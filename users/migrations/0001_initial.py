@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:51
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPendente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assunto', models.CharField(max_length=255)),
+                ('mensagem', models.TextField()),
+                ('remetente', models.CharField(max_length=254)),
+                ('destinatarios', models.JSONField()),
+                ('situacao', models.CharField(choices=[('0', 'Pendente'), ('1', 'Enviado'), ('2', 'Falhou')], default='0', max_length=1)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('erro', models.TextField(blank=True, default='')),
+                ('data_cadastro', models.DateTimeField(auto_now_add=True)),
+                ('data_envio', models.DateTimeField(default=None, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['situacao', 'proxima_tentativa'], name='users_email_situaca_a7017b_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-18 07:53
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from users.busca import termos_busca_usuario
+
+
+def indexar_usuarios_existentes(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    TermoBuscaUsuario = apps.get_model('users', 'TermoBuscaUsuario')
+
+    usuarios = User.objects.only('username', 'email', 'first_name', 'last_name').iterator(chunk_size=1000)
+    termos = []
+    for user in usuarios:
+        termos.extend(TermoBuscaUsuario(usuario_id=user.pk, termo=termo) for termo in termos_busca_usuario(user))
+        if len(termos) >= 5000:
+            TermoBuscaUsuario.objects.bulk_create(termos)
+            termos = []
+    TermoBuscaUsuario.objects.bulk_create(termos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TermoBuscaUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termo', models.CharField(db_index=True, max_length=150)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='termos_busca', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='termobuscausuario',
+            constraint=models.UniqueConstraint(fields=('usuario', 'termo'), name='unique_termo_busca_usuario'),
+        ),
+        migrations.RunPython(indexar_usuarios_existentes, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,172 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.contrib.auth.models import User, Group, Permission
+from .busca import termos_busca_usuario
+from .permissions import invalidar_permissoes_usuarios
 
 # Create your models here.
+
+# Choices para situação dos e-mails da fila de envio
+SITUACAO_EMAIL_CHOICES = (
+    ('0', 'Pendente'),
+    ('1', 'Enviado'),
+    ('2', 'Falhou'),
+)
+
+class EmailPendente(models.Model):
+    """
+    Fila de e-mails a enviar.
+
+    As requisições apenas gravam o e-mail aqui; o envio é feito pelo comando
+    enviar_emails, fora do ciclo da requisição.
+    """
+    assunto = models.CharField(max_length=255)
+    mensagem = models.TextField()
+    remetente = models.CharField(max_length=254)
+    destinatarios = models.JSONField()
+    situacao = models.CharField(max_length=1, choices=SITUACAO_EMAIL_CHOICES, default='0')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    erro = models.TextField(blank=True, default='')
+    data_cadastro = models.DateTimeField(auto_now_add=True)
+    data_envio = models.DateTimeField(null=True, default=None)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['situacao', 'proxima_tentativa']),
+        ]
+
+    def __str__(self):
+        return self.assunto
+
+
+class TermoBuscaUsuario(models.Model):
+    """
+    Termos normalizados (sem acentos e em minúsculas) pelos quais um usuário pode ser buscado.
+
+    Mantidos pelo sinal post_save de User; o índice em `termo` permite a busca
+    por início de termo sem percorrer a tabela de usuários.
+    """
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='termos_busca')
+    termo = models.CharField(max_length=150, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'termo'], name='unique_termo_busca_usuario'),
+        ]
+
+    def __str__(self):
+        return self.termo
+
+
+def indexar_usuarios(usuarios):
+    """
+    Regrava os termos de busca dos usuários informados com uma exclusão e um bulk_create.
+    """
+    TermoBuscaUsuario.objects.filter(usuario__in=[user.pk for user in usuarios]).delete()
+    TermoBuscaUsuario.objects.bulk_create([
+        TermoBuscaUsuario(usuario_id=user.pk, termo=termo)
+        for user in usuarios
+        for termo in termos_busca_usuario(user)
+    ])
+
+
+# Campos de User usados nos termos de busca
+CAMPOS_BUSCA_USUARIO = {'username', 'email', 'first_name', 'last_name'}
+
+# Método para atualizar os termos de busca quando um usuário for salvo
+def atualizar_termos_busca_usuario(sender, instance, raw=False, update_fields=None, **kwargs):
+    # Salvamentos que não alteram os campos da busca (como o last_login no login) não precisam reindexar
+    if raw or (update_fields is not None and not CAMPOS_BUSCA_USUARIO.intersection(update_fields)):
+        return
+    indexar_usuarios([instance])
+
+# Conectar o método ao sinal post_save de User
+post_save.connect(atualizar_termos_busca_usuario, sender=User)
+
+
+def agendar_invalidacao_permissoes(user_ids):
+    """
+    Invalida as permissões em cache dos usuários após o commit da transação atual.
+
+    Invalidar antes do commit permitiria que outra requisição gravasse no cache
+    as permissões antigas, ainda visíveis, com a nova versão.
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        transaction.on_commit(lambda: invalidar_permissoes_usuarios(user_ids))
+
+
+def usuarios_dos_grupos(grupos_ids):
+    return User.objects.filter(groups__in=grupos_ids).values_list('pk', flat=True).distinct()
+
+
+# Método para invalidar as permissões dos usuários afetados quando os grupos de um usuário forem alterados
+def invalidar_permissoes_usuario_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            agendar_invalidacao_permissoes([instance.pk])
+    elif action == 'pre_clear':
+        # Alteração feita pelo grupo (grupo.user_set); os usuários são lidos antes de serem removidos
+        instance._usuarios_antes_clear = list(instance.user_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        agendar_invalidacao_permissoes(instance._usuarios_antes_clear)
+    elif action in ('post_add', 'post_remove'):
+        agendar_invalidacao_permissoes(pk_set)
+
+
+# Método para invalidar as permissões dos usuários dos grupos cujas permissões forem alteradas
+def invalidar_permissoes_grupo_permissoes(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            agendar_invalidacao_permissoes(usuarios_dos_grupos([instance.pk]))
+    elif action == 'pre_clear':
+        # Alteração feita pela permissão (permissao.group_set); os grupos são lidos antes de serem removidos
+        instance._grupos_antes_clear = list(instance.group_set.values_list('pk', flat=True))
+    elif action == 'post_clear':
+        agendar_invalidacao_permissoes(usuarios_dos_grupos(instance._grupos_antes_clear))
+    elif action in ('post_add', 'post_remove'):
+        agendar_invalidacao_permissoes(usuarios_dos_grupos(pk_set))
+
+# Conectar os métodos às alterações de User.groups e Group.permissions
+m2m_changed.connect(invalidar_permissoes_usuario_grupos, sender=User.groups.through)
+m2m_changed.connect(invalidar_permissoes_grupo_permissoes, sender=Group.permissions.through)
+
+
+# A exclusão de um grupo ou permissão remove as associações sem disparar o m2m_changed,
+# então os usuários afetados são lidos antes da exclusão
+def invalidar_permissoes_grupo_excluido(sender, instance, **kwargs):
+    agendar_invalidacao_permissoes(usuarios_dos_grupos([instance.pk]))
+
+def invalidar_permissoes_permissao_excluida(sender, instance, **kwargs):
+    agendar_invalidacao_permissoes(
+        User.objects.filter(groups__permissions=instance).values_list('pk', flat=True).distinct()
+    )
+
+pre_delete.connect(invalidar_permissoes_grupo_excluido, sender=Group)
+pre_delete.connect(invalidar_permissoes_permissao_excluida, sender=Permission)
+
+
+# Método para guardar o is_active carregado, para saber depois se ele foi alterado
+def guardar_is_active_usuario(sender, instance, **kwargs):
+    instance._is_active_original = instance.is_active
+
+# Método para invalidar os tokens com permissões quando um usuário for ativado ou desativado
+def invalidar_permissoes_usuario_ativo(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    if instance.is_active != getattr(instance, '_is_active_original', instance.is_active):
+        # Requisições de leitura não consultam o usuário no banco, então um usuário
+        # desativado só perde o acesso quando a versão das suas permissões muda
+        agendar_invalidacao_permissoes([instance.pk])
+    instance._is_active_original = instance.is_active
+
+# Método para invalidar os tokens com permissões de um usuário excluído
+def invalidar_permissoes_usuario_excluido(sender, instance, **kwargs):
+    agendar_invalidacao_permissoes([instance.pk])
+
+# Conectar os métodos aos sinais post_init, post_save e post_delete de User
+post_init.connect(guardar_is_active_usuario, sender=User)
+post_save.connect(invalidar_permissoes_usuario_ativo, sender=User)
+post_delete.connect(invalidar_permissoes_usuario_excluido, sender=User)
@@ -0,0 +1,179 @@
+import time
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, router
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+
+# Atributo usado para guardar as permissões já resolvidas na instância do usuário
+ATRIBUTO_CACHE_PERMISSOES = '_permissoes_grupo_cache'
+
+# Chaves usadas no cache do Django
+CHAVE_VERSAO_PERMISSOES = 'permissoes_grupo:versao:{user_id}'
+CHAVE_PERMISSOES_USUARIO = 'permissoes_grupo:{versao}:{user_id}'
+
+# Registro das permissões próprias do projeto: {model: {codename: name}}
+REGISTRO_PERMISSOES = {}
+
+
+def get_versao_permissoes(user_id):
+    """
+    Retorna a versão atual das permissões de grupo do usuário.
+
+    A versão faz parte da chave de cache das permissões do usuário e é
+    embarcada nos tokens de acesso, então alterá-la invalida as permissões já
+    gravadas. O valor é baseado no horário para não reaproveitar versões
+    antigas caso a chave seja removida do cache.
+    """
+    chave = CHAVE_VERSAO_PERMISSOES.format(user_id=user_id)
+    versao = cache.get(chave)
+    if versao is None:
+        cache.add(chave, time.time_ns(), None)
+        versao = cache.get(chave)
+    return versao
+
+
+def invalidar_permissoes_usuarios(user_ids):
+    """
+    Invalida as permissões de grupo em cache dos usuários informados, com uma única escrita no cache.
+    """
+    versao = time.time_ns()
+    cache.set_many({CHAVE_VERSAO_PERMISSOES.format(user_id=user_id): versao for user_id in user_ids}, None)
+
+
+def get_permissoes_grupo(user):
+    """
+    Retorna o conjunto de codenames das permissões dos grupos do usuário.
+
+    O conjunto é procurado primeiro na instância do usuário (mesma durante toda
+    a requisição), depois no cache do Django e só então carregado do banco com
+    uma única consulta.
+    """
+    if user is None or not user.is_authenticated:
+        return frozenset()
+
+    permissoes = getattr(user, ATRIBUTO_CACHE_PERMISSOES, None)
+    if permissoes is None:
+        chave = CHAVE_PERMISSOES_USUARIO.format(versao=get_versao_permissoes(user.pk), user_id=user.pk)
+        permissoes = cache.get(chave)
+        if permissoes is None:
+            permissoes = frozenset(
+                Permission.objects.filter(group__user=user).values_list('codename', flat=True)
+            )
+            cache.set(chave, permissoes, settings.PERMISSOES_CACHE_TIMEOUT)
+        setattr(user, ATRIBUTO_CACHE_PERMISSOES, permissoes)
+    return permissoes
+
+
+def has_group_permission(user, codename):
+    """
+    Verifica se algum grupo do usuário possui a permissão informada.
+    """
+    return codename in get_permissoes_grupo(user)
+
+
+def registrar_permissoes(model, permissoes):
+    """
+    Registra as permissões próprias de um model, no formato {codename: name}.
+
+    Chamado no models.py de cada app; as permissões registradas são criadas
+    no banco após as migrações por criar_permissoes_registradas.
+    """
+    REGISTRO_PERMISSOES.setdefault(model, {}).update(permissoes)
+
+
+def criar_permissoes_registradas(sender=None, using=DEFAULT_DB_ALIAS, apps=global_apps, **kwargs):
+    """
+    Cria as permissões registradas que ainda não existem no banco.
+
+    Conectado ao post_migrate apenas para o app users (UsersConfig.ready), então
+    roda uma vez por migrate: uma consulta para as permissões existentes e um
+    único bulk_create para as que faltam.
+    """
+    try:
+        apps.get_model('auth', 'Permission')
+        apps.get_model('contenttypes', 'ContentType')
+    except LookupError:
+        return
+
+    if not router.allow_migrate_model(using, Permission):
+        return
+
+    # Considera apenas os models presentes no estado das migrações
+    models = []
+    for model in REGISTRO_PERMISSOES:
+        try:
+            apps.get_model(model._meta.app_label, model._meta.model_name)
+        except LookupError:
+            continue
+        models.append(model)
+
+    if not models:
+        return
+
+    content_types = ContentType.objects.db_manager(using).get_for_models(*models)
+    existentes = set(
+        Permission.objects.using(using)
+        .filter(content_type__in=content_types.values())
+        .values_list('content_type_id', 'codename')
+    )
+
+    Permission.objects.using(using).bulk_create([
+        Permission(codename=codename, name=name, content_type=content_types[model])
+        for model in models
+        for codename, name in REGISTRO_PERMISSOES[model].items()
+        if (content_types[model].pk, codename) not in existentes
+    ])
+
+
+def get_catalogo_permissoes():
+    """
+    Retorna a lista de (codename, name) das permissões do projeto, a partir do registro.
+
+    A lista segue a ordenação padrão de Permission (app, model e codename).
+    """
+    return [
+        (codename, name)
+        for model, permissoes in sorted(
+            REGISTRO_PERMISSOES.items(), key=lambda item: (item[0]._meta.app_label, item[0]._meta.model_name)
+        )
+        for codename, name in sorted(permissoes.items())
+    ]
+
+
+class PermissaoPorAcao(BasePermission):
+    """
+    Permissão do DRF baseada nos codenames dos grupos do usuário, configurada por ação.
+
+    A view define `permissoes_por_acao`, relacionando a ação do ViewSet (ou o
+    método HTTP, no caso de APIView) ao codename exigido, por exemplo
+    {'list': 'visualizar_equipamento', 'update': 'editar_equipamento'}.
+    Opcionalmente, `mensagens_permissao` define a mensagem de erro de cada ação.
+    Ações não configuradas são negadas.
+
+    A verificação é feita uma única vez por requisição, antes de qualquer
+    queryset ser montado.
+    """
+    mensagem_padrao = 'Usuário sem permissão para realizar esta ação'
+
+    def has_permission(self, request, view):
+        # Requisições OPTIONS apenas descrevem a view
+        if request.method == 'OPTIONS':
+            return True
+
+        acao = getattr(view, 'action', None) or request.method.lower()
+        if acao == 'head':
+            # Como o GET, do qual o HEAD é a versão sem corpo (os ViewSets já mapeiam o HEAD para a ação do GET)
+            acao = 'get'
+        codename = getattr(view, 'permissoes_por_acao', {}).get(acao)
+
+        if codename is not None and has_group_permission(request.user, codename):
+            return True
+
+        mensagem = getattr(view, 'mensagens_permissao', {}).get(acao, self.mensagem_padrao)
+        raise PermissionDenied({'error': mensagem})
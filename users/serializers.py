@@ -1,12 +1,20 @@
 from django.contrib.auth.models import User, Group
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from rest_framework import serializers
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.tokens import default_token_generator
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
-from django.core.mail import send_mail
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from users.tokens import adicionar_permissoes_ao_token, revogar_token, token_revogado
+from users.authentication import invalidar_credenciais_usuario
+from users.permissions import get_catalogo_permissoes
+from users.services import enfileirar_email
 
 class GrupoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,8 +30,15 @@ class GrupoDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'permissions_list']
 
     def get_permissions_list(self, obj):
-        permissions = obj.permissions.values_list('name', flat=True)
-        permissions_dict = {permission: obj.permissions.filter(name=permission).exists() for permission in permissions}
+        # Usa obj.permissions.all() para aproveitar o prefetch_related da view
+        permissoes_grupo = {permission.codename: permission.name for permission in obj.permissions.all()}
+
+        # Todas as permissões do projeto, indicando se o grupo as possui
+        permissions_dict = {name: codename in permissoes_grupo for codename, name in get_catalogo_permissoes()}
+
+        # Mantém as demais permissões do grupo que não fazem parte do catálogo
+        for name in permissoes_grupo.values():
+            permissions_dict.setdefault(name, True)
         return permissions_dict
     
 class CreateUserSerializer(serializers.ModelSerializer):
@@ -45,6 +60,23 @@ class CreateUserSerializer(serializers.ModelSerializer):
         
         return user
 
+class UsuarioLoteSerializer(CreateUserSerializer):
+    """
+    Valida cada usuário do cadastro em lote.
+
+    A unicidade do username e a existência dos grupos são verificadas para o
+    lote inteiro em users.services.validar_usuarios_lote, com uma consulta cada.
+    """
+    groups = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, default=list)
+
+    class Meta(CreateUserSerializer.Meta):
+        fields = ['username', 'email', 'password', 'is_admin', 'groups']
+        extra_kwargs = {
+            'password': {'write_only': True},
+            # Sem o UniqueValidator, que faria uma consulta por usuário
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
+
 class UserListSerializer(serializers.ModelSerializer):
     model = User
     fields = {'id', 'username'}
@@ -96,6 +128,7 @@ class UpdateUserSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         # Verificar se uma nova senha foi fornecida
         new_password = validated_data.get('password')
+        username_anterior, is_active_anterior = instance.username, instance.is_active
 
         if new_password:
             instance.password = make_password(new_password)
@@ -103,6 +136,11 @@ class UpdateUserSerializer(serializers.ModelSerializer):
         # Atualizar os outros campos do usuário
         instance.username = validated_data.get('username', instance.username)
         instance.email = validated_data.get('email', instance.email)
+        instance.is_active = validated_data.get('is_active', instance.is_active)
+
+        # As credenciais Basic em cache deixam de valer com outra senha, outro username ou o usuário desativado
+        if new_password or instance.username != username_anterior or instance.is_active != is_active_anterior:
+            invalidar_credenciais_usuario(instance.pk)
 
         # Salvar as alterações
         instance.save()
@@ -113,29 +151,58 @@ class UpdateUserSerializer(serializers.ModelSerializer):
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
-    def validate_email(self, value):
-        email = value
-        user = User.objects.filter(email=email).first()
+    def save(self, user, **kwargs):
+        # Criando o token para a redefinição de senha
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        token = default_token_generator.make_token(user)
 
-        if user:
-            # Criando o token para a redefinição de senha
-            uid = urlsafe_base64_encode(force_bytes(user.pk))
-            token = default_token_generator.make_token(user)
+        # Construindo a URL de redefinição de senha
+        reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
 
-            # Construindo a URL de redefinição de senha
-            reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
+        # Colocando o e-mail de redefinição de senha na fila de envio (enviado pelo comando enviar_emails)
+        subject = 'Redefinição de Senha'
+        message = f'Clique no seguinte link para redefinir sua senha:\n\n{reset_url}'
 
-            # Enviando o e-mail de redefinição de senha
-            subject = 'Redefinição de Senha'
-            message = f'Clique no seguinte link para redefinir sua senha:\n\n{reset_url}'
-            from_email = settings.DEFAULT_FROM_EMAIL
-            to_email = [user.email]
+        return enfileirar_email(subject, message, [user.email])
 
-            send_mail(subject, message, from_email, to_email, fail_silently=False)
 
-        # Independentemente de encontrar ou não um usuário, retorne o valor validado
-        return value
+# Serializador para obtenção de tokens com as permissões do usuário embarcadas
+class TokenPermissoesObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        return adicionar_permissoes_ao_token(token, user)
 
-    def save(self, **kwargs):
-        # Este método é chamado implicitamente, mas podemos deixá-lo vazio, pois a lógica já está na validação de e-mail
-        pass
\ No newline at end of file
+
+# Serializador para renovação de tokens com as permissões do usuário embarcadas
+class TokenPermissoesRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        # Com a rotação, o token usado é revogado na mesma operação que verifica se já estava revogado
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if not revogar_token(refresh):
+                raise InvalidToken('Token de refresh revogado')
+        elif token_revogado(refresh):
+            raise InvalidToken('Token de refresh revogado')
+
+        if settings.JWT_PERMISSOES_NO_TOKEN:
+            # Recarregando as permissões para que o novo token de acesso não herde claims desatualizadas
+            user = User.objects.filter(
+                is_active=True,
+                **{jwt_settings.USER_ID_FIELD: refresh[jwt_settings.USER_ID_CLAIM]},
+            ).first()
+            if user is None:
+                raise AuthenticationFailed('Usuário inativo ou inexistente', code='user_inactive')
+            adicionar_permissoes_ao_token(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
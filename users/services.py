@@ -0,0 +1,154 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User, Group
+from django.db import transaction
+from users.models import EmailPendente, indexar_usuarios
+
+
+def inicializar_processo_hash():
+    # Com o método "spawn" o processo filho começa sem o Django configurado
+    if not apps.ready:
+        django.setup()
+
+
+def gerar_hash_senha(senha):
+    return make_password(senha)
+
+
+def gerar_hashes_senhas(senhas, processos=None):
+    """
+    Gera os hashes das senhas distribuindo o trabalho em um pool de processos.
+
+    O hash (PBKDF2) consome CPU e não libera o GIL, então threads não ajudam.
+    Com um único processo (ou uma única senha) o hash é feito no próprio processo.
+    """
+    processos = processos or settings.USUARIOS_LOTE_PROCESSOS or os.cpu_count() or 1
+    if processos == 1 or len(senhas) < 2:
+        return [gerar_hash_senha(senha) for senha in senhas]
+
+    processos = min(processos, len(senhas))
+    chunksize = max(len(senhas) // (processos * 4), 1)
+    with ProcessPoolExecutor(max_workers=processos, initializer=inicializar_processo_hash) as executor:
+        return list(executor.map(gerar_hash_senha, senhas, chunksize=chunksize))
+
+
+def validar_usuarios_lote(usuarios):
+    """
+    Valida a lista de usuários a cadastrar com o UsuarioLoteSerializer.
+
+    Retorna (erros, usuarios_validados); se houver algum erro, nenhum usuário
+    é retornado. A existência dos usernames e dos grupos é verificada com uma
+    consulta cada.
+    """
+    # Importado aqui porque users.serializers importa este módulo (enfileirar_email)
+    from users.serializers import UsuarioLoteSerializer
+
+    serializer = UsuarioLoteSerializer(data=usuarios, many=True)
+    if not serializer.is_valid():
+        return [
+            {'indice': indice, 'username': usuarios[indice].get('username'), 'error': erro}
+            if isinstance(usuarios[indice], dict) else {'indice': indice, 'error': erro}
+            for indice, erro in enumerate(serializer.errors)
+            if erro
+        ], []
+
+    usuarios = serializer.validated_data
+    erros = []
+    usernames = set()
+    for indice, usuario in enumerate(usuarios):
+        if usuario['username'] in usernames:
+            erros.append({'indice': indice, 'username': usuario['username'], 'error': 'Username repetido no lote'})
+        usernames.add(usuario['username'])
+
+    existentes = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    grupos_ids = {grupo_id for usuario in usuarios for grupo_id in usuario['groups']}
+    grupos_encontrados = set(Group.objects.filter(pk__in=grupos_ids).values_list('pk', flat=True))
+
+    for indice, usuario in enumerate(usuarios):
+        if usuario['username'] in existentes:
+            erros.append({'indice': indice, 'username': usuario['username'], 'error': 'Já existe um usuário com este username'})
+
+        inexistentes = [grupo_id for grupo_id in usuario['groups'] if grupo_id not in grupos_encontrados]
+        if inexistentes:
+            erros.append({'indice': indice, 'username': usuario['username'], 'error': f'Os grupos com ID {inexistentes} não existem'})
+
+    if erros:
+        return erros, []
+    return [], usuarios
+
+
+def criar_usuarios_lote(usuarios, processos=None):
+    """
+    Cadastra vários usuários de uma vez.
+
+    Recebe a lista de usuários já validados por validar_usuarios_lote.
+    Os hashes das senhas são gerados em um pool de processos, os usuários são
+    inseridos com bulk_create e os grupos associados com um único bulk_create
+    na tabela intermediária, tudo em uma transação.
+
+    Retorna (usuarios_criados, estatisticas), sendo as estatísticas os tempos
+    de cada etapa e a vazão em usuários por segundo.
+    """
+    inicio = time.perf_counter()
+    hashes = gerar_hashes_senhas([usuario['password'] for usuario in usuarios], processos)
+    tempo_hash = time.perf_counter() - inicio
+
+    novos_usuarios = []
+    for usuario, hash_senha in zip(usuarios, hashes):
+        is_admin = usuario['is_admin']
+        novos_usuarios.append(User(
+            username=usuario['username'],
+            email=User.objects.normalize_email(usuario.get('email') or ''),
+            password=hash_senha,
+            is_staff=is_admin,
+            is_superuser=is_admin,
+        ))
+
+    inicio_gravacao = time.perf_counter()
+    with transaction.atomic():
+        User.objects.bulk_create(novos_usuarios)
+
+        # O MySQL não retorna as chaves primárias no bulk_create, então os usuários são buscados novamente
+        criados = {
+            user.username: user
+            for user in User.objects.filter(username__in=[usuario['username'] for usuario in usuarios])
+        }
+
+        UsuarioGrupo = User.groups.through
+        UsuarioGrupo.objects.bulk_create([
+            UsuarioGrupo(user_id=criados[usuario['username']].pk, group_id=grupo_id)
+            for usuario in usuarios
+            for grupo_id in dict.fromkeys(usuario['groups'])
+        ])
+
+        # O bulk_create não dispara o post_save, então os termos de busca são gravados aqui
+        indexar_usuarios(criados.values())
+    tempo_gravacao = time.perf_counter() - inicio_gravacao
+
+    tempo_total = time.perf_counter() - inicio
+    estatisticas = {
+        'quantidade': len(usuarios),
+        'tempo_hash': round(tempo_hash, 3),
+        'tempo_gravacao': round(tempo_gravacao, 3),
+        'tempo_total': round(tempo_total, 3),
+        'usuarios_por_segundo': round(len(usuarios) / tempo_total, 1) if tempo_total else None,
+    }
+    return [criados[usuario['username']] for usuario in usuarios], estatisticas
+
+
+def enfileirar_email(assunto, mensagem, destinatarios, remetente=None):
+    """
+    Grava um e-mail na fila de envio. O envio é feito pelo comando enviar_emails.
+    """
+    return EmailPendente.objects.create(
+        assunto=assunto,
+        mensagem=mensagem,
+        remetente=remetente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=list(destinatarios),
+    )
@@ -1,3 +1,340 @@
-from django.test import TestCase
+import base64
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User, Group, Permission
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from users.authentication import cache_credenciais
+from users.models import EmailPendente
+from users.serializers import UpdateUserSerializer
+from users.services import enfileirar_email
+
+
+@override_settings(JWT_PERMISSOES_NO_TOKEN=True)
+class TokenPermissoesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('usuario', 'usuario@teste.com', 'senha')
+        self.grupo = Group.objects.create(name='leitura')
+        self.grupo.permissions.add(Permission.objects.get(codename='visualizar_equipamento'))
+        self.usuario.groups.add(self.grupo)
+
+        self.client = APIClient()
+        token = self.client.post('/usuario/token/', {'username': 'usuario', 'password': 'senha'}, format='json').json()
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + token['access'])
+
+    def assertLeituraPeloToken(self):
+        # Apenas a contagem de equipamentos (não há nenhum), sem consultar o usuário nem as permissões
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/equipamento/').status_code, 200)
+
+    def test_leitura_com_token(self):
+        self.assertLeituraPeloToken()
+
+    def test_usuario_desativado_perde_leitura(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.is_active = False
+            self.usuario.save()
+        self.assertEqual(self.client.get('/equipamento/').status_code, 403)
+
+    def test_usuario_excluido_perde_leitura(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.delete()
+        self.assertEqual(self.client.get('/equipamento/').status_code, 403)
+
+    def test_salvar_sem_alterar_is_active_mantem_token(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.usuario.first_name = 'Nome'
+            self.usuario.save()
+        self.assertLeituraPeloToken()
+
+    def test_permissoes_alteradas_sao_lidas_do_banco(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grupo.permissions.clear()
+        self.assertEqual(self.client.get('/equipamento/').status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Permission.objects.get(codename='visualizar_equipamento').group_set.add(self.grupo)
+        self.assertEqual(self.client.get('/equipamento/').status_code, 200)
+
+    def test_grupo_removido_pelo_grupo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grupo.user_set.clear()
+        self.assertEqual(self.client.get('/equipamento/').status_code, 403)
+
+    def test_grupo_excluido(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grupo.delete()
+        self.assertEqual(self.client.get('/equipamento/').status_code, 403)
+
+    def test_alteracoes_de_outros_usuarios_nao_afetam_o_token(self):
+        outro = User.objects.create_user('outro', 'outro@teste.com', 'senha')
+        with self.captureOnCommitCallbacks(execute=True):
+            outro.groups.add(Group.objects.create(name='outro'))
+            outro.is_active = False
+            outro.save()
+        self.assertLeituraPeloToken()
+
+
+class GrupoConsultasTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_superuser('admin', 'admin@teste.com', 'senha')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        self.codenames = list(Permission.objects.order_by('pk').values_list('codename', flat=True)[:40])
+
+    def test_detalhe_do_grupo(self):
+        grupo = Group.objects.create(name='grupo')
+        grupo.permissions.set(Permission.objects.filter(codename__in=self.codenames))
+
+        with self.assertNumQueries(2):
+            resposta = self.client.get(f'/usuario/grupos/{grupo.pk}/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(all(
+            resposta.data['permissions_list'][nome]
+            for nome in Permission.objects.filter(codename__in=self.codenames).values_list('name', flat=True)
+        ))
+
+    def test_criacao_do_grupo(self):
+        for quantidade in (1, 40):
+            # Inclui a consulta dos usuários do grupo, cujas permissões são invalidadas
+            with self.assertNumQueries(9):
+                resposta = self.client.post('/usuario/grupos/create/', {
+                    'name': f'grupo {quantidade}',
+                    'permissions': {codename: True for codename in self.codenames[:quantidade]},
+                }, format='json')
+            self.assertEqual(resposta.status_code, 201)
+            self.assertEqual(Group.objects.get(name=f'grupo {quantidade}').permissions.count(), quantidade)
+
+    def test_edicao_do_grupo(self):
+        grupo = Group.objects.create(name='grupo')
+        grupo.permissions.set(Permission.objects.filter(codename__in=self.codenames[:20]))
+
+        # Metade das permissões concedidas, metade retiradas
+        permissoes = {codename: indice % 2 == 0 for indice, codename in enumerate(self.codenames)}
+        # Inclui as consultas dos usuários do grupo após a remoção e a inclusão das permissões
+        with self.assertNumQueries(10):
+            resposta = self.client.put(f'/usuario/grupos/editar/{grupo.pk}/', {'permissions': permissoes}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            set(grupo.permissions.values_list('codename', flat=True)),
+            {codename for codename, concedida in permissoes.items() if concedida},
+        )
+
+    def test_edicao_com_permissao_inexistente(self):
+        grupo = Group.objects.create(name='grupo')
+        grupo.permissions.set(Permission.objects.filter(codename__in=self.codenames[:5]))
+
+        resposta = self.client.put(f'/usuario/grupos/editar/{grupo.pk}/', {
+            'permissions': {'inexistente': True, self.codenames[10]: True},
+        }, format='json')
+        self.assertEqual(resposta.status_code, 404)
+        self.assertEqual(grupo.permissions.count(), 5)
+
+
+class AssociarUsuarioGrupoLoteTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@teste.com', 'senha')
+        self.usuario = User.objects.create_user('usuario', 'usuario@teste.com', 'senha')
+        self.grupo = Group.objects.create(name='grupo')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_itens_invalidos_nao_impedem_os_demais(self):
+        resposta = self.client.post('/usuario/grupos/associar/lote/', [
+            {'user_id': 'zz', 'groups': [self.grupo.pk]},
+            {'user_id': [self.usuario.pk], 'groups': [self.grupo.pk]},
+            {'user_id': True, 'groups': [self.grupo.pk]},
+            {'user_id': self.usuario.pk, 'groups': self.grupo.pk},
+            {'user_id': self.usuario.pk, 'groups': [{'id': self.grupo.pk}]},
+            {'user_id': 999999, 'groups': [self.grupo.pk]},
+            {'user_id': self.admin.pk, 'groups': [self.grupo.pk]},
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([('error' in item) for item in resposta.data], [True] * 6 + [False])
+        self.assertEqual(resposta.data[6], {'user_id': self.admin.pk, 'groups': ['grupo']})
+        self.assertFalse(self.usuario.groups.exists())
+        self.assertTrue(self.admin.groups.filter(pk=self.grupo.pk).exists())
+
+    def test_usuario_repetido(self):
+        outro_grupo = Group.objects.create(name='outro')
+        resposta = self.client.post('/usuario/grupos/associar/lote/', [
+            {'user_id': self.usuario.pk, 'groups': [self.grupo.pk]},
+            {'user_id': self.admin.pk, 'groups': [self.grupo.pk]},
+            {'user_id': str(self.usuario.pk), 'groups': [outro_grupo.pk]},
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual([item.get('error') for item in resposta.data], ['Usuário repetido no lote', None, 'Usuário repetido no lote'])
+        self.assertFalse(self.usuario.groups.exists())
+        self.assertTrue(self.admin.groups.exists())
+
+    def test_permissoes_invalidadas_apos_o_commit(self):
+        with mock.patch('users.models.invalidar_permissoes_usuarios') as invalidar:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.client.post('/usuario/grupos/associar/lote/', [
+                    {'user_id': self.usuario.pk, 'groups': [self.grupo.pk]},
+                ], format='json')
+            invalidar.assert_not_called()
+
+            for callback in callbacks:
+                callback()
+            invalidar.assert_called_once_with([self.usuario.pk])
+
+
+class CreateUserLoteTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@teste.com', 'senha')
+        self.grupo = Group.objects.create(name='grupo')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_cadastro_em_lote(self):
+        resposta = self.client.post('/usuario/cadastrar/lote/', [
+            {'username': 'ana', 'email': 'ana@teste.com', 'password': 'senha', 'is_admin': 'false', 'groups': [self.grupo.pk]},
+            {'username': 'bia', 'email': 'bia@teste.com', 'password': 'senha', 'is_admin': True},
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, 201)
+        ana = User.objects.get(username='ana')
+        self.assertFalse(ana.is_superuser)
+        self.assertTrue(ana.check_password('senha'))
+        self.assertEqual(list(ana.groups.all()), [self.grupo])
+        self.assertTrue(User.objects.get(username='bia').is_superuser)
+
+    def test_erros_por_usuario(self):
+        resposta = self.client.post('/usuario/cadastrar/lote/', [
+            {'username': 'ana', 'email': 'ana@teste.com', 'password': 'senha'},
+            {'username': 'bia', 'email': 'nao-e-email', 'password': 'senha'},
+            {'username': 'carla', 'email': 'carla@teste.com', 'password': 'senha', 'groups': ['abc']},
+            {'username': 'dani', 'email': 'dani@teste.com', 'password': 'senha', 'is_admin': 'talvez'},
+            {'username': 'admin', 'email': 'outro@teste.com', 'password': 'senha'},
+            'texto',
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, 400)
+        erros = resposta.data['errors']
+        self.assertEqual([erro['indice'] for erro in erros], [1, 2, 3, 5])
+        self.assertIn('email', erros[0]['error'])
+        self.assertIn('groups', erros[1]['error'])
+        self.assertIn('is_admin', erros[2]['error'])
+        self.assertFalse(User.objects.filter(username='ana').exists())
+
+    def test_username_existente_e_grupo_inexistente(self):
+        resposta = self.client.post('/usuario/cadastrar/lote/', [
+            {'username': 'admin', 'email': 'outro@teste.com', 'password': 'senha'},
+            {'username': 'ana', 'email': 'ana@teste.com', 'password': 'senha', 'groups': [999999]},
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertEqual([erro['indice'] for erro in resposta.data['errors']], [0, 1])
+
+    @override_settings(USUARIOS_LOTE_MAXIMO=2)
+    def test_limite_de_usuarios_por_requisicao(self):
+        resposta = self.client.post('/usuario/cadastrar/lote/', [
+            {'username': f'usuario{indice}', 'email': '', 'password': 'senha'} for indice in range(3)
+        ], format='json')
+
+        self.assertEqual(resposta.status_code, 400)
+        self.assertFalse(User.objects.filter(username__startswith='usuario').exists())
+
+
+class FilaEmailsTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('usuario', 'usuario@teste.com', 'senha')
+
+    def enviar_emails(self, *args):
+        call_command('enviar_emails', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_pedido_de_redefinicao_de_senha_entra_na_fila(self):
+        resposta = APIClient().post('/usuario/password/reset/request/', {'email': 'usuario@teste.com'}, format='json')
+
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        email = EmailPendente.objects.get()
+        self.assertEqual(email.destinatarios, ['usuario@teste.com'])
+        self.assertEqual(email.situacao, '0')
+
+    def test_envio_da_fila(self):
+        enfileirar_email('Assunto 1', 'Mensagem 1', ['a@teste.com'])
+        enfileirar_email('Assunto 2', 'Mensagem 2', ['b@teste.com', 'c@teste.com'])
+
+        self.enviar_emails('--lote', '1')
+
+        self.assertEqual([(email.subject, email.to) for email in mail.outbox], [
+            ('Assunto 1', ['a@teste.com']),
+            ('Assunto 2', ['b@teste.com', 'c@teste.com']),
+        ])
+        self.assertFalse(EmailPendente.objects.exclude(situacao='1').exists())
+        self.assertFalse(EmailPendente.objects.filter(data_envio__isnull=True).exists())
+
+        # E-mails já enviados não são enviados novamente
+        self.enviar_emails()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_falha_no_envio(self):
+        email = enfileirar_email('Assunto', 'Mensagem', ['a@teste.com'])
+
+        with mock.patch('users.management.commands.enviar_emails.EmailMessage.send', side_effect=OSError('falha')):
+            self.enviar_emails('--max-tentativas', '2')
+            email.refresh_from_db()
+            self.assertEqual((email.situacao, email.tentativas, email.erro), ('0', 1, 'falha'))
+            self.assertGreater(email.proxima_tentativa, timezone.now())
+
+            # A nova tentativa só acontece depois da espera
+            self.enviar_emails('--max-tentativas', '2')
+            email.refresh_from_db()
+            self.assertEqual(email.tentativas, 1)
+
+            EmailPendente.objects.filter(pk=email.pk).update(proxima_tentativa=timezone.now())
+            self.enviar_emails('--max-tentativas', '2')
+            email.refresh_from_db()
+            self.assertEqual((email.situacao, email.tentativas), ('2', 2))
+
+        self.assertEqual(len(mail.outbox), 0)
+
+
+class BasicAuthenticationCacheTests(TestCase):
+    def setUp(self):
+        cache_credenciais.limpar()
+        self.usuario = User.objects.create_user('usuario', 'usuario@teste.com', 'senha')
+
+    def cliente_basic(self, username, senha):
+        cliente = APIClient()
+        credenciais = base64.b64encode(f'{username}:{senha}'.encode()).decode()
+        cliente.credentials(HTTP_AUTHORIZATION=f'Basic {credenciais}')
+        return cliente
+
+    def test_troca_de_username_invalida_as_credenciais(self):
+        cliente = self.cliente_basic('usuario', 'senha')
+        self.assertEqual(cliente.get(f'/usuario/{self.usuario.pk}/').status_code, 200)
+
+        with mock.patch.object(cache_credenciais, 'invalidar_usuario', wraps=cache_credenciais.invalidar_usuario) as invalidar:
+            UpdateUserSerializer().update(self.usuario, {'username': 'novo'})
+        invalidar.assert_called_once_with(self.usuario.pk)
+
+        self.assertEqual(cliente.get(f'/usuario/{self.usuario.pk}/').status_code, 403)
+        self.assertEqual(self.cliente_basic('novo', 'senha').get(f'/usuario/{self.usuario.pk}/').status_code, 200)
+
+    def test_desativacao_invalida_as_credenciais(self):
+        cliente = self.cliente_basic('usuario', 'senha')
+        self.assertEqual(cliente.get(f'/usuario/{self.usuario.pk}/').status_code, 200)
+
+        with mock.patch.object(cache_credenciais, 'invalidar_usuario') as invalidar:
+            UpdateUserSerializer().update(self.usuario, {'is_active': False})
+            UpdateUserSerializer().update(self.usuario, {'email': 'outro@teste.com'})
+        invalidar.assert_called_once_with(self.usuario.pk)
+
+    def test_troca_de_username_em_outro_processo(self):
+        cliente = self.cliente_basic('usuario', 'senha')
+        self.assertEqual(cliente.get(f'/usuario/{self.usuario.pk}/').status_code, 200)
+
+        # Alteração que não passa por este processo: a entrada em cache continua lá
+        User.objects.filter(pk=self.usuario.pk).update(username='novo')
+        self.assertEqual(cliente.get(f'/usuario/{self.usuario.pk}/').status_code, 403)
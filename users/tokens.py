@@ -0,0 +1,54 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from users.permissions import get_versao_permissoes, get_permissoes_grupo
+
+
+# Claims adicionadas aos tokens quando as permissões são embarcadas
+CLAIM_PERMISSOES = 'permissoes'
+CLAIM_PERMISSOES_VERSAO = 'permissoes_versao'
+
+# Chave usada no cache do Django para os tokens de refresh revogados
+CHAVE_TOKEN_REVOGADO = 'jwt_revogado:{jti}'
+
+
+def adicionar_permissoes_ao_token(token, user):
+    """
+    Embarca no token as permissões de grupo do usuário e a versão atual das permissões do usuário.
+
+    Não faz nada se settings.JWT_PERMISSOES_NO_TOKEN estiver desativado.
+    """
+    if not settings.JWT_PERMISSOES_NO_TOKEN:
+        return token
+
+    # A versão é lida antes das permissões para que uma alteração concorrente
+    # deixe o token desatualizado, e não o contrário
+    token[CLAIM_PERMISSOES_VERSAO] = get_versao_permissoes(user.pk)
+    token[CLAIM_PERMISSOES] = sorted(get_permissoes_grupo(user))
+    token['username'] = user.username
+    token['email'] = user.email
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    return token
+
+
+def revogar_token(token):
+    """
+    Revoga o token (pelo jti) até a sua expiração.
+
+    Retorna False se o token já estava revogado. A verificação e a revogação
+    são feitas em uma única operação atômica do cache (add), então duas
+    renovações concorrentes com o mesmo token não são aceitas.
+    """
+    timeout = max(int(token['exp'] - time.time()), 1)
+    chave = CHAVE_TOKEN_REVOGADO.format(jti=token[jwt_settings.JTI_CLAIM])
+    return cache.add(chave, True, timeout)
+
+
+def token_revogado(token):
+    """
+    Verifica se o token (pelo jti) foi revogado.
+    """
+    return cache.get(CHAVE_TOKEN_REVOGADO.format(jti=token[jwt_settings.JTI_CLAIM])) is not None
@@ -1,15 +1,25 @@
+from collections import Counter
+
 from django.urls import reverse_lazy
 from django.contrib.auth.models import User, Group, Permission
 from django.contrib.auth.views import PasswordResetView
 from rest_framework.permissions import IsAdminUser
 from django.shortcuts import get_object_or_404
-from rest_framework.authentication import SessionAuthentication, BasicAuthentication
+from django.db import transaction
+from django.db.models import Q
+from django.conf import settings
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import generics, status
 from rest_framework.generics import RetrieveAPIView, UpdateAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from users.serializers import UserSerializer, GrupoSerializer, GrupoDetailSerializer, CreateUserSerializer, PasswordResetSerializer, UpdateUserSerializer
+from api.validacao import converter_id, converter_ids
+from users.authentication import BasicAuthenticationCache
+from users.services import criar_usuarios_lote, validar_usuarios_lote
+from users.busca import palavras_busca
+from users.models import TermoBuscaUsuario, agendar_invalidacao_permissoes
 
 
 class CreateUserView(generics.CreateAPIView):
@@ -23,6 +33,38 @@ class CreateUserView(generics.CreateAPIView):
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+class CreateUserLoteView(APIView):
+    """
+    Cadastra vários usuários em uma única requisição.
+
+    Recebe uma lista de {"username", "email", "password", "is_admin", "groups"}.
+    Se algum usuário for inválido nenhum é cadastrado e os erros são retornados.
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, format=None):
+        usuarios = request.data
+
+        if not isinstance(usuarios, list) or not usuarios:
+            return Response({'error': 'O payload deve ser uma lista de usuários'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(usuarios) > settings.USUARIOS_LOTE_MAXIMO:
+            return Response(
+                {'error': f'Envie no máximo {settings.USUARIOS_LOTE_MAXIMO} usuários por requisição. '
+                          'Para importações maiores use o comando importar_usuarios'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        erros, usuarios = validar_usuarios_lote(usuarios)
+        if erros:
+            return Response({'errors': erros}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Os hashes são gerados no próprio processo; o pool de processos fica para o importar_usuarios
+        criados, estatisticas = criar_usuarios_lote(usuarios, processos=1)
+        usuarios_criados = [{'id': user.pk, 'username': user.username, 'email': user.email} for user in criados]
+
+        return Response({'usuarios': usuarios_criados, 'estatisticas': estatisticas}, status=status.HTTP_201_CREATED)
+
 class UserListView(generics.ListAPIView):
     permission_classes = [IsAdminUser]
     queryset = User.objects.all()
@@ -48,8 +90,44 @@ class UserSearchView(generics.ListAPIView):
     serializer_class = UserSerializer
 
     def get_queryset(self):
-        username = self.request.query_params.get('username', '')
-        return User.objects.filter(username__icontains=username)
+        """
+        Busca usuários pelo username, e-mail ou nome.
+
+        Com `q`, cada palavra buscada deve ser o início de algum termo do
+        usuário (busca indexada em TermoBuscaUsuario). Com `modo=contem`, a
+        busca por `q` procura o texto em qualquer posição, sem usar o índice.
+        O parâmetro `username` mantém a busca original por parte do username.
+        """
+        queryset = User.objects.prefetch_related('groups').order_by('username')
+        busca = self.request.query_params.get('q')
+
+        if busca is None:
+            username = self.request.query_params.get('username', '')
+            return queryset.filter(username__icontains=username)
+
+        if self.request.query_params.get('modo') == 'contem':
+            for palavra in busca.split():
+                queryset = queryset.filter(
+                    Q(username__icontains=palavra) | Q(email__icontains=palavra) |
+                    Q(first_name__icontains=palavra) | Q(last_name__icontains=palavra)
+                )
+            return queryset
+
+        for palavra in palavras_busca(busca):
+            queryset = queryset.filter(
+                pk__in=TermoBuscaUsuario.objects.filter(termo__startswith=palavra).values('usuario_id')
+            )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        # Acessando o valor do 'page size' na consulta
+        page_size = request.query_params.get('page_size')
+
+        if page_size:
+            #se 'page size' foi especificado, use o valor fornecido
+            self.paginator.page_size = int(page_size)
+
+        return super().list(request, *args, **kwargs)
 
 class UserPasswordResetView(PasswordResetView):
     success_url = reverse_lazy('password_reset_done')
@@ -63,7 +141,7 @@ class UpdateUserView(UpdateAPIView):
         return self.request.user
 
 class PasswordResetRequestView(APIView):
-    authentication_classes = [SessionAuthentication, BasicAuthentication]
+    authentication_classes = [SessionAuthentication, BasicAuthenticationCache]
     permission_classes = [AllowAny]
     serializer_class = PasswordResetSerializer
 
@@ -73,38 +151,51 @@ class PasswordResetRequestView(APIView):
 
         email = serializer.validated_data.get('email')
         # Verifique se o e-mail pertence a um usuário cadastrado
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
+        user = User.objects.filter(email=email).first()
+        if user is None:
             return Response({'detail': 'O e-mail fornecido não está associado a um usuário cadastrado.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        serializer.save(request=request)
+        serializer.save(user=user)
         return Response({'detail': 'Password reset e-mail has been sent.'}, status=status.HTTP_200_OK)
 
+def buscar_permissoes_concedidas(permissoes_payload):
+    """
+    Resolve, em uma única consulta, as permissões marcadas como concedidas no payload {codename: bool}.
+
+    Retorna a lista das permissões concedidas e a lista dos codenames inexistentes.
+    """
+    permissoes = list(
+        Permission.objects.select_related('content_type').filter(codename__in=permissoes_payload.keys())
+    )
+    encontradas = {permissao.codename for permissao in permissoes}
+    inexistentes = [codename for codename in permissoes_payload if codename not in encontradas]
+    concedidas = [permissao for permissao in permissoes if permissoes_payload[permissao.codename]]
+    return concedidas, inexistentes
+
+
+def resposta_permissoes_inexistentes(inexistentes):
+    return Response(f'As permissões {", ".join(inexistentes)} não existem', status=status.HTTP_404_NOT_FOUND)
+
+
 class GrupoCreateView(APIView):
     def post(self, request, format=None):
         grupo_nome = request.data.get('name')
-        permissoes_grupo = request.data.get('permissions') # Recebe as permissões do payload
+        permissoes_grupo = request.data.get('permissions') or {} # Recebe as permissões do payload
 
         if Group.objects.filter(name=grupo_nome).exists():
             return Response({'error': 'O grupo já existe'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        grupo = Group(name=grupo_nome)
-        grupo.save()
-
-        if permissoes_grupo:
-            for permissao_nome, valor in permissoes_grupo.items():
-                try:
-                    permissao = Permission.objects.get(codename=permissao_nome)
-                    if valor:
-                        grupo.permissions.add(permissao)
-                    else:
-                        grupo.permissions.remove(permissao)
-                except Permission.DoesNotExist:
-                    return Response(f'A permissão {permissao_nome} não existe', status=status.HTTP_404_NOT_FOUND)
+
+        # Validando todas as permissões antes de criar o grupo
+        permissoes, inexistentes = buscar_permissoes_concedidas(permissoes_grupo)
+        if inexistentes:
+            return resposta_permissoes_inexistentes(inexistentes)
+
+        with transaction.atomic():
+            grupo = Group.objects.create(name=grupo_nome)
+            grupo.permissions.set(permissoes)
 
         # Obtem todas as permissões do grupo
-        permissao_lista = [str(permission) for permission in grupo.permissions.all()]
+        permissao_lista = [str(permission) for permission in permissoes]
 
         data = {
             'sucesso': 'Grupo criado com sucesso',
@@ -119,7 +210,7 @@ class GrupoListView(generics.ListAPIView):
     serializer_class = GrupoSerializer
 
 class GrupoDetailView(RetrieveAPIView):
-    queryset = Group.objects.all()
+    queryset = Group.objects.prefetch_related('permissions')
     serializer_class = GrupoDetailSerializer
 
 class GrupoEditView(APIView):
@@ -137,19 +228,20 @@ class GrupoEditView(APIView):
         novo_nome = request.data.get('name')
         novas_permissoes = request.data.get('permissions')  # Recebe as permissões do payload
 
-        if novo_nome:
-            grupo.name = novo_nome
-            grupo.save()
-
+        # Validando todas as permissões antes de alterar o grupo
         if novas_permissoes is not None:
-            grupo.permissions.clear()  # Remove todas as permissões associadas ao grupo
-            for permissao_nome, valor in novas_permissoes.items():
-                try:
-                    permissao = Permission.objects.get(codename=permissao_nome)
-                    if valor:
-                        grupo.permissions.add(permissao)
-                except Permission.DoesNotExist:
-                    return Response(f'A permissão {permissao_nome} não existe', status=status.HTTP_404_NOT_FOUND)
+            permissoes, inexistentes = buscar_permissoes_concedidas(novas_permissoes)
+            if inexistentes:
+                return resposta_permissoes_inexistentes(inexistentes)
+
+        with transaction.atomic():
+            if novo_nome:
+                grupo.name = novo_nome
+                grupo.save()
+
+            # Substitui as permissões do grupo pelas marcadas como concedidas, aplicando apenas a diferença
+            if novas_permissoes is not None:
+                grupo.permissions.set(permissoes)
 
         serializer = GrupoSerializer(grupo)
         return Response(serializer.data)
@@ -182,150 +274,77 @@ class AssociarUsuarioGrupo(APIView):
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-# Permissoes de Empresa
-def has_permission_to_view_empresa(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_empresa', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode visualizar empresas
-    return grupos_com_permissao.exists()
-
-def has_permission_to_detail_empresa(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_empresa', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode visualizar detalhes de uma empresa
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_empresa(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_empresa', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode editar uma empresa
-    return grupos_com_permissao.exists()
-
-# Permissoes de Colaborador
-def has_permission_to_view_colaborador(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_colaborador', user=user)
-
-    # Se houver algum grupo com permisão, o usuário pode visualizar colaborador
-    return grupos_com_permissao.exists()
-
-def has_permission_to_detail_colaborador(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_colaborador', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode visualizar detalhes de uma colaborador
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_colaborador(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_colaborador', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode editar uma colaborador
-    return grupos_com_permissao.exists()
-
-# Permissoes do Tipo de Equipamento
-def has_permission_to_view_tipo_equipamento(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_tipo_equipamento', user=user)
-
-    # Se houver algum grupo com permisão, o usuário pode visualizar tipo_equipamento
-    return grupos_com_permissao.exists()
-
-def has_permission_to_detail_tipo_equipamento(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_tipo_equipamento', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode visualizar detalhes de uma tipo_equipamento
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_tipo_equipamento(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_tipo_equipamento', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode editar uma tipo_equipamento
-    return grupos_com_permissao.exists()
-
-# Permissoes do Equipamento
-def has_permission_to_view_equipamento(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_equipamento', user=user)
-
-    # Se houver algum grupo com permisão, o usuário pode visualizar equipamento
-    return grupos_com_permissao.exists()
-
-def has_permission_to_detail_equipamento(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_equipamento', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode visualizar detalhes de uma equipamento
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_equipamento(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_equipamento', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode editar uma equipamento
-    return grupos_com_permissao.exists()
-
-# Permissoes do Setor
-def has_permission_to_view_setor(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_setor', user=user)
 
-    # Se houver algum grupo com permisão, o usuário pode visualizar setor
-    return grupos_com_permissao.exists()
+class AssociarUsuarioGrupoLote(APIView):
+    """
+    Associa vários usuários aos seus grupos em uma única requisição.
 
-def has_permission_to_detail_setor(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_setor', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode visualizar detalhes de uma setor
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_setor(user):
-    # Verificar se o usuário está associado a grupos que tenham a permissão adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_setor', user=user)
-    
-    # Se houver algum grupo com permissão, o usuário pode editar uma setor
-    return grupos_com_permissao.exists()
-
-# Permissões de Categoria
-def has_permission_to_view_categoria(user):
-    # Verifica se o usuário está associado a grupos que tenham a permissao adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_categoria', user=user)
-
-    return grupos_com_permissao.exists()
-
-def has_permission_to_detail_categoria(user):
-    # Verifica se o usuário está associado a grupos que tenham a permissao adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_categoria', user=user)
-
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_categoria(user):
-    # Verifica se o usuário está associado a grupos que tenham a permissao adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_categoria', user=user)
-
-    return grupos_com_permissao.exists()
-
-# Permissões de Item
-def has_permission_to_view_item(user):
-    # Verifica se o usuário está associado a grupos que tenham a permissao adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualizar_item', user=user)
-
-    return grupos_com_permissao.exists()
-
-def has_permission_to_detail_item(user):
-    # Verifica se o usuário está associado a grupos que tenham a permissao adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='visualiza_detalhe_item', user=user)
-
-    return grupos_com_permissao.exists()
-
-def has_permission_to_edit_item(user):
-    # Verifica se o usuário está associado a grupos que tenham a permissao adequada
-    grupos_com_permissao = Group.objects.filter(permissions__codename='editar_item', user=user)
-
-    return grupos_com_permissao.exists()
+    Recebe uma lista de {"user_id": ..., "groups": [...]} e, como na associação
+    individual, substitui os grupos atuais de cada usuário. Usuários ou grupos
+    inexistentes são informados no resultado do usuário correspondente, sem
+    impedir a associação dos demais.
+    """
+    def post(self, request, format=None):
+        associacoes = request.data
+
+        if not isinstance(associacoes, list) or not all(isinstance(item, dict) for item in associacoes):
+            return Response({'error': 'O payload deve ser uma lista de objetos com user_id e groups'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Validando os tipos de cada item antes das consultas; itens inválidos recebem o erro no próprio resultado
+        itens = []
+        for item in associacoes:
+            user_id = converter_id(item.get('user_id'))
+            ids_grupos = converter_ids(item.get('groups') or [])
+            if user_id is None:
+                itens.append((item.get('user_id'), None, 'O user_id deve ser um ID de usuário válido'))
+            elif ids_grupos is None:
+                itens.append((user_id, None, 'O campo groups deve ser uma lista de IDs de grupos'))
+            else:
+                itens.append((user_id, ids_grupos, None))
+
+        # Um usuário repetido teria apenas a última associação gravada; nenhuma das repetições é aplicada
+        repeticoes = Counter(user_id for user_id, ids_grupos, erro in itens if erro is None)
+        itens = [
+            (user_id, None, 'Usuário repetido no lote') if erro is None and repeticoes[user_id] > 1 else (user_id, ids_grupos, erro)
+            for user_id, ids_grupos, erro in itens
+        ]
+
+        # Buscando todos os usuários e grupos do lote em duas consultas
+        usuarios = User.objects.in_bulk({user_id for user_id, ids_grupos, erro in itens if erro is None})
+        grupos = Group.objects.in_bulk({grupo_id for user_id, ids_grupos, erro in itens if erro is None for grupo_id in ids_grupos})
+
+        resultado = []
+        grupos_por_usuario = {}
+        for user_id, ids_grupos, erro in itens:
+            if erro:
+                resultado.append({'user_id': user_id, 'error': erro})
+                continue
+
+            if user_id not in usuarios:
+                resultado.append({'user_id': user_id, 'error': 'Usuário não encontrado'})
+                continue
+
+            inexistentes = [grupo_id for grupo_id in ids_grupos if grupo_id not in grupos]
+            if inexistentes:
+                resultado.append({'user_id': user_id, 'error': f'Os grupos com ID {inexistentes} não existem'})
+                continue
+
+            grupos_por_usuario[user_id] = list(dict.fromkeys(ids_grupos))
+            resultado.append({'user_id': user_id, 'groups': [grupos[grupo_id].name for grupo_id in grupos_por_usuario[user_id]]})
+
+        if grupos_por_usuario:
+            UsuarioGrupo = User.groups.through
+            with transaction.atomic():
+                # Remover os grupos atuais e gravar os novos vínculos de uma só vez
+                UsuarioGrupo.objects.filter(user_id__in=grupos_por_usuario.keys()).delete()
+                UsuarioGrupo.objects.bulk_create([
+                    UsuarioGrupo(user_id=user_id, group_id=grupo_id)
+                    for user_id, ids_grupos in grupos_por_usuario.items()
+                    for grupo_id in ids_grupos
+                ])
+
+                # Operações em lote não disparam m2m_changed, então as permissões dos usuários são invalidadas aqui,
+                # de uma vez e só após o commit
+                agendar_invalidacao_permissoes(grupos_por_usuario.keys())
+
+        return Response(resultado, status=status.HTTP_200_OK)